@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('awards', '0072_auto_20200604_1725'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AwardUpdateQueue',
+            fields=[
+                ('award_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('queued_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'award_update_queue',
+            },
+        ),
+    ]
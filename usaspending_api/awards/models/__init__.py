@@ -1,4 +1,5 @@
 from usaspending_api.awards.models.award import Award
+from usaspending_api.awards.models.award_update_queue import AwardUpdateQueue
 from usaspending_api.awards.models.broker_subaward import BrokerSubaward
 from usaspending_api.awards.models.financial_accounts_by_awards import FinancialAccountsByAwards
 from usaspending_api.awards.models.parent_award import ParentAward
@@ -10,6 +11,7 @@ from usaspending_api.awards.models.transaction_normalized import TransactionNorm
 
 __all__ = [
     "Award",
+    "AwardUpdateQueue",
     "BrokerSubaward",
     "FinancialAccountsByAwards",
     "ParentAward",
@@ -0,0 +1,19 @@
+"""
+AwardUpdateQueue (award_update_queue) holds the ids of awards whose transactions have been created, updated,
+or deleted but whose rolled up fields (earliest and latest transaction, totals, etc.) have not been recomputed yet.
+
+Loaders queue the awards they touch with award_helpers.queue_award_updates and award_helpers.update_queued_awards
+recomputes them in batches, so an award stays queued until its recompute is committed (for example, when a loader
+fails after loading transactions).  Award ids are not foreign keys since awards can be deleted while queued; a
+deleted award is simply skipped.
+"""
+from django.db import models
+
+
+class AwardUpdateQueue(models.Model):
+
+    award_id = models.BigIntegerField(primary_key=True)
+    queued_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "award_update_queue"
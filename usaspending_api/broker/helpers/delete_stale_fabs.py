@@ -3,7 +3,7 @@ import logging
 from django.db import connections, transaction, DEFAULT_DB_ALIAS
 
 from usaspending_api.awards.models import TransactionNormalized
-from usaspending_api.etl.award_helpers import update_awards
+from usaspending_api.etl.award_helpers import queue_award_updates, update_queued_awards
 from usaspending_api.broker.helpers.find_related_awards import find_related_awards
 
 
@@ -56,6 +56,7 @@ def delete_stale_fabs(ids_to_delete):
 
     # Update Awards
     if update_award_ids:
-        update_awards(tuple(update_award_ids))
+        queue_award_updates(update_award_ids)
+        update_queued_awards(update_award_ids)
 
     return update_award_ids
@@ -4,6 +4,8 @@ import time
 from copy import copy
 from datetime import datetime, timezone
 from django.db import connection, transaction
+from django.db.models import Count, Max
+from psycopg2.extras import execute_values
 
 from usaspending_api.awards.models import TransactionFABS, TransactionNormalized, Award
 from usaspending_api.broker.helpers.get_business_categories import get_business_categories
@@ -12,7 +14,7 @@ from usaspending_api.common.helpers.dict_helpers import upper_case_dict_values
 from usaspending_api.common.helpers.etl_helpers import update_c_to_d_linkages
 from usaspending_api.common.helpers.date_helper import fy
 from usaspending_api.common.helpers.timing_helpers import timer
-from usaspending_api.etl.award_helpers import update_awards, update_assistance_awards
+from usaspending_api.etl.award_helpers import queue_award_updates, update_queued_awards
 from usaspending_api.etl.broker_etl_helpers import dictfetchall
 from usaspending_api.etl.management.load_base import load_data_into_model, format_date
 from usaspending_api.references.models import Agency
@@ -45,34 +47,41 @@ def fetch_fabs_data_generator(dap_uid_list):
 
 
 @transaction.atomic
-def insert_all_new_fabs(all_new_to_insert):
+def insert_all_new_fabs(all_new_to_insert, bulk=False):
     update_award_ids = []
     for to_insert in fetch_fabs_data_generator(all_new_to_insert):
         start = time.perf_counter()
-        update_award_ids.extend(insert_new_fabs(to_insert))
+        update_award_ids.extend(bulk_insert_new_fabs(to_insert) if bulk else insert_new_fabs(to_insert))
         logger.info("FABS insertions took {:.2f}s".format(time.perf_counter() - start))
     return update_award_ids
 
 
-def insert_new_fabs(to_insert):
-    fabs_normalized_field_map = {
-        "type": "assistance_type",
-        "description": "award_description",
-        "funding_amount": "total_funding_amount",
-    }
+FABS_NORMALIZED_FIELD_MAP = {
+    "type": "assistance_type",
+    "description": "award_description",
+    "funding_amount": "total_funding_amount",
+}
 
-    fabs_field_map = {
-        "officer_1_name": "high_comp_officer1_full_na",
-        "officer_1_amount": "high_comp_officer1_amount",
-        "officer_2_name": "high_comp_officer2_full_na",
-        "officer_2_amount": "high_comp_officer2_amount",
-        "officer_3_name": "high_comp_officer3_full_na",
-        "officer_3_amount": "high_comp_officer3_amount",
-        "officer_4_name": "high_comp_officer4_full_na",
-        "officer_4_amount": "high_comp_officer4_amount",
-        "officer_5_name": "high_comp_officer5_full_na",
-        "officer_5_amount": "high_comp_officer5_amount",
-    }
+FABS_FIELD_MAP = {
+    "officer_1_name": "high_comp_officer1_full_na",
+    "officer_1_amount": "high_comp_officer1_amount",
+    "officer_2_name": "high_comp_officer2_full_na",
+    "officer_2_amount": "high_comp_officer2_amount",
+    "officer_3_name": "high_comp_officer3_full_na",
+    "officer_3_amount": "high_comp_officer3_amount",
+    "officer_4_name": "high_comp_officer4_full_na",
+    "officer_4_amount": "high_comp_officer4_amount",
+    "officer_5_name": "high_comp_officer5_full_na",
+    "officer_5_amount": "high_comp_officer5_amount",
+}
+
+# Rows written by each statement of bulk_insert_new_fabs
+BULK_WRITE_SIZE = 5000
+
+
+def insert_new_fabs(to_insert):
+    fabs_normalized_field_map = FABS_NORMALIZED_FIELD_MAP
+    fabs_field_map = FABS_FIELD_MAP
 
     update_award_ids = []
     for row in to_insert:
@@ -155,22 +164,209 @@ def insert_new_fabs(to_insert):
     return update_award_ids
 
 
-def upsert_fabs_transactions(ids_to_upsert, externally_updated_award_ids):
+def bulk_insert_new_fabs(to_insert):
+    """
+    Set-based equivalent of insert_new_fabs.  Agencies, awards, and existing transactions are looked up for the whole
+    batch at once, missing awards and transactions are bulk created, and existing transactions are updated with one
+    statement per BULK_WRITE_SIZE rows.  When a batch has several rows with the same afa_generated_unique, the last one
+    is loaded, as it would be by insert_new_fabs.
+    """
+    for row in to_insert:
+        upper_case_dict_values(row)
+
+    agencies = _agencies_by_subtier_code(
+        {row["awarding_sub_tier_agency_c"] for row in to_insert}
+        | {row["funding_sub_tier_agency_co"] for row in to_insert}
+    )
+    awards = _get_or_create_summary_awards(to_insert)
+
+    rows_by_afa_generated_unique = {}
+    for row, award in zip(to_insert, awards):
+        rows_by_afa_generated_unique[row["afa_generated_unique"]] = (row, award)
+
+    existing_transaction_ids = dict(
+        TransactionFABS.objects.filter(afa_generated_unique__in=list(rows_by_afa_generated_unique)).values_list(
+            "afa_generated_unique", "transaction_id"
+        )
+    )
+
+    now = datetime.now(timezone.utc)
+    new_transactions, updated_transactions, financial_assistance = [], [], []
+    for afa_generated_unique, (row, award) in rows_by_afa_generated_unique.items():
+        transaction_normalized_dict, financial_assistance_data = _transform_fabs_row(row, award, agencies)
+        transaction_normalized = TransactionNormalized(**transaction_normalized_dict)
+        transaction_normalized.fiscal_year = fy(transaction_normalized.action_date)
+        if afa_generated_unique in existing_transaction_ids:
+            transaction_normalized.id = existing_transaction_ids[afa_generated_unique]
+            transaction_normalized.update_date = now
+            updated_transactions.append(transaction_normalized)
+        else:
+            new_transactions.append(transaction_normalized)
+        financial_assistance.append((transaction_normalized, financial_assistance_data))
+
+    TransactionNormalized.objects.bulk_create(new_transactions, batch_size=BULK_WRITE_SIZE)
+    # Made after their transactions are created, since a related object's id is read when it's assigned
+    financial_assistance = [TransactionFABS(transaction=t, **data) for t, data in financial_assistance]
+    if updated_transactions:
+        fields = ["update_date", "fiscal_year"] + [
+            field for field in transaction_normalized_dict if field not in ("update_date", "fiscal_year")
+        ]
+        _bulk_update(TransactionNormalized, updated_transactions, fields)
+    if financial_assistance:
+        _bulk_upsert(TransactionFABS, financial_assistance, ["transaction"] + list(financial_assistance_data))
+
+    return [award.id for award in awards]
+
+
+def _transform_fabs_row(row, award, agencies):
+    """The transaction_normalized and transaction_fabs values of a row, exactly as insert_new_fabs makes them"""
+    try:
+        last_mod_date = datetime.strptime(str(row["modified_at"]), "%Y-%m-%d %H:%M:%S.%f").date()
+    except ValueError:
+        last_mod_date = datetime.strptime(str(row["modified_at"]), "%Y-%m-%d %H:%M:%S").date()
+
+    parent_txn_value_map = {
+        "award": award,
+        "awarding_agency": agencies.get(row["awarding_sub_tier_agency_c"]),
+        "funding_agency": agencies.get(row["funding_sub_tier_agency_co"]),
+        "period_of_performance_start_date": format_date(row["period_of_performance_star"]),
+        "period_of_performance_current_end_date": format_date(row["period_of_performance_curr"]),
+        "action_date": format_date(row["action_date"]),
+        "last_modified_date": last_mod_date,
+        "type_description": row["assistance_type_desc"],
+        "transaction_unique_id": row["afa_generated_unique"],
+        "business_categories": get_business_categories(row=row, data_type="fabs"),
+    }
+
+    transaction_normalized_dict = load_data_into_model(
+        TransactionNormalized(),  # thrown away
+        row,
+        field_map=FABS_NORMALIZED_FIELD_MAP,
+        value_map=parent_txn_value_map,
+        as_dict=True,
+    )
+
+    financial_assistance_data = load_data_into_model(
+        TransactionFABS(), row, field_map=FABS_FIELD_MAP, as_dict=True  # thrown away
+    )
+    financial_assistance_data["updated_at"] = cast_datetime_to_utc(financial_assistance_data["updated_at"])
+    financial_assistance_data["created_at"] = cast_datetime_to_utc(financial_assistance_data["created_at"])
+    financial_assistance_data["modified_at"] = cast_datetime_to_utc(financial_assistance_data["modified_at"])
+
+    return transaction_normalized_dict, financial_assistance_data
+
+
+def _agencies_by_subtier_code(subtier_codes):
+    """Agency.get_by_subtier_only for many subtier codes at once:  the Agency of each code with exactly one"""
+    single_agency_ids = (
+        Agency.objects.filter(subtier_agency__subtier_code__in=subtier_codes)
+        .values("subtier_agency__subtier_code")
+        .annotate(count=Count("id"), agency_id=Max("id"))
+        .filter(count=1)
+        .values_list("agency_id", flat=True)
+    )
+    return {
+        agency.subtier_agency.subtier_code: agency
+        for agency in Agency.objects.filter(id__in=single_agency_ids).select_related("subtier_agency")
+    }
+
+
+def _get_or_create_summary_awards(rows):
+    """
+    Award.get_or_create_summary_award (then save) for each row, returning their awards in the same order.  Awards are
+    matched on unique_award_key with one query, and missing awards are created with one statement.  The rare row
+    without a unique_award_key is matched on its fain or uri by get_or_create_summary_award itself.
+    """
+    keys = {row["unique_award_key"] for row in rows if row["unique_award_key"]}
+    awards_by_key = {}
+    for award in Award.objects.filter(generated_unique_award_id__in=keys).order_by("-id"):
+        awards_by_key[award.generated_unique_award_id] = award  # the first (lowest id) award, like .first()
+
+    existing_award_ids = [award.id for award in awards_by_key.values()]
+    new_awards = []
+    awards = []
+    for row in rows:
+        key = row["unique_award_key"]
+        if not key:
+            award = Award.get_or_create_summary_award(fain=row["fain"], uri=row["uri"], record_type=row["record_type"])[
+                1
+            ]
+            award.save()
+        elif key in awards_by_key:
+            award = awards_by_key[key]
+        else:
+            award = Award.get_or_create_summary_award(
+                generated_unique_award_id=key,
+                fain=row["fain"],
+                uri=row["uri"],
+                record_type=row["record_type"],
+                save=False,
+            )[1]
+            awards_by_key[key] = award
+            new_awards.append(award)
+        awards.append(award)
+
+    Award.objects.bulk_create(new_awards, batch_size=BULK_WRITE_SIZE)
+    # Saving an existing award only moves its update_date
+    Award.objects.filter(id__in=existing_award_ids).update(update_date=datetime.now(timezone.utc))
+    return awards
+
+
+def _field_values(objects, fields):
+    """Rows of database values of model fields, for execute_values"""
+    return [[field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields] for obj in objects]
+
+
+def _values_template(fields):
+    # Typed, since psycopg2 can't tell Postgres the type of a column of a VALUES list which is entirely NULL
+    return "({})".format(", ".join("%s::{}".format(field.cast_db_type(connection)) for field in fields))
+
+
+def _bulk_update(model, objects, field_names):
+    """Update field_names of each object's row (by primary key) with one statement per BULK_WRITE_SIZE objects"""
+    meta = model._meta
+    fields = [meta.pk] + [meta.get_field(name) for name in field_names]
+    columns = ", ".join('"{}"'.format(field.column) for field in fields)
+    assignments = ", ".join('"{0}" = v."{0}"'.format(field.column) for field in fields[1:])
+    sql = 'UPDATE "{table}" AS t SET {assignments} FROM (VALUES %s) AS v ({columns}) WHERE t."{pk}" = v."{pk}"'.format(
+        table=meta.db_table, assignments=assignments, columns=columns, pk=meta.pk.column
+    )
+    with connection.cursor() as cursor:
+        execute_values(
+            cursor.cursor, sql, _field_values(objects, fields), _values_template(fields), page_size=BULK_WRITE_SIZE
+        )
+
+
+def _bulk_upsert(model, objects, field_names):
+    """
+    Insert each object, or update field_names of the existing row with the same afa_generated_unique, with one
+    INSERT ... ON CONFLICT statement per BULK_WRITE_SIZE objects
+    """
+    meta = model._meta
+    fields = [meta.get_field(name) for name in field_names]
+    columns = ", ".join('"{}"'.format(field.column) for field in fields)
+    assignments = ", ".join('"{0}" = EXCLUDED."{0}"'.format(field.column) for field in fields if not field.primary_key)
+    sql = 'INSERT INTO "{table}" ({columns}) VALUES %s ON CONFLICT (afa_generated_unique) DO UPDATE SET {assignments}'
+    sql = sql.format(table=meta.db_table, columns=columns, assignments=assignments)
+    with connection.cursor() as cursor:
+        execute_values(
+            cursor.cursor, sql, _field_values(objects, fields), _values_template(fields), page_size=BULK_WRITE_SIZE
+        )
+
+
+def upsert_fabs_transactions(ids_to_upsert, externally_updated_award_ids, bulk=False):
     if ids_to_upsert or externally_updated_award_ids:
         update_award_ids = copy(externally_updated_award_ids)
 
         if ids_to_upsert:
             with timer("inserting new FABS data", logger.info):
-                update_award_ids.extend(insert_all_new_fabs(ids_to_upsert))
+                update_award_ids.extend(insert_all_new_fabs(ids_to_upsert, bulk))
 
         if update_award_ids:
-            update_award_ids = tuple(set(update_award_ids))  # Convert to tuple and remove duplicates.
+            queue_award_updates(update_award_ids)
             with timer("updating awards to reflect their latest associated transaction info", logger.info):
-                award_record_count = update_awards(update_award_ids)
+                award_record_count = update_queued_awards(update_award_ids)
                 logger.info("{} awards updated from their transactional data".format(award_record_count))
-            with timer("updating awards with executive compensation data", logger.info):
-                award_record_count = update_assistance_awards(update_award_ids)
-                logger.info("{} awards updated FABS-specific and exec comp data".format(award_record_count))
 
         with timer("updating C->D linkages", logger.info):
             update_c_to_d_linkages("assistance")
@@ -0,0 +1,96 @@
+import logging
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from time import perf_counter
+
+from usaspending_api.broker.helpers.upsert_fabs_transactions import (
+    BATCH_FETCH_SIZE,
+    bulk_insert_new_fabs,
+    insert_new_fabs,
+)
+from usaspending_api.common.custom_django_fields import BooleanFieldWithDefault, NaiveTimestampField, NumericField
+from usaspending_api.references.models import SubtierAgency
+from usaspending_api.transactions.models import SourceAssistanceTransaction
+
+
+logger = logging.getLogger("script")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/sec of the record-by-record (insert_new_fabs) and set-based (bulk_insert_new_fabs) FABS upserts "
+        "on a synthetic batch of source_assistance_transaction rows.  Each path inserts the rows and then reloads them "
+        "(updating every transaction) in a database transaction which is rolled back, so nothing is kept.  The "
+        "record-by-record path is slow, so it only loads the first --row-path-rows rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000000, help="Synthetic rows loaded by the set-based path")
+        parser.add_argument(
+            "--row-path-rows", type=int, default=25000, help="Synthetic rows loaded by the record-by-record path"
+        )
+        parser.add_argument("--transactions-per-award", type=int, default=4, help="Synthetic transactions per award")
+
+    def handle(self, *args, **options):
+        subtier_codes = list(SubtierAgency.objects.values_list("subtier_code", flat=True)[:100]) or ["0000"]
+        paths = (
+            ("set-based", bulk_insert_new_fabs, options["rows"]),
+            ("record-by-record", insert_new_fabs, options["row_path_rows"]),
+        )
+
+        for name, upsert, rows in paths:
+            with transaction.atomic():
+                for step in ("insert", "update"):
+                    start = perf_counter()
+                    for batch_start in range(0, rows, BATCH_FETCH_SIZE):
+                        batch_end = min(batch_start + BATCH_FETCH_SIZE, rows)
+                        upsert(synthetic_rows(batch_start, batch_end, options["transactions_per_award"], subtier_codes))
+                    duration = perf_counter() - start
+                    logger.info(f"{name} {step}: {rows:,} rows in {duration:.2f}s ({rows / duration:,.0f} rows/sec)")
+                transaction.set_rollback(True)
+
+
+def synthetic_rows(start, end, transactions_per_award, subtier_codes):
+    """Rows shaped like SELECT * FROM source_assistance_transaction, with values covering every field type"""
+    fields = [field for field in SourceAssistanceTransaction._meta.get_fields() if field.concrete]
+    rows = []
+    for i in range(start, end):
+        award = i // transactions_per_award
+        subtier_code = subtier_codes[award % len(subtier_codes)]
+        row = {field.column: _synthetic_value(field, i) for field in fields}
+        row.update(
+            {
+                "published_award_financial_assistance_id": i + 1,
+                "afa_generated_unique": f"BENCHMARK_{i}",
+                "unique_award_key": f"ASST_NON_BENCHMARK{award}_{subtier_code}",
+                "fain": f"BENCHMARK{award}",
+                "uri": None,
+                "record_type": 2,
+                "awarding_sub_tier_agency_c": subtier_code,
+                "funding_sub_tier_agency_co": subtier_code,
+                "action_date": (date(2019, 10, 1) + timedelta(days=i % 365)).isoformat(),
+                "period_of_performance_star": "2019-10-01",
+                "period_of_performance_curr": "2020-09-30",
+                "business_types": "ABCDEFGHIJKLMNOPQRSTUVWX"[i % 24],
+                "is_active": True,
+            }
+        )
+        rows.append(row)
+    return rows
+
+
+def _synthetic_value(field, i):
+    if isinstance(field, models.IntegerField):
+        return i
+    if isinstance(field, (models.DecimalField, NumericField)):
+        return Decimal(i % 100000) + Decimal("0.25")
+    if isinstance(field, (models.DateTimeField, NaiveTimestampField)):
+        return datetime(2020, 1, 1) + timedelta(seconds=i)
+    if isinstance(field, (models.BooleanField, models.NullBooleanField, BooleanFieldWithDefault)):
+        return bool(i % 2)
+    if isinstance(field, models.TextField):
+        return f"{field.column[:8]}{i % 97}"
+    return None
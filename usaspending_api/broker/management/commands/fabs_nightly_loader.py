@@ -178,6 +178,13 @@ class Command(BaseCommand):
             "quotes if date/time contains spaces.",
         )
 
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Upsert each batch of transactions with a few set-based statements instead of several statements "
+            "per transaction.",
+        )
+
     def handle(self, *args, **options):
         processing_start_datetime = datetime.now(timezone.utc)
 
@@ -216,7 +223,7 @@ class Command(BaseCommand):
             ids_to_upsert = get_fabs_transaction_ids(ids, afa_ids, start_datetime, end_datetime)
 
         update_award_ids = delete_fabs_transactions(ids_to_delete) if is_incremental_load else []
-        upsert_fabs_transactions(ids_to_upsert, update_award_ids)
+        upsert_fabs_transactions(ids_to_upsert, update_award_ids, options["bulk"])
 
         if is_incremental_load:
             update_last_load_date("fabs", processing_start_datetime)
@@ -1,9 +1,12 @@
 import logging
+import multiprocessing
 import psycopg2
 import re
 
 from datetime import datetime, timezone
+from django import db
 from django.core.management.base import BaseCommand
+from functools import partial
 from typing import IO, List, AnyStr, Optional
 
 from usaspending_api.broker.helpers.last_load_date import get_last_load_date, update_last_load_date
@@ -11,8 +14,13 @@ from usaspending_api.common.helpers.date_helper import datetime_command_line_arg
 from usaspending_api.common.helpers.etl_helpers import update_c_to_d_linkages
 from usaspending_api.common.helpers.sql_helpers import get_database_dsn_string
 from usaspending_api.common.retrieve_file_from_uri import RetrieveFileFromUri
-from usaspending_api.etl.award_helpers import update_awards, update_procurement_awards, prune_empty_awards
-from usaspending_api.etl.transaction_loaders.fpds_loader import load_fpds_transactions, failed_ids, delete_stale_fpds
+from usaspending_api.etl.award_helpers import prune_empty_awards, queue_award_updates, update_queued_awards
+from usaspending_api.etl.transaction_loaders.fpds_loader import (
+    bulk_load_fpds_transactions,
+    delete_stale_fpds,
+    failed_ids,
+    load_fpds_transactions,
+)
 from usaspending_api.transactions.transaction_delete_journal_helpers import retrieve_deleted_fpds_transactions
 
 logger = logging.getLogger("script")
@@ -21,14 +29,20 @@ CHUNK_SIZE = 15000
 
 ALL_FPDS_QUERY = "SELECT {} FROM source_procurement_transaction"
 
+# Splits records into partitions by award so that partitions loaded in parallel never create or update the same award
+PARTITION_CONDITION = "mod(abs(hashtext(coalesce(unique_award_key, ''))::bigint), %s) = %s"
+
 
 class Command(BaseCommand):
     help = "Sync USAspending DB FPDS data using source transaction for new or modified records and S3 for deleted IDs"
 
     modified_award_ids = []
 
+    load_transactions = staticmethod(load_fpds_transactions)
+
     @staticmethod
-    def get_cursor_for_date_query(connection, date, count=False):
+    def get_cursor_for_date_query(connection, date, count=False, partition=None):
+        """partition is the number of partitions and the index of the one to query"""
         if count:
             db_cursor = connection.cursor()
             db_query = ALL_FPDS_QUERY.format("COUNT(*)")
@@ -36,13 +50,22 @@ class Command(BaseCommand):
             db_cursor = connection.cursor("fpds_load", cursor_factory=psycopg2.extras.DictCursor)
             db_query = ALL_FPDS_QUERY.format("detached_award_procurement_id")
 
+        conditions, params = [], []
         if date:
-            db_cursor.execute(db_query + " WHERE updated_at >= %s", [date])
-        else:
-            db_cursor.execute(db_query)
+            conditions.append("updated_at >= %s")
+            params.append(date)
+        if partition:
+            conditions.append(PARTITION_CONDITION)
+            params.extend(partition)
+        if conditions:
+            db_query += " WHERE " + " AND ".join(conditions)
+
+        db_cursor.execute(db_query, params or None)
         return db_cursor
 
-    def load_fpds_incrementally(self, date: Optional[datetime], chunk_size: int = CHUNK_SIZE) -> None:
+    def load_fpds_incrementally(
+        self, date: Optional[datetime], chunk_size: int = CHUNK_SIZE, processes: int = 1
+    ) -> None:
         """Process incremental loads based on a date range or full data loads"""
 
         if date is None:
@@ -57,17 +80,21 @@ class Command(BaseCommand):
         with psycopg2.connect(dsn=get_database_dsn_string()) as connection:
             logger.info("Fetching records to update")
             total_records = self.get_cursor_for_date_query(connection, date, True).fetchall()[0][0]
-            records_processed = 0
             logger.info("{} total records to update".format(total_records))
-            cursor = self.get_cursor_for_date_query(connection, date)
-            while True:
-                id_list = cursor.fetchmany(chunk_size)
-                if len(id_list) == 0:
-                    break
-                logger.info("Loading batch (size: {}) from date query...".format(len(id_list)))
-                self.modified_award_ids.extend(load_fpds_transactions([row[0] for row in id_list]))
-                records_processed = records_processed + len(id_list)
-                logger.info("{} out of {} processed".format(records_processed, total_records))
+
+        if processes > 1:
+            logger.info(f"Loading {processes} partitions of the records in parallel")
+            # Forked processes must not share this process's database connection
+            db.connections.close_all()
+            load_partition = partial(_load_partition, self.load_transactions, date, chunk_size, None)
+            partitions = [(processes, index) for index in range(processes)]
+            with multiprocessing.Pool(processes) as pool:
+                for award_ids, partition_failed_ids in pool.imap_unordered(load_partition, partitions):
+                    self.modified_award_ids.extend(award_ids)
+                    failed_ids.extend(partition_failed_ids)
+        else:
+            award_ids, _ = _load_partition(self.load_transactions, date, chunk_size, total_records, None)
+            self.modified_award_ids.extend(award_ids)
 
     @staticmethod
     def gen_read_file_for_ids(file: IO[AnyStr], chunk_size: int = CHUNK_SIZE) -> List[str]:
@@ -88,7 +115,7 @@ class Command(BaseCommand):
                 id_list = [int(re.search(r"\d+", x).group()) for x in next_batch]
                 total_count += len(id_list)
                 logger.info(f"Loading next batch (size: {len(id_list)}, ids {id_list[0]}-{id_list[-1]})...")
-                self.modified_award_ids.extend(load_fpds_transactions(id_list))
+                self.modified_award_ids.extend(self.load_transactions(id_list))
 
         logger.info(f"Total transaction IDs in file: {total_count}")
 
@@ -98,10 +125,8 @@ class Command(BaseCommand):
             unique_awards = set(awards)
             logger.info(f"{len(unique_awards)} award records impacted by transaction DML operations")
             logger.info(f"{prune_empty_awards(tuple(unique_awards))} award records removed")
-            logger.info(f"{update_awards(tuple(unique_awards))} award records updated")
-            logger.info(
-                f"{update_procurement_awards(tuple(unique_awards))} award records updated on FPDS-specific fields"
-            )
+            queue_award_updates(unique_awards)
+            logger.info(f"{update_queued_awards(unique_awards)} award records updated")
             if not skip_cd_linkage:
                 update_c_to_d_linkages("contract")
         else:
@@ -139,20 +164,35 @@ class Command(BaseCommand):
             action="store_true",
             help="Script will load or reload all FPDS records in source tables, from all time. This does NOT clear the USAspending database first",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Load each chunk of records with a few set-based statements instead of several statements per record",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="With --date, --since-last-load, or --reload-all, load this many partitions of the records (split by "
+            "award) in parallel",
+        )
 
     def handle(self, *args, **options):
 
         # Record script execution start time to update the FPDS last updated date in DB as appropriate
         update_time = datetime.now(timezone.utc)
 
+        if options["bulk"]:
+            self.load_transactions = bulk_load_fpds_transactions
+
         if options["reload_all"]:
-            self.load_fpds_incrementally(None)
+            self.load_fpds_incrementally(None, processes=options["processes"])
 
         elif options["date"]:
-            self.load_fpds_incrementally(options["date"])
+            self.load_fpds_incrementally(options["date"], processes=options["processes"])
 
         elif options["ids"]:
-            self.modified_award_ids.extend(load_fpds_transactions(options["ids"]))
+            self.modified_award_ids.extend(self.load_transactions(options["ids"]))
 
         elif options["file"]:
             self.load_fpds_from_file(options["file"])
@@ -161,7 +201,7 @@ class Command(BaseCommand):
             last_load = get_last_load_date("fpds")
             if not last_load:
                 raise ValueError("No last load date for FPDS stored in the database")
-            self.load_fpds_incrementally(last_load)
+            self.load_fpds_incrementally(last_load, processes=options["processes"])
 
         self.update_award_records(awards=self.modified_award_ids, skip_cd_linkage=False)
 
@@ -177,3 +217,29 @@ class Command(BaseCommand):
             update_last_load_date("fpds", update_time)
 
         logger.info(f"Successfully Completed")
+
+
+def _load_partition(load_transactions, date, chunk_size, total_records, partition):
+    """
+    Load the records updated since date (all records if it's None) in one partition (all partitions if it's None).
+    Returns the ids of the awards touched and the ids of the records which failed to load.
+    """
+    # A pool worker starts with a copy of its parent's failed_ids and can load more than one partition, so start from
+    # an empty list to return only this partition's failures
+    failed_ids.clear()
+    award_ids = []
+    with psycopg2.connect(dsn=get_database_dsn_string()) as connection:
+        cursor = Command.get_cursor_for_date_query(connection, date, partition=partition)
+        records_processed = 0
+        while True:
+            id_list = cursor.fetchmany(chunk_size)
+            if len(id_list) == 0:
+                break
+            logger.info("Loading batch (size: {}) from date query...".format(len(id_list)))
+            award_ids.extend(load_transactions([row[0] for row in id_list]))
+            records_processed = records_processed + len(id_list)
+            if partition:
+                logger.info("{} processed in partition {}".format(records_processed, partition[1]))
+            else:
+                logger.info("{} out of {} processed".format(records_processed, total_records))
+    return award_ids, list(failed_ids)
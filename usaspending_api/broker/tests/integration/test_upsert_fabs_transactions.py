@@ -0,0 +1,46 @@
+import pytest
+
+from model_mommy import mommy
+
+from usaspending_api.awards.models import Award, TransactionFABS, TransactionNormalized
+from usaspending_api.broker.helpers.upsert_fabs_transactions import bulk_insert_new_fabs, insert_new_fabs
+from usaspending_api.broker.management.commands.benchmark_fabs_upsert import synthetic_rows
+
+
+def _loaded_values():
+    """Everything loaded except the ids and load times, which differ from load to load"""
+    ignored = {"id", "award_id", "transaction_id", "create_date", "update_date"}
+
+    def values(queryset):
+        return sorted(str({k: v for k, v in row.items() if k not in ignored}) for row in queryset.values())
+
+    return {
+        "awards": values(Award.objects.all()),
+        "transactions": values(TransactionNormalized.objects.all()),
+        "transaction_fabs": values(TransactionFABS.objects.all()),
+        "award_transactions": sorted(
+            TransactionNormalized.objects.values_list("award__generated_unique_award_id", "transaction_unique_id")
+        ),
+    }
+
+
+def _delete_all():
+    TransactionFABS.objects.all().delete()
+    TransactionNormalized.objects.all().delete()
+    Award.objects.all().delete()
+
+
+@pytest.mark.django_db
+def test_bulk_insert_new_fabs_matches_insert_new_fabs():
+    mommy.make("references.Agency", subtier_agency__subtier_code="1000", toptier_agency__toptier_code="100")
+    returned_award_ids = insert_new_fabs(synthetic_rows(0, 10, 3, ["1000", "2000"]))
+    insert_new_fabs(synthetic_rows(5, 10, 3, ["1000", "2000"]))  # updates
+    expected = _loaded_values()
+    assert len(set(returned_award_ids)) == Award.objects.count() == 4
+    _delete_all()
+
+    returned_award_ids = bulk_insert_new_fabs(synthetic_rows(0, 10, 3, ["1000", "2000"]))
+    assert len(set(returned_award_ids)) == Award.objects.count() == 4
+    bulk_insert_new_fabs(synthetic_rows(5, 10, 3, ["1000", "2000"]))
+    assert _loaded_values() == expected
+    assert TransactionNormalized.objects.filter(awarding_agency__isnull=False).count() == 6
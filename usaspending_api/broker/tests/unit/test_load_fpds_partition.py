@@ -0,0 +1,29 @@
+from unittest.mock import MagicMock
+
+from usaspending_api.broker.management.commands import load_fpds_transactions
+from usaspending_api.etl.transaction_loaders.fpds_loader import failed_ids
+
+
+def test_load_partition_returns_only_its_own_failures(monkeypatch):
+    module = "usaspending_api.broker.management.commands.load_fpds_transactions"
+    monkeypatch.setattr(f"{module}.get_database_dsn_string", lambda: "")
+    monkeypatch.setattr(f"{module}.psycopg2.connect", lambda dsn: MagicMock())
+
+    def get_cursor_for_date_query(connection, date, count=False, partition=None):
+        cursor = MagicMock()
+        cursor.fetchmany.side_effect = [[(partition[1] * 10 + 1,), (partition[1] * 10 + 2,)], []]
+        return cursor
+
+    def load_transactions(ids):
+        failed_ids.append(ids[-1])
+        return [ids[0]]
+
+    monkeypatch.setattr(load_fpds_transactions.Command, "get_cursor_for_date_query", get_cursor_for_date_query)
+
+    # A pool worker can load several partitions, and starts with whatever its parent had already recorded
+    failed_ids[:] = [99]
+    try:
+        assert load_fpds_transactions._load_partition(load_transactions, None, 2, None, (2, 0)) == ([1], [2])
+        assert load_fpds_transactions._load_partition(load_transactions, None, 2, None, (2, 1)) == ([11], [12])
+    finally:
+        failed_ids.clear()
@@ -1,13 +1,116 @@
 # -*- coding: utf-8 -*-
+import contextvars
+import copy
+import json
 import logging
+import threading
+import time
+import zlib
+
+from collections import Counter
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
 from rest_framework_extensions.cache.decorators import CacheResponse
 
+from usaspending_api.common.elasticsearch.client import get_es_query_metrics, reset_es_query_metrics
 from usaspending_api.common.experimental_api_flags import is_experimental_elasticsearch_api
 
 logger = logging.getLogger("console")
 
+# Seconds between checks for a response being computed by another worker
+LOCK_POLL_SECONDS = 0.05
+
+# zlib level of cached responses; about twice as fast as the default level for nearly the same size of JSON
+COMPRESSION_LEVEL = 3
+
+# Cache lookups by outcome since this process started; see get_response_cache_metrics
+_METRICS = Counter()
+_METRICS_LOCK = threading.Lock()
+
+
+def record_response_cache_event(event):
+    with _METRICS_LOCK:
+        _METRICS[event] += 1
+
+
+def reset_response_cache_metrics():
+    with _METRICS_LOCK:
+        _METRICS.clear()
+
+
+def get_response_cache_metrics():
+    """
+    Counts of the cached API requests handled by this process:  "hit" (fresh response from the cache), "stale" (stale
+    response from the cache, refreshed in the background), "miss" (response computed by this request), "wait"
+    (response computed by another request for the same key while this one waited), and "refresh" (background
+    refreshes of stale responses).
+    """
+    with _METRICS_LOCK:
+        return {event: _METRICS[event] for event in ("hit", "stale", "miss", "wait", "refresh")}
+
+
+class CachedResponse:
+    """
+    A rendered response body, the headers needed to serve it, and the time after which it's stale.  It's stored in the
+    cache as bytes rather than as a pickled Response:  a line of JSON metadata followed by the body, which is zlib
+    compressed when it's at least CACHE_RESPONSE_COMPRESS_MIN_BYTES.  A hit is served as the body of an HttpResponse.
+    """
+
+    def __init__(self, status_code, content_type, content, fresh_until):
+        self.status_code = status_code
+        self.content_type = content_type
+        self.content = content
+        self.fresh_until = fresh_until
+
+    @classmethod
+    def from_response(cls, response, fresh_until):
+        return cls(response.status_code, response["Content-Type"], response.content, fresh_until)
+
+    @classmethod
+    def from_bytes(cls, data):
+        metadata, content = data.split(b"\n", 1)
+        metadata = json.loads(metadata)
+        if metadata["compressed"]:
+            content = zlib.decompress(content)
+        return cls(metadata["status_code"], metadata["content_type"], content, metadata["fresh_until"])
+
+    def to_bytes(self):
+        compressed = len(self.content) >= settings.CACHE_RESPONSE_COMPRESS_MIN_BYTES
+        metadata = {
+            "status_code": self.status_code,
+            "content_type": self.content_type,
+            "fresh_until": self.fresh_until,
+            "compressed": compressed,
+        }
+        content = zlib.compress(self.content, COMPRESSION_LEVEL) if compressed else self.content
+        return json.dumps(metadata).encode("utf-8") + b"\n" + content
+
+    def to_response(self):
+        return HttpResponse(self.content, status=self.status_code, content_type=self.content_type)
+
+    @property
+    def is_stale(self):
+        return self.fresh_until is not None and time.time() >= self.fresh_until
+
 
 class CustomCacheResponse(CacheResponse):
+    """
+    Caches API responses with:
+      * Single-flight locking:  on a miss, only one request per cache key (across every worker sharing the cache)
+        runs the view.  Other requests for that key wait up to CACHE_RESPONSE_LOCK_WAIT_SECONDS for its response
+        rather than computing it again.
+      * Stale-while-revalidate:  a response older than its fresh_timeout is still served until its timeout, while one
+        request refreshes it in a background thread.
+      * Per-endpoint timeouts:  the timeout and fresh_timeout given to the decorator, overridden by any entry for the
+        request path in CACHE_RESPONSE_TIMEOUTS.  A fresh_timeout of None (the default) means never stale, and a
+        timeout of None means the response is kept until the cache is cleared.
+    """
+
+    def __init__(self, timeout=None, fresh_timeout=None, **kwargs):
+        super().__init__(timeout=timeout, **kwargs)
+        self.fresh_timeout = fresh_timeout if fresh_timeout is not None else settings.CACHE_RESPONSE_FRESH_SECONDS
+
     def process_cache_response(self, view_instance, view_method, request, args, kwargs):
         if is_experimental_elasticsearch_api(request):
             # bypass cache altogether
@@ -18,29 +121,36 @@ class CustomCacheResponse(CacheResponse):
         key = self.calculate_key(
             view_instance=view_instance, view_method=view_method, request=request, args=args, kwargs=kwargs
         )
-        response = None
-        try:
-            response = self.cache.get(key)
-        except Exception:
-            msg = "Problem while retrieving key [{k}] from cache for path:'{p}'"
-            logger.exception(msg.format(k=key, p=str(request.path)))
-
-        if not response:
-            response = view_method(view_instance, request, *args, **kwargs)
-            response = view_instance.finalize_response(request, response, *args, **kwargs)
-            response["Cache-Trace"] = "no-cache"
-            response.render()  # should be rendered, before picklining while storing to cache
+        timeout, fresh_timeout = self.get_timeouts(request)
 
-            if not response.status_code >= 400 or self.cache_errors:
-                if self.cache_errors:
-                    logger.error(self.cache_errors)
+        cached = self.get_cached(key, request)
+        if cached is None:
+            cached, locked = self.wait_for_cached(key, request)
+            if cached is None:
+                record_response_cache_event("miss")
                 try:
-                    self.cache.set(key, response, self.timeout)
-                    response["Cache-Trace"] = "set-cache"
-                except Exception:
-                    msg = "Problem while writing to cache: path:'{p}' data:'{d}'"
-                    logger.exception(msg.format(p=str(request.path), d=str(request.data)))
+                    response = self.compute_response(view_instance, view_method, request, args, kwargs)
+                    response["Cache-Trace"] = "no-cache"
+                    if self.store(key, response, timeout, fresh_timeout, request):
+                        response["Cache-Trace"] = "set-cache"
+                finally:
+                    if locked:
+                        self.release_lock(key)
+            else:
+                record_response_cache_event("wait")
+                response = cached.to_response()
+                response["Cache-Trace"] = "wait-cache"
+        elif cached.is_stale:
+            record_response_cache_event("stale")
+            response = cached.to_response()
+            response["Cache-Trace"] = "stale-cache"
+            if self.acquire_lock(key):
+                self.refresh_in_background(
+                    key, timeout, fresh_timeout, view_instance, view_method, request, args, kwargs
+                )
         else:
+            record_response_cache_event("hit")
+            response = cached.to_response()
             response["Cache-Trace"] = "hit-cache"
 
         if not hasattr(response, "_closable_objects"):
@@ -49,5 +159,98 @@ class CustomCacheResponse(CacheResponse):
         response["key"] = key
         return response
 
+    def get_timeouts(self, request):
+        endpoint = settings.CACHE_RESPONSE_TIMEOUTS.get(request.path, {})
+        return endpoint.get("timeout", self.timeout), endpoint.get("fresh_timeout", self.fresh_timeout)
+
+    def get_cached(self, key, request):
+        try:
+            cached = self.cache.get(key)
+            return CachedResponse.from_bytes(cached) if isinstance(cached, bytes) else None
+        except Exception:
+            msg = "Problem while retrieving key [{k}] from cache for path:'{p}'"
+            logger.exception(msg.format(k=key, p=str(request.path)))
+            return None
+
+    def wait_for_cached(self, key, request):
+        """
+        Wait for another request computing the response for this key.  Returns the cached response, or None and
+        whether this request holds the key's lock once it should compute the response itself:  when no other request
+        is computing it, or the other request fails or takes too long.
+        """
+        deadline = time.monotonic() + settings.CACHE_RESPONSE_LOCK_WAIT_SECONDS
+        while not self.acquire_lock(key):
+            if time.monotonic() >= deadline:
+                logger.warning("Gave up waiting for response to be cached for path:'{}'".format(request.path))
+                return None, False
+            time.sleep(LOCK_POLL_SECONDS)
+            cached = self.get_cached(key, request)
+            if cached is not None:
+                return cached, False
+        return None, True
+
+    @staticmethod
+    def lock_key(key):
+        return "{}:lock".format(key)
+
+    def acquire_lock(self, key):
+        try:
+            return self.cache.add(self.lock_key(key), True, settings.CACHE_RESPONSE_LOCK_SECONDS)
+        except Exception:
+            logger.exception("Problem while locking key [{}] in cache".format(key))
+            return True
+
+    def release_lock(self, key):
+        try:
+            self.cache.delete(self.lock_key(key))
+        except Exception:
+            logger.exception("Problem while unlocking key [{}] in cache".format(key))
+
+    @staticmethod
+    def compute_response(view_instance, view_method, request, args, kwargs):
+        response = view_method(view_instance, request, *args, **kwargs)
+        response = view_instance.finalize_response(request, response, *args, **kwargs)
+        response.render()  # should be rendered, before its content is stored in the cache
+        return response
+
+    def store(self, key, response, timeout, fresh_timeout, request):
+        """Cache the response unless it's an error, returning whether it was cached"""
+        if response.status_code >= 400 and not self.cache_errors:
+            return False
+        if self.cache_errors:
+            logger.error(self.cache_errors)
+        fresh_until = None if fresh_timeout is None else time.time() + fresh_timeout
+        try:
+            self.cache.set(key, CachedResponse.from_response(response, fresh_until).to_bytes(), timeout)
+        except Exception:
+            msg = "Problem while writing to cache: path:'{p}' data:'{d}'"
+            logger.exception(msg.format(p=str(request.path), d=str(request.data)))
+            return False
+        return True
+
+    def refresh_in_background(self, key, timeout, fresh_timeout, view_instance, view_method, request, args, kwargs):
+        """
+        Recompute a stale response after this request is answered.  The view runs on a copy of the view instance
+        since the original is still used to finish this request's response.  The request has been logged by the time
+        the refresh finishes, so the refresh counts its Elasticsearch queries in its own context and logs them itself.
+        """
+
+        def refresh():
+            reset_es_query_metrics()
+            try:
+                response = self.compute_response(copy.copy(view_instance), view_method, request, args, kwargs)
+                self.store(key, response, timeout, fresh_timeout, request)
+                record_response_cache_event("refresh")
+                logger.info("Refreshed stale response for path:'{}' {}".format(request.path, get_es_query_metrics()))
+            except Exception:
+                logger.exception("Problem while refreshing stale response for path:'{}'".format(request.path))
+            finally:
+                self.release_lock(key)
+                connections.close_all()
+
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(refresh,), name="Refresh cached response", daemon=True
+        ).start()
+
 
 cache_response = CustomCacheResponse
@@ -1,27 +1,41 @@
 import codecs
 import csv
 import os
+import re
 
 from usaspending_api.common.retrieve_file_from_uri import RetrieveFileFromUri
 
 
-def count_rows_in_delimited_file(filename, has_header=True, safe=True, delimiter=","):
+# Amount of raw delimited text scanned at a time by the byte-level helpers below
+DELIMITED_SCAN_CHUNK_SIZE = 8 * 1024 * 1024
+
+_QUOTED_VALUE_REGEX = re.compile(b'"[^"]*"')
+
+
+def count_rows_in_delimited_file(filename, has_header=True, safe=True, delimiter=",", parse_fields=False):
     """
         Simple and efficient utility function to provide the rows in a vald delimited file
         If a header is not present, set head_header parameter to False
 
-        Added "safe" mode which will handle any NUL BYTE characters in delimited files
+        By default the file is scanned as raw bytes (see `count_delimited_records`) which is several times
+        faster than parsing it.  Set parse_fields to True to count rows with the csv module instead.
+
+        Added "safe" mode which will handle any NUL BYTE characters in delimited files when parsing fields.
         It does increase the function runtime by approx 10%.
             Example:
                 "non-safe" counting ~1 million records in a delimited file takes 9s
                 using "safe mode", it now takes 10s
 
     """
-    with codecs.open(filename, "r") as f:
-        if safe:
-            row_count = sum(1 for row in csv.reader((line.replace("\0", "") for line in f), delimiter=delimiter))
-        else:
-            row_count = sum(1 for row in csv.reader(f, delimiter=delimiter))
+    if parse_fields:
+        with codecs.open(filename, "r") as f:
+            if safe:
+                row_count = sum(1 for row in csv.reader((line.replace("\0", "") for line in f), delimiter=delimiter))
+            else:
+                row_count = sum(1 for row in csv.reader(f, delimiter=delimiter))
+    else:
+        with open(filename, "rb") as f:
+            row_count = count_delimited_records(f)
     if has_header and row_count > 0:
         row_count -= 1
 
@@ -30,7 +44,12 @@ def count_rows_in_delimited_file(filename, has_header=True, safe=True, delimiter
 
 # Function inspired by Ben Welsh: https://gist.github.com/palewire/596056
 def partition_large_delimited_file(
-    file_path: str, delimiter=",", row_limit=10000, output_name_template="output_%s.csv", keep_headers=True
+    file_path: str,
+    delimiter=",",
+    row_limit=10000,
+    output_name_template="output_%s.csv",
+    keep_headers=True,
+    parse_fields=False,
 ):
     """Splits a delimited file into multiple partitions if it exceeds the row limit.
 
@@ -41,9 +60,23 @@ def partition_large_delimited_file(
         `row_limit`: The number of rows you want in each output file. 10,000 by default.
         `output_name_template`: A %s-style template for the numbered output files.
         `keep_headers`: Whether or not to copy the original headers into each output file.
+        `parse_fields`: Rebuild every row through the csv module instead of copying raw byte ranges. Much slower;
+            rows are written with csv.writer's quoting and "\r\n" line terminators.
     """
     new_csv_list = []
     output_path = os.path.dirname(file_path)
+
+    if not parse_fields:
+
+        def open_partition(partition_number):
+            current_out_path = os.path.join(output_path, output_name_template % partition_number)
+            new_csv_list.append(current_out_path)
+            return open(current_out_path, "wb")
+
+        with open(file_path, "rb") as source_file:
+            partition_delimited_stream(source_file, open_partition, row_limit=row_limit, keep_headers=keep_headers)
+        return new_csv_list
+
     with open(file_path, "r") as source_csv:
         original_csv_file_reader = csv.reader(source_csv, delimiter=delimiter)
         partition_number = 1
@@ -79,6 +112,131 @@ def partition_large_delimited_file(
     return new_csv_list
 
 
+def scan_delimited_buffer(buffer, start=0, in_quotes=False, limit=None):
+    """
+    Quote-aware scan of raw delimited text (bytes, bytearray, or an mmap-ed chunk) for the newlines that end
+    records, without parsing fields.  A newline inside a quoted value does not end a record; escaped quotes ("")
+    simply close and re-open the quoted value.  NUL bytes need no special handling.
+
+    Only "\n" is treated as a line terminator, which is what psql COPY writes.
+
+    Arguments:
+        `buffer`: the raw text to scan
+        `start`: offset in buffer to begin scanning from
+        `in_quotes`: whether `start` falls inside a quoted value (carried over from the previous buffer)
+        `limit`: stop right after this many record ends have been found
+
+    Returns a tuple of (record ends found, offset where the scan stopped, whether that offset is inside quotes).
+    The offset is just past the limit-th record end when the limit is reached, otherwise len(buffer).
+    """
+    end = len(buffer)
+    unquoted_start = start
+    if in_quotes:
+        close_quote = buffer.find(b'"', start)
+        if close_quote == -1:
+            return 0, end, True
+        unquoted_start = close_quote + 1
+
+    # Dropping every quoted value leaves only the newlines that end records, plus a lone quote if the buffer ends
+    # inside a quoted value.  Both steps run in C, so the cost doesn't depend on how many fields are quoted.
+    unquoted_text = _QUOTED_VALUE_REGEX.sub(b"", buffer[unquoted_start:end])
+    dangling_quote = unquoted_text.find(b'"')
+    found = unquoted_text.count(b"\n", 0, len(unquoted_text) if dangling_quote == -1 else dangling_quote)
+    if limit is None or found < limit:
+        return found, end, dangling_quote != -1
+
+    # The limit falls inside this buffer; walk it line by line (tracking quote parity) to find the exact offset
+    found = 0
+    pos = start
+    while found < limit:
+        newline = buffer.find(b"\n", pos)
+        if buffer.count(b'"', pos, newline) % 2:
+            in_quotes = not in_quotes
+        pos = newline + 1
+        if not in_quotes:
+            found += 1
+
+    return found, pos, False
+
+
+def count_delimited_records(byte_stream, chunk_size=DELIMITED_SCAN_CHUNK_SIZE):
+    """
+    Count the records (including any header) in a binary stream of delimited text by scanning it in chunks.
+    A final record without a trailing newline is counted, matching csv.reader.
+    """
+    record_count = 0
+    in_quotes = False
+    open_record = False
+    for chunk in iter(lambda: byte_stream.read(chunk_size), b""):
+        found, _, in_quotes = scan_delimited_buffer(chunk, in_quotes=in_quotes)
+        record_count += found
+        open_record = in_quotes or not chunk.endswith(b"\n")
+
+    return record_count + open_record
+
+
+def partition_delimited_stream(
+    byte_stream, open_partition, row_limit=10000, keep_headers=True, chunk_size=DELIMITED_SCAN_CHUNK_SIZE
+):
+    """Splits a binary stream of delimited text into partitions of at most `row_limit` rows in a single pass.
+
+    The stream is read in chunks which are scanned for record boundaries with `scan_delimited_buffer`; byte ranges
+    between split offsets are copied into the partitions as-is.  Works the same whether the data is a file on disk
+    or never lands on disk at all, e.g. the output of a psql COPY read straight from its pipe.  The first partition
+    is always opened, even when there are no rows.
+
+    Arguments:
+        `byte_stream`: readable binary file object (e.g. a pipe or a file opened in "rb" mode)
+        `open_partition`: callable taking the 1-based partition number and returning a writable binary file
+            object usable as a context manager
+        `row_limit`: The number of rows you want in each partition. 10,000 by default.
+        `keep_headers`: Whether or not to copy the first record (headers) into each partition.
+        `chunk_size`: Number of bytes read from byte_stream at a time.
+
+    Returns the number of rows written, not counting headers.
+    """
+    partition_number = 1
+    row_count = 0
+    in_quotes = False
+    open_record = False
+    headers = b""
+    header_parts = [] if keep_headers else None
+    dest = open_partition(partition_number)
+    try:
+        for chunk in iter(lambda: byte_stream.read(chunk_size), b""):
+            view = memoryview(chunk)
+            pos = 0
+            if header_parts is not None:
+                found, pos, in_quotes = scan_delimited_buffer(chunk, in_quotes=in_quotes, limit=1)
+                header_parts.append(chunk[:pos])
+                if not found:
+                    continue
+                headers = b"".join(header_parts)
+                header_parts = None
+                dest.write(headers)
+
+            while pos < len(chunk):
+                remaining = row_limit * partition_number - row_count
+                if remaining == 0:  # limit reached, start the next partition
+                    dest.close()
+                    partition_number += 1
+                    dest = open_partition(partition_number)
+                    dest.write(headers)
+                    remaining = row_limit
+                found, offset, in_quotes = scan_delimited_buffer(chunk, pos, in_quotes, remaining)
+                dest.write(view[pos:offset])
+                row_count += found
+                pos = offset
+                open_record = in_quotes or chunk[offset - 1 : offset] != b"\n"
+
+        if header_parts:  # headers without a trailing newline and no rows
+            dest.write(b"".join(header_parts))
+    finally:
+        dest.close()
+
+    return row_count + open_record
+
+
 def read_csv_file_as_list_of_dictionaries(file_path):
     """
     Read in the specified CSV file and return as a list of dictionaries ("records").
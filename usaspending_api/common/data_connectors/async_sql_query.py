@@ -4,9 +4,9 @@ import sqlparse
 from usaspending_api.common.helpers.sql_helpers import get_database_dsn_string
 
 
-async def async_run_select(sql):
+async def async_run_select(sql, *args):
     conn = await asyncpg.connect(dsn=get_database_dsn_string())
-    sql_result = await conn.fetch(sql)
+    sql_result = await conn.fetch(sql, *args)
     await conn.close()
     return sql_result
 
@@ -1,7 +1,10 @@
 from typing import Union, Optional
 
 import certifi
+import contextvars
 import logging
+import os
+import threading
 
 from django.conf import settings
 from elasticsearch import Elasticsearch
@@ -11,9 +14,26 @@ from ssl import CERT_NONE
 from elasticsearch_dsl.response import Response
 
 logger = logging.getLogger("console")
-CLIENT = None
 ElasticsearchResponse = Optional[Union[dict, Response]]
 
+# Clients shared within a process, by host; see get_es_client
+_CLIENTS = {}
+_CLIENTS_PID = None
+_CLIENTS_LOCK = threading.Lock()
+
+# Elasticsearch queries made by each request's context; see get_es_query_metrics
+_QUERY_METRICS = contextvars.ContextVar("es_query_metrics", default=None)
+
+
+class _EsQueryMetrics:
+    """Totals shared by every thread running in a copy of the context that reset them"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.es_queries = 0
+        self.es_took_ms = 0
+        self.es_round_trip_ms = 0
+
 
 def instantiate_elasticsearch_client() -> Elasticsearch:
     es_kwargs = {"timeout": 300}
@@ -25,10 +45,22 @@ def instantiate_elasticsearch_client() -> Elasticsearch:
 
 
 def create_es_client() -> Elasticsearch:
+    """
+    Create a new client for settings.ES_HOSTNAME.  Most code should use the shared client from get_es_client instead
+    so that connections (and their TLS sessions) are kept alive and reused across searches.
+    """
     if settings.ES_HOSTNAME is None or settings.ES_HOSTNAME == "":
         logger.error("env var 'ES_HOSTNAME' needs to be set for Elasticsearch connection")
-    global CLIENT
-    es_config = {"hosts": [settings.ES_HOSTNAME], "timeout": settings.ES_TIMEOUT}
+    es_config = {
+        "hosts": [settings.ES_HOSTNAME],
+        "timeout": settings.ES_TIMEOUT,
+        # Size of the keep-alive connection pool kept for each node
+        "maxsize": settings.ES_MAX_CONNECTIONS,
+    }
+    if settings.ES_SNIFF:
+        es_config.update(
+            {"sniff_on_start": True, "sniff_on_connection_fail": True, "sniffer_timeout": settings.ES_SNIFFER_TIMEOUT,}
+        )
     try:
         # If the connection string is using SSL with localhost, disable verifying
         # the certificates to allow testing in a development environment
@@ -43,6 +75,60 @@ def create_es_client() -> Elasticsearch:
             ssl_context.verify_mode = CERT_NONE
             es_config["ssl_context"] = ssl_context
 
-        CLIENT = Elasticsearch(**es_config)
+        return Elasticsearch(**es_config)
     except Exception as e:
         logger.error("Error creating the elasticsearch client: {}".format(e))
+
+
+def get_es_client() -> Elasticsearch:
+    """
+    Return the client for settings.ES_HOSTNAME shared by everything in this process, creating it on first use.
+
+    Connections can't be shared with a forked child process, so a process that finds clients created by its parent
+    discards them and creates its own.
+    """
+    global _CLIENTS_PID
+    with _CLIENTS_LOCK:
+        if _CLIENTS_PID != os.getpid():
+            _CLIENTS.clear()
+            _CLIENTS_PID = os.getpid()
+        client = _CLIENTS.get(settings.ES_HOSTNAME)
+        if client is None:
+            client = create_es_client()
+            if client is not None:
+                _CLIENTS[settings.ES_HOSTNAME] = client
+        return client
+
+
+def record_es_query(took_ms: int, round_trip_ms: int) -> None:
+    """
+    Add a query to the metrics of the API request (or other unit of work) in whose context this runs.  took_ms is
+    the time Elasticsearch reports spending on the query; round_trip_ms is how long the client waited for it.  Work
+    handed to other threads is only counted if it runs in a copy of the context, e.g. contextvars.copy_context().run
+    """
+    metrics = _QUERY_METRICS.get()
+    if metrics is None:
+        metrics = _EsQueryMetrics()
+        _QUERY_METRICS.set(metrics)
+    with metrics.lock:
+        metrics.es_queries += 1
+        metrics.es_took_ms += took_ms
+        metrics.es_round_trip_ms += round_trip_ms
+
+
+def reset_es_query_metrics() -> None:
+    _QUERY_METRICS.set(_EsQueryMetrics())
+
+
+def get_es_query_metrics() -> dict:
+    """
+    Totals of the queries recorded in this context since reset_es_query_metrics was called.  The difference between
+    es_round_trip_ms and es_took_ms is the overhead of the connection, serialization, and network.
+    """
+    metrics = _QUERY_METRICS.get() or _EsQueryMetrics()
+    with metrics.lock:
+        return {
+            "es_queries": metrics.es_queries,
+            "es_took_ms": metrics.es_took_ms,
+            "es_round_trip_ms": metrics.es_round_trip_ms,
+        }
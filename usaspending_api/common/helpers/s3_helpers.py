@@ -1,11 +1,14 @@
 import boto3
+import codecs
 import io
 import logging
 import math
+import threading
 
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
 
 
 logger = logging.getLogger("script")
@@ -41,6 +44,21 @@ def access_s3_object(bucket_name: str, obj: "boto3.resources.factory.s3.ObjectSu
     return data
 
 
+def stream_s3_object_lines(
+    bucket_name: str, key: str, region_name: str = settings.USASPENDING_AWS_REGION
+) -> Iterator[str]:
+    """
+    Yield the lines of a text S3 object as they are downloaded, instead of reading the whole object into memory.  Each
+    call uses a client of its own, so objects can be streamed from several threads at once.
+    """
+    s3client = boto3.session.Session().client("s3", region_name=region_name)
+    body = s3client.get_object(Bucket=bucket_name, Key=key)["Body"]
+    try:
+        yield from codecs.getreader("utf-8")(body)
+    finally:
+        body.close()
+
+
 def upload_download_file_to_s3(file_path):
     bucket = settings.BULK_DOWNLOAD_S3_BUCKET_NAME
     region = settings.USASPENDING_AWS_REGION
@@ -55,3 +73,109 @@ def multipart_upload(bucketname, regionname, source_path, keyname):
     config = boto3.s3.transfer.TransferConfig(multipart_chunksize=bytes_per_chunk)
     transfer = boto3.s3.transfer.S3Transfer(s3client, config)
     transfer.upload_file(source_path, bucketname, Path(keyname).name)
+
+
+class S3MultipartUploadStream(io.RawIOBase):
+    """
+    Write-only, unseekable file object that sends everything written to it to an S3 object as a multipart upload.
+
+    Parts of `part_size` bytes are uploaded in background threads while writing continues; once `max_concurrency`
+    parts are in flight, write() blocks until one finishes, so memory use stays bounded.  close() uploads what is
+    left and completes the upload.  If anything goes wrong call abort() instead so S3 discards the uploaded parts.
+
+        with S3MultipartUploadStream(bucket_name, key_name) as stream:
+            stream.write(data)
+    """
+
+    # S3 rejects parts smaller than this, except the last one
+    MIN_PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(
+        self,
+        bucket_name: str,
+        key_name: str,
+        region_name: str = settings.USASPENDING_AWS_REGION,
+        part_size: int = 64 * 1024 * 1024,
+        max_concurrency: int = 4,
+    ):
+        super().__init__()
+        self._aborted = False
+        self._upload_id = None
+        self._error = None
+        self.bucket_name = bucket_name
+        self.key_name = key_name
+        self.part_size = max(part_size, self.MIN_PART_SIZE)
+        self._s3client = boto3.client("s3", region_name=region_name)
+        self._upload_id = self._s3client.create_multipart_upload(Bucket=bucket_name, Key=key_name)["UploadId"]
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._parts_in_flight = threading.BoundedSemaphore(max_concurrency)
+        self._part_futures = []
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed file")
+        if self._error:
+            raise self._error
+        self._buffer += data
+        self._position += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+        return len(data)
+
+    def close(self):
+        if self.closed or self._aborted:
+            return
+        try:
+            if self._buffer or not self._part_futures:
+                self._upload_part(bytes(self._buffer))
+                self._buffer.clear()
+            parts = [future.result() for future in self._part_futures]
+            self._s3client.complete_multipart_upload(
+                Bucket=self.bucket_name, Key=self.key_name, UploadId=self._upload_id, MultipartUpload={"Parts": parts},
+            )
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._executor.shutdown()
+            super().close()
+
+    def abort(self):
+        """Abandon the upload, discarding any parts already sent"""
+        if self._aborted or self._upload_id is None:
+            return
+        self._aborted = True
+        self._executor.shutdown()
+        self._s3client.abort_multipart_upload(Bucket=self.bucket_name, Key=self.key_name, UploadId=self._upload_id)
+        super().close()
+
+    def __del__(self):
+        # Never complete an upload just because an unfinished stream was garbage collected
+        if not self.closed:
+            self.abort()
+
+    def _upload_part(self, body):
+        self._parts_in_flight.acquire()
+        part_number = len(self._part_futures) + 1
+        self._part_futures.append(self._executor.submit(self._send_part, part_number, body))
+
+    def _send_part(self, part_number, body):
+        try:
+            response = self._s3client.upload_part(
+                Bucket=self.bucket_name, Key=self.key_name, UploadId=self._upload_id, PartNumber=part_number, Body=body
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        except Exception as e:
+            self._error = e
+            raise
+        finally:
+            self._parts_in_flight.release()
@@ -5,6 +5,8 @@ import logging
 import traceback
 from time import perf_counter  # Matches response time browsers return more accurately than now()
 
+from usaspending_api.common.elasticsearch.client import get_es_query_metrics, reset_es_query_metrics
+
 
 def get_remote_addr(request):
     """ Get IP address of user making request can be used for other logging"""
@@ -36,6 +38,9 @@ class LoggingMiddleware(MiddlewareMixin):
       "remote_addr": "127.0.0.1", (IP address where request came from)
       "host": "localhost:8000", (Host name or IP address)
       "response_ms": "848", (Time it took to return a response or exception)
+      "es_queries": 2, (Number of Elasticsearch queries made for the request)
+      "es_took_ms": 310, (Time Elasticsearch reported spending on those queries)
+      "es_round_trip_ms": 395, (Time spent waiting for those queries, including connection and network overhead)
       "message": "[11/01/18 22:52:03] [INFO] [POST] [/api/v2/download/count/ : 200]
                     [127.0.0.1] [localhost:8000] [848]",
       (message is [timestamp] [status] [method] [ path : status_code] [remote_addr] [host] [response_ms]
@@ -59,6 +64,7 @@ class LoggingMiddleware(MiddlewareMixin):
     def process_request(self, request):
         """Func called when a request is called on server, function stores request fields for logging"""
         self.start = perf_counter()
+        reset_es_query_metrics()
 
         self.log = {
             "path": request.path,
@@ -84,6 +90,7 @@ class LoggingMiddleware(MiddlewareMixin):
 
         self.log["status_code"] = status_code
         self.log["response_ms"] = self.get_response_ms()
+        self.log.update(get_es_query_metrics())
         self.log["traceback"] = None
         if response._headers:
             if "key" in response._headers and len(response._headers["key"]) >= 2:
@@ -133,6 +140,7 @@ class LoggingMiddleware(MiddlewareMixin):
 
         self.log["status_code"] = 500  # Unable to get status code from exception server return 500 as default
         self.log["response_ms"] = self.get_response_ms()
+        self.log.update(get_es_query_metrics())
         self.log["status"] = "ERROR"
         self.log["timestamp"] = now().strftime("%d/%m/%y %H:%M:%S")
         self.log["traceback"] = traceback.format_exc()
@@ -0,0 +1,82 @@
+import csv
+import logging
+import random
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from pathlib import Path
+
+from usaspending_api.common.csv_helpers import count_rows_in_delimited_file, partition_large_delimited_file
+
+
+logger = logging.getLogger("script")
+
+# Roughly the mix psql COPY produces for award data: mostly NULLs, codes, and amounts, with the occasional value
+# that has to be quoted
+SAMPLE_VALUES = {
+    "": 30,
+    "PLAIN VALUE": 30,
+    "1234567.89": 20,
+    "2020-01-01": 10,
+    "VALUE, WITH DELIMITER": 5,
+    'VALUE WITH "QUOTES"': 1,
+    "VALUE WITH\nEMBEDDED\nNEWLINES": 0.5,
+    "VALUE WITH \0 NUL BYTE": 0.5,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the byte-level scanner behind count_rows_in_delimited_file and partition_large_delimited_file "
+        "against the csv module implementation on a synthetic delimited file"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000000, help="Number of rows in the synthetic file")
+        parser.add_argument("--columns", type=int, default=40, help="Number of columns in the synthetic file")
+        parser.add_argument("--row-limit", type=int, default=1000000, help="Rows per partition")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as working_dir:
+            source_path = Path(working_dir) / "benchmark.csv"
+            self.write_synthetic_file(source_path, options["rows"], options["columns"])
+            logger.info(f"Wrote {options['rows']:,} rows ({source_path.stat().st_size:,} bytes) to {source_path}")
+
+            results = {}
+            for parse_fields in (True, False):
+                label = "csv module" if parse_fields else "byte scanner"
+                start = time.perf_counter()
+                count = count_rows_in_delimited_file(str(source_path), parse_fields=parse_fields)
+                count_duration = time.perf_counter() - start
+
+                start = time.perf_counter()
+                partitions = partition_large_delimited_file(
+                    str(source_path),
+                    row_limit=options["row_limit"],
+                    output_name_template=f"{label.replace(' ', '_')}_%s.csv",
+                    parse_fields=parse_fields,
+                )
+                partition_duration = time.perf_counter() - start
+
+                results[label] = (count, [count_rows_in_delimited_file(p) for p in partitions])
+                logger.info(
+                    f"{label}: counted {count:,} rows in {count_duration:.2f}s, "
+                    f"partitioned into {len(partitions)} files in {partition_duration:.2f}s"
+                )
+
+            if results["csv module"] != results["byte scanner"]:
+                raise RuntimeError(f"Implementations disagree: {results}")
+            logger.info("Row counts and partition sizes match")
+
+    @staticmethod
+    def write_synthetic_file(path, rows, columns):
+        random.seed(rows)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow([f"column_{i}" for i in range(columns)])
+            for row_number in range(rows):
+                writer.writerow(
+                    [row_number]
+                    + random.choices(list(SAMPLE_VALUES), weights=list(SAMPLE_VALUES.values()), k=columns - 1)
+                )
@@ -1,12 +1,14 @@
 import asyncio
+import hashlib
+import json
 import logging
 import psycopg2
 import subprocess
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from pathlib import Path
 
-from usaspending_api.common.data_connectors.async_sql_query import async_run_creates
+from usaspending_api.common.data_connectors.async_sql_query import async_run_creates, async_run_select
 from usaspending_api.common.helpers.timing_helpers import ConsoleTimer as Timer
 from usaspending_api.common.matview_manager import (
     DEFAULT_MATIVEW_DIR,
@@ -20,6 +22,39 @@ from usaspending_api.common.helpers.sql_helpers import get_database_dsn_string
 
 logger = logging.getLogger("console")
 
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Sum of the rows inserted, updated, and deleted in every relation an existing matview selects from, according to the
+# statistics collector.  NULL if the matview doesn't exist or selects from a relation without statistics (e.g. a view)
+SOURCE_CHANGES_SQL = """
+SELECT
+    CASE WHEN BOOL_AND(s.relid IS NOT NULL) THEN SUM(s.n_tup_ins + s.n_tup_upd + s.n_tup_del) END AS source_changes
+FROM
+    pg_rewrite AS r
+    INNER JOIN pg_depend AS d ON
+        d.classid = 'pg_rewrite'::regclass
+        AND d.objid = r.oid
+        AND d.refclassid = 'pg_class'::regclass
+        AND d.refobjid <> r.ev_class
+    LEFT OUTER JOIN pg_stat_all_tables AS s ON s.relid = d.refobjid
+WHERE
+    r.ev_class = to_regclass($1)
+"""
+
+MATVIEW_STATE_SQL = """
+SELECT relispopulated AS populated, obj_description(oid, 'pg_class') AS comment
+FROM pg_class
+WHERE oid = to_regclass($1) AND relkind = 'm'
+"""
+
+# Estimated row count (pg_class.reltuples), kept current by the ANALYZE at the end of the build SQL and the one
+# run_matview adds after a refresh
+ROW_COUNT_SQL = "SELECT reltuples::BIGINT AS row_count FROM pg_class WHERE oid = to_regclass($1)"
+
+BUILD = "build"
+REFRESH = "refresh"
+SKIP = "skip"
+
 
 class Command(BaseCommand):
 
@@ -33,6 +68,8 @@ class Command(BaseCommand):
         self.no_cleanup = args["leave_sql"]
         self.remove_matviews = not args["leave_old"]
         self.run_dependencies = args["dependencies"]
+        self.max_concurrency = args["max_concurrency"]
+        self.incremental = not args["rebuild"]
 
     def add_arguments(self, parser):
         parser.add_argument("--only", choices=list(MATERIALIZED_VIEWS.keys()))
@@ -55,9 +92,23 @@ class Command(BaseCommand):
         parser.add_argument(
             "--dependencies", action="store_true", help="Run the SQL dependencies before the materialized view SQL."
         )
+        parser.add_argument(
+            "--max-concurrency",
+            type=int,
+            default=DEFAULT_MAX_CONCURRENCY,
+            help="Maximum number of materialized views to build or refresh at the same time.",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Build every materialized view from scratch instead of skipping unchanged ones and refreshing "
+            "the rest concurrently where possible.",
+        )
 
     def handle(self, *args, **options):
         """Overloaded Command Entrypoint"""
+        if options["max_concurrency"] < 1:
+            raise CommandError("--max-concurrency must be a positive integer")
         with Timer(__name__):
             self.faux_init(options)
             self.generate_matview_sql()
@@ -84,21 +135,137 @@ class Command(BaseCommand):
 
     def create_views(self):
         loop = asyncio.new_event_loop()
-        tasks = []
-        for matview, config in self.matviews.items():
-            logger.info("Creating Future for {}".format(matview))
-            sql = (self.matview_dir / config["sql_filename"]).read_text()
-            tasks.append(asyncio.ensure_future(async_run_creates(sql, wrapper=Timer(matview)), loop=loop))
-
-        loop.run_until_complete(asyncio.gather(*tasks))
+        results = loop.run_until_complete(self.run_matviews())
         loop.close()
 
+        for matview, (action, elapsed, row_count) in results.items():
+            logger.info(
+                "{}: {} in {}, {:,} rows (estimated)".format(
+                    matview, {BUILD: "built", REFRESH: "refreshed", SKIP: "skipped"}[action], elapsed, row_count
+                )
+            )
+
         for view in OVERLAY_VIEWS:
             run_sql(view.read_text(), "Creating Views")
 
         if self.remove_matviews:
             run_sql(DROP_OLD_MATVIEWS.read_text(), "Drop Old Materialized Views")
 
+    async def run_matviews(self):
+        """
+        Build or refresh the matviews, each once all of the matviews it depends on are done and with no more than
+        max_concurrency at a time.  Returns the action, elapsed time, and row count of each matview.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks = {}
+        for matview in dependency_order(self.matviews):
+            dependencies = [tasks[d] for d in self.matviews[matview].get("depends_on", []) if d in tasks]
+            logger.info("Creating Future for {}".format(matview))
+            tasks[matview] = asyncio.ensure_future(self.run_matview(matview, dependencies, semaphore))
+
+        await asyncio.gather(*tasks.values())
+        return {matview: task.result() for matview, task in tasks.items()}
+
+    async def run_matview(self, matview, dependencies, semaphore):
+        await asyncio.gather(*dependencies)
+        async with semaphore:
+            config = self.matviews[matview]
+            definition = json.loads(Path(config["json_filepath"]).read_text())
+            watermark = {
+                "definition": hashlib.md5(Path(config["json_filepath"]).read_bytes()).hexdigest(),
+                "source_changes": await get_source_changes(matview),
+            }
+            refresh_file = self.matview_dir / "componentized" / "{}__refresh.sql".format(matview)
+            action = BUILD
+            if self.incremental:
+                action = choose_action(
+                    await get_matview_state(matview), watermark, refresh_file.exists() and has_unique_index(definition),
+                )
+
+            t = Timer("{} {}".format(action.title(), matview))
+            if action == SKIP:
+                t.stop()
+            else:
+                sql_file = self.matview_dir / config["sql_filename"] if action == BUILD else refresh_file
+                sql = "{}\n{}".format(sql_file.read_text(), make_watermark_sql(matview, watermark))
+                if action == REFRESH:
+                    sql += "\nANALYZE {};".format(matview)
+                await async_run_creates(sql, wrapper=t)
+
+            row_count = (await async_run_select(ROW_COUNT_SQL, matview))[0]["row_count"]
+            return action, t, row_count
+
+
+def dependency_order(matviews):
+    """
+    Order matviews so that each comes after the matviews it depends on.  Dependencies outside of matviews (i.e. when
+    running --only) are assumed to be current.
+    """
+    ordered = []
+    visiting = set()
+
+    def visit(matview):
+        if matview in ordered:
+            return
+        if matview in visiting:
+            raise CommandError("Materialized view dependency cycle at {}".format(matview))
+        visiting.add(matview)
+        for dependency in matviews[matview].get("depends_on", []):
+            if dependency in matviews:
+                visit(dependency)
+        visiting.remove(matview)
+        ordered.append(matview)
+
+    for matview in matviews:
+        visit(matview)
+    return ordered
+
+
+def choose_action(state, watermark, can_refresh_concurrently):
+    """
+    Decide whether an existing matview needs to be built from scratch, can be refreshed, or can be skipped.  state is
+    the matview's (populated, comment) row or None if it doesn't exist, and the comment holds the watermark of its last
+    build or refresh.  Source changes count every row the statistics collector saw written to the matview's source
+    tables, so any difference (including a drop after a statistics reset) means the sources may have changed.
+    """
+    if state is None or not state["populated"]:
+        return BUILD
+    try:
+        previous = json.loads(state["comment"] or "")
+    except ValueError:
+        return BUILD
+    if not isinstance(previous, dict) or previous.get("definition") != watermark["definition"]:
+        return BUILD
+    if watermark["source_changes"] is not None and previous.get("source_changes") == watermark["source_changes"]:
+        return SKIP
+    return REFRESH if can_refresh_concurrently else BUILD
+
+
+def has_unique_index(definition):
+    """REFRESH CONCURRENTLY requires a unique index on plain columns covering every row"""
+    return any(
+        index.get("unique") and not index.get("where") and all("name" in column for column in index["columns"])
+        for index in definition.get("indexes", [])
+    )
+
+
+async def get_matview_state(matview):
+    rows = await async_run_select(MATVIEW_STATE_SQL, matview)
+    return rows[0] if rows else None
+
+
+async def get_source_changes(matview):
+    """
+    Snapshot the source changes before building so that writes made during the build show up as a change next run.
+    A matview being created for the first time has no sources to look at yet, so it'll be refreshed on the next run.
+    """
+    rows = await async_run_select(SOURCE_CHANGES_SQL, matview)
+    return int(rows[0]["source_changes"]) if rows and rows[0]["source_changes"] is not None else None
+
+
+def make_watermark_sql(matview, watermark):
+    return "COMMENT ON MATERIALIZED VIEW {} IS '{}';".format(matview, json.dumps(watermark).replace("'", "''"))
+
 
 def create_dependencies():
     run_sql(DEPENDENCY_FILEPATH.read_text(), "dependencies")
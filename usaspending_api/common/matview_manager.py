@@ -7,10 +7,13 @@ import usaspending_api.search.models as mv
 
 DEFAULT_MATIVEW_DIR = settings.REPO_DIR.parent / "matviews"
 DEPENDENCY_FILEPATH = settings.APP_DIR / "database_scripts" / "matviews" / "functions_and_enums.sql"
-JSON_DIR = settings.APP_DIR / "database_scripts" / "matview_sql_generator"
+JSON_DIR = settings.APP_DIR / "database_scripts" / "matview_generator"
 MATVIEW_GENERATOR_FILE = settings.APP_DIR / "database_scripts" / "matview_generator" / "matview_sql_generator.py"
 OVERLAY_VIEWS = [settings.APP_DIR / "database_scripts" / "matviews" / "vw_award_search.sql"]
 DROP_OLD_MATVIEWS = settings.APP_DIR / "database_scripts" / "matviews" / "drop_old_matviews.sql"
+
+# Matviews are built in dependency order.  A matview which selects from other matviews must list them in an optional
+# "depends_on" entry so that it is only built once they are.
 MATERIALIZED_VIEWS = OrderedDict(
     [
         (
@@ -1,10 +1,21 @@
+import base64
+import binascii
+import json
+import operator
+
 from collections import OrderedDict
+from functools import reduce
 
 from rest_framework.response import Response
 from rest_framework.pagination import BasePagination
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Model, Q
 from django.template import loader
 from rest_framework.utils.urls import replace_query_param
 
+from usaspending_api.common.exceptions import InvalidParameterException
+
 
 class UsaspendingPagination(BasePagination):
     # The default page size
@@ -19,13 +30,23 @@ class UsaspendingPagination(BasePagination):
     # Page query param
     page_query_param = "page"
 
+    # Keyset pagination is used instead of pages when this param is provided (empty for the first page)
+    cursor_query_param = "cursor"
+
+    # Leave the total count out of page_metadata (saving a query) when this param is true
+    skip_count_query_param = "skip_count"
+
     # Use a lazy template (i.e. doesn't need to know the total number of pages)
     template = "rest_framework/pagination/previous_and_next.html"
 
     def paginate_queryset(self, queryset, request, view=None):
         self.request = request
-        self.count = queryset.count()
+        self.count = None if self.get_skip_count(request) else queryset.count()
         self.limit = self.get_limit(request)
+        self.cursor = self.get_cursor(request)
+        if self.cursor is not None:
+            return self.paginate_queryset_by_keyset(queryset)
+
         self.page = self.get_page(request)
         self.offset = self.get_offset(request)
         self.has_next_page = self.next_page_exists(queryset)
@@ -37,6 +58,14 @@ class UsaspendingPagination(BasePagination):
 
         return list(queryset[self.offset : self.offset + self.limit])
 
+    def paginate_queryset_by_keyset(self, queryset):
+        ordering = get_keyset_ordering(queryset)
+        results, self.next_cursor = paginate_by_keyset(queryset, ordering, self.limit, self.cursor)
+        self.has_next_page = self.next_cursor is not None
+        if self.has_next_page and self.template is not None:
+            self.display_page_controls = True
+        return results
+
     def next_page_exists(self, queryset):
         # If our next page has a count > 0, return true
         return queryset[(self.offset + self.limit) : (self.offset + self.limit * 2)].exists()
@@ -68,10 +97,39 @@ class UsaspendingPagination(BasePagination):
         else:
             return 1
 
+    def get_cursor(self, request):
+        """None unless keyset pagination was requested, in which case "" is the first page"""
+        request_parameters = {**request.data, **request.query_params}
+        if self.cursor_query_param not in request_parameters:
+            return None
+        cursor = request_parameters[self.cursor_query_param]
+        if isinstance(cursor, list):
+            cursor = cursor[0]
+        return cursor or ""
+
+    def get_skip_count(self, request):
+        request_parameters = {**request.data, **request.query_params}
+        skip_count = request_parameters.get(self.skip_count_query_param, False)
+        if isinstance(skip_count, list):
+            skip_count = skip_count[0]
+        return str(skip_count).lower() in ("1", "t", "true")
+
     def get_offset(self, request):
         return (self.page - 1) * self.limit
 
     def get_paginated_response(self, data):
+        if self.cursor is not None:
+            page_metadata = OrderedDict(
+                [
+                    ("count", self.count),
+                    ("limit", self.limit),
+                    ("has_next_page", self.has_next_page),
+                    ("next_cursor", self.next_cursor),
+                    ("next", self.get_next_link()),
+                ]
+            )
+            return Response(OrderedDict([("page_metadata", page_metadata), ("results", data)]))
+
         page_metadata = OrderedDict(
             [
                 ("count", self.count),
@@ -92,6 +150,8 @@ class UsaspendingPagination(BasePagination):
 
         url = self.request.build_absolute_uri()
         url = replace_query_param(url, self.page_size_query_param, self.limit)
+        if self.cursor is not None:
+            return replace_query_param(url, self.cursor_query_param, self.next_cursor)
         url = replace_query_param(url, self.page_query_param, self.page + 1)
 
         return url
@@ -114,9 +174,140 @@ class UsaspendingPagination(BasePagination):
         return url
 
     def get_html_context(self):
+        if self.cursor is not None:
+            return {"previous_url": None, "next_url": self.get_next_link()}
         return {"previous_url": self.get_previous_link(), "next_url": self.get_next_link()}
 
     def to_html(self):
         template = loader.get_template(self.template)
         context = self.get_html_context()
         return template.render(context)
+
+
+def get_keyset_ordering(queryset):
+    """
+    The queryset's ordering followed by the fields that make each row unique: the primary key, or the grouped fields
+    of an aggregation.
+    """
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    if not all(isinstance(field, str) for field in ordering):
+        raise InvalidParameterException("Cursor pagination is only supported when sorting by fields")
+
+    if queryset.query.group_by is not None:
+        unique_fields = list(queryset.query.values_select) + [
+            name for name, annotation in queryset.query.annotation_select.items() if not annotation.contains_aggregate
+        ]
+    else:
+        unique_fields = [queryset.model._meta.pk.name]
+
+    descending = ordering[-1].startswith("-") if ordering else False
+    ordered_fields = {field.lstrip("-") for field in ordering}
+    return ordering + [("-" if descending else "") + field for field in unique_fields if field not in ordered_fields]
+
+
+def paginate_by_keyset(queryset, ordering, limit, cursor=""):
+    """
+    Return up to limit rows of queryset that come after the row cursor was made from (from the start if cursor is
+    empty) along with the cursor of the next page, or None if this is the last page.  Since the rows are found by
+    seeking to the cursor's values instead of skipping offset rows, deep pages are as cheap as the first one when an
+    index covers ordering.
+
+    ordering is a list of field names, each prefixed with "-" to sort it descending, which must identify each row
+    (i.e. end with a primary key).
+    """
+    results = list(get_keyset_queryset(queryset, ordering, cursor)[: limit + 1])
+    if len(results) <= limit:
+        return results, None
+    results = results[:limit]
+    return (
+        results,
+        encode_keyset_cursor(ordering, [_keyset_value(results[-1], field.lstrip("-")) for field in ordering]),
+    )
+
+
+def get_keyset_queryset(queryset, ordering, cursor=""):
+    """
+    queryset sorted by ordering and limited to the rows after cursor (see paginate_by_keyset).  Nulls of nullable
+    fields sort last in either direction, as the page numbered endpoints sort them, so paging by cursor returns rows in
+    the same order as paging by page.  Fields which can't be null are sorted and compared without any null handling,
+    which lets Postgres seek into and read a plain index on them in either direction.
+    """
+    nullable = [_is_nullable(queryset.model, field.lstrip("-")) for field in ordering]
+    queryset = queryset.order_by(
+        *[
+            (F(field[1:]).desc if field.startswith("-") else F(field).asc)(nulls_last=null)
+            for field, null in zip(ordering, nullable)
+        ]
+    )
+    if cursor:
+        queryset = queryset.filter(_after_keyset(ordering, decode_keyset_cursor(cursor, ordering), nullable))
+    return queryset
+
+
+def encode_keyset_cursor(ordering, values):
+    """Opaque continuation token of the sort key of a page's last row"""
+    payload = json.dumps({"ordering": ordering, "values": values}, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_keyset_cursor(cursor, ordering):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidParameterException("Invalid cursor")
+    if (
+        not isinstance(payload, dict)
+        or payload.get("ordering") != ordering
+        or len(payload.get("values", [])) != len(ordering)
+    ):
+        raise InvalidParameterException("Invalid cursor for this sort")
+    return payload["values"]
+
+
+def _after_keyset(ordering, values, nullable):
+    """
+    Filter for the rows after values, with nulls sorting last, e.g. for ("a", "-b") (a > x OR a IS NULL) OR
+    (a = x AND (b < y OR b IS NULL)), leaving out the IS NULL checks of fields which aren't nullable.  The redundant
+    bound on the first field lets Postgres start an index scan at the cursor.
+    """
+    after = []
+    equal = Q()
+    for field, value, null in zip(ordering, values, nullable):
+        name = field.lstrip("-")
+        if value is not None:
+            lookup = "lt" if field.startswith("-") else "gt"
+            after.append(equal & _or_null(Q(**{f"{name}__{lookup}": value}), name, null))
+        equal &= Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+
+    name, value = ordering[0].lstrip("-"), values[0]
+    if value is None:
+        bound = Q(**{f"{name}__isnull": True})
+    else:
+        lookup = "lte" if ordering[0].startswith("-") else "gte"
+        bound = _or_null(Q(**{f"{name}__{lookup}": value}), name, nullable[0])
+
+    if not after:
+        # Nothing sorts after a row which is null in every field (filtering on pk would change an aggregation's groups)
+        return Q(**{f"{name}__isnull": True}) & Q(**{f"{name}__isnull": False})
+    return bound & reduce(operator.or_, after)
+
+
+def _or_null(condition, name, nullable):
+    return condition | Q(**{f"{name}__isnull": True}) if nullable else condition
+
+
+def _is_nullable(model, name):
+    """Whether name can be null: annotations and related fields are assumed to be"""
+    try:
+        return model._meta.get_field(name).null
+    except FieldDoesNotExist:
+        return True
+
+
+def _keyset_value(row, field):
+    if isinstance(row, dict):
+        return row[field]
+    value = row
+    for part in field.split("__"):
+        value = getattr(value, part, None)
+    return value.pk if isinstance(value, Model) else value
@@ -0,0 +1,123 @@
+from unittest.mock import Mock
+
+import pytest
+from django.db.models import F
+from model_mommy import mommy
+
+from usaspending_api.awards.models import Award
+from usaspending_api.common.exceptions import InvalidParameterException
+from usaspending_api.common.mixins import AggregateQuerysetMixin
+from usaspending_api.common.pagination import UsaspendingPagination, get_keyset_ordering, paginate_by_keyset
+
+
+@pytest.fixture
+def keyset_awards():
+    # Ties on both sort fields and nulls in each, so every page boundary has to fall back on the next field
+    awards = [
+        ("A", 10),
+        ("A", 10),
+        ("A", None),
+        ("B", 20),
+        ("B", 10),
+        (None, 10),
+        ("B", 20),
+        (None, None),
+        ("A", 30),
+    ]
+    for i, (award_type, total_obligation) in enumerate(awards):
+        mommy.make("awards.Award", id=i + 1, type=award_type, total_obligation=total_obligation)
+
+
+def _page_through(queryset, ordering, limit):
+    pages, cursor = [], ""
+    while True:
+        rows, cursor = paginate_by_keyset(queryset, ordering, limit, cursor)
+        pages.append(rows)
+        if cursor is None:
+            return pages
+
+
+def _cursor_request(cursor, limit=2, skip_count=True):
+    request = Mock()
+    request.query_params = {}
+    request.data = {"cursor": cursor, "limit": limit, "skip_count": skip_count}
+    return request
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("limit", [1, 2, 4])
+@pytest.mark.parametrize(
+    "ordering,expected",
+    [
+        (["type", "-total_obligation", "id"], [9, 1, 2, 3, 4, 7, 5, 6, 8]),
+        (["-type", "total_obligation", "-id"], [5, 7, 4, 2, 1, 9, 3, 6, 8]),
+        (["-total_obligation", "-id"], [9, 7, 4, 6, 5, 2, 1, 8, 3]),
+    ],
+)
+def test_keyset_pagination_with_multiple_keys_and_ties(keyset_awards, ordering, expected, limit):
+    queryset = Award.objects.all()
+    pages = _page_through(queryset, ordering, limit)
+
+    assert [award.id for rows in pages for award in rows] == expected
+    assert all(len(rows) == limit for rows in pages[:-1])
+
+
+def test_keyset_ordering_appends_primary_key():
+    assert get_keyset_ordering(Award.objects.order_by("type")) == ["type", "id"]
+    assert get_keyset_ordering(Award.objects.order_by("type", "-total_obligation")) == [
+        "type",
+        "-total_obligation",
+        "-id",
+    ]
+    assert get_keyset_ordering(Award.objects.order_by("-id")) == ["-id"]
+    with pytest.raises(InvalidParameterException):
+        get_keyset_ordering(Award.objects.order_by(F("type").asc()))
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_of_queryset(keyset_awards):
+    queryset = Award.objects.order_by("-total_obligation")
+    paginator = UsaspendingPagination()
+
+    seen, cursors = [], [""]
+    while True:
+        seen.extend(award.id for award in paginator.paginate_queryset(queryset, _cursor_request(cursors[-1])))
+        assert paginator.count is None
+        assert paginator.limit == 2
+        if not paginator.has_next_page:
+            break
+        cursors.append(paginator.next_cursor)
+
+    assert seen == [9, 7, 4, 6, 5, 2, 1, 8, 3]
+    assert len(cursors) == 5
+
+    # A cursor only continues the sort it was made for
+    with pytest.raises(InvalidParameterException):
+        paginator.paginate_queryset(Award.objects.order_by("type"), _cursor_request(cursors[1]))
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_of_aggregate(keyset_awards):
+    request = Mock()
+    request.query_params = {}
+    request.data = {"field": "total_obligation", "group": "type", "aggregate": "count", "show_nulls": True}
+    aggregate = AggregateQuerysetMixin().aggregate(request=request, queryset=Award.objects.all())
+    aggregate = aggregate.order_by("-aggregate")
+
+    # Groups are identified by their grouped fields, not by a primary key, and ties sort by them
+    assert get_keyset_ordering(aggregate) == ["-aggregate", "-type", "-item"]
+
+    paginator = UsaspendingPagination()
+    seen, cursor = [], ""
+    while True:
+        seen.extend(paginator.paginate_queryset(aggregate, _cursor_request(cursor, limit=1, skip_count=False)))
+        assert paginator.count == 3
+        if not paginator.has_next_page:
+            break
+        cursor = paginator.next_cursor
+
+    assert seen == [
+        {"type": "B", "item": "B", "aggregate": 3},
+        {"type": "A", "item": "A", "aggregate": 3},
+        {"type": None, "item": None, "aggregate": 1},
+    ]
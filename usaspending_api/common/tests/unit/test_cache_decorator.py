@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+
+from django.core.cache import caches
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from usaspending_api.common.cache_decorator import (
+    CachedResponse,
+    cache_response,
+    get_response_cache_metrics,
+    reset_response_cache_metrics,
+)
+
+
+class SlowView(APIView):
+    calls = 0
+
+    @cache_response(cache="default")
+    def post(self, request):
+        type(self).calls += 1
+        time.sleep(0.2)
+        return Response({"calls": type(self).calls})
+
+
+def _post():
+    return SlowView.as_view()(APIRequestFactory().post("/api/v2/slow/", {"filters": {}}, format="json"))
+
+
+def _setup(settings):
+    caches["default"].clear()
+    reset_response_cache_metrics()
+    SlowView.calls = 0
+    settings.CACHE_RESPONSE_TIMEOUTS = {}
+
+
+def test_concurrent_misses_compute_once(settings):
+    _setup(settings)
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(_post())) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert SlowView.calls == 1
+    assert sorted(r["Cache-Trace"] for r in responses) == ["set-cache"] + ["wait-cache"] * 4
+    assert all(json.loads(r.content) == {"calls": 1} for r in responses)
+    assert _post()["Cache-Trace"] == "hit-cache"
+    assert get_response_cache_metrics() == {"hit": 1, "stale": 0, "miss": 1, "wait": 4, "refresh": 0}
+
+
+def test_stale_response_is_served_while_refreshed(settings):
+    _setup(settings)
+    settings.CACHE_RESPONSE_TIMEOUTS = {"/api/v2/slow/": {"fresh_timeout": 0}}
+    assert _post()["Cache-Trace"] == "set-cache"
+
+    stale = _post()
+    assert stale["Cache-Trace"] == "stale-cache"
+    assert json.loads(stale.content) == {"calls": 1}
+
+    deadline = time.monotonic() + 5
+    while SlowView.calls < 2 or get_response_cache_metrics()["refresh"] < 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert json.loads(CachedResponse.from_bytes(caches["default"].get(stale["key"])).content) == {"calls": 2}
+    assert get_response_cache_metrics()["stale"] == 1
+
+
+def test_cached_response_round_trip(settings):
+    settings.CACHE_RESPONSE_COMPRESS_MIN_BYTES = 100
+    for content in (b'{"results": []}', json.dumps({"results": list(range(1000))}).encode()):
+        data = CachedResponse(200, "application/json", content, 1234.5).to_bytes()
+        assert (len(data) < len(content)) == (len(content) >= 100)
+
+        response = CachedResponse.from_bytes(data).to_response()
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/json"
+        assert response.content == content
+        assert CachedResponse.from_bytes(data).fresh_until == 1234.5
@@ -0,0 +1,82 @@
+import csv
+import io
+
+from usaspending_api.common.csv_helpers import (
+    count_delimited_records,
+    count_rows_in_delimited_file,
+    partition_delimited_stream,
+    partition_large_delimited_file,
+    scan_delimited_buffer,
+)
+
+DELIMITED_DATA = b'id,note\n1,"line one\nline two"\n2,"say ""hi""\n"\n3,\x00nul\n4,plain\n5,last\n'
+
+
+def test_scan_delimited_buffer():
+    assert scan_delimited_buffer(DELIMITED_DATA) == (6, len(DELIMITED_DATA), False)
+    assert scan_delimited_buffer(DELIMITED_DATA, limit=2) == (2, DELIMITED_DATA.index(b"2,"), False)
+    assert scan_delimited_buffer(b'"open\nquote') == (0, 11, True)
+    assert scan_delimited_buffer(b'value"\nnext\n', in_quotes=True) == (2, 12, False)
+
+
+def test_count_delimited_records():
+    assert count_delimited_records(io.BytesIO(DELIMITED_DATA)) == 6
+    assert count_delimited_records(io.BytesIO(DELIMITED_DATA), chunk_size=3) == 6
+    assert count_delimited_records(io.BytesIO(DELIMITED_DATA.rstrip(b"\n"))) == 6
+    assert count_delimited_records(io.BytesIO(b"")) == 0
+
+
+def test_count_rows_in_delimited_file_matches_csv_reader(tmp_path):
+    source = tmp_path / "source.csv"
+    source.write_bytes(DELIMITED_DATA)
+
+    assert count_rows_in_delimited_file(str(source)) == 5
+    assert count_rows_in_delimited_file(str(source), parse_fields=True) == 5
+
+
+def test_partition_delimited_stream():
+    partitions = {}
+
+    class _Partition(io.BytesIO):
+        def close(self):
+            partitions[self.partition_number] = self.getvalue()
+            super().close()
+
+    def open_partition(partition_number):
+        partition = _Partition()
+        partition.partition_number = partition_number
+        return partition
+
+    row_count = partition_delimited_stream(io.BytesIO(DELIMITED_DATA), open_partition, row_limit=2, chunk_size=5)
+
+    assert row_count == 5
+    assert partitions == {
+        1: b'id,note\n1,"line one\nline two"\n2,"say ""hi""\n"\n',
+        2: b"id,note\n3,\x00nul\n4,plain\n",
+        3: b"id,note\n5,last\n",
+    }
+
+
+def test_partition_delimited_stream_header_only():
+    partitions = []
+    row_count = partition_delimited_stream(
+        io.BytesIO(b"id,note\n"), lambda partition_number: partitions.append(partition_number) or io.BytesIO()
+    )
+
+    assert row_count == 0
+    assert partitions == [1]
+
+
+def test_partition_large_delimited_file_matches_csv_reader(tmp_path):
+    source = tmp_path / "source.csv"
+    source.write_bytes(DELIMITED_DATA)
+
+    fast_files = partition_large_delimited_file(str(source), row_limit=2, output_name_template="fast_%s.csv")
+    csv_files = partition_large_delimited_file(
+        str(source), row_limit=2, output_name_template="csv_%s.csv", parse_fields=True
+    )
+
+    assert [f.rsplit("/", 1)[1] for f in fast_files] == ["fast_1.csv", "fast_2.csv", "fast_3.csv"]
+    for fast_file, csv_file in zip(fast_files, csv_files):
+        with open(fast_file, newline="") as fast, open(csv_file, newline="") as slow:
+            assert list(csv.reader(fast)) == list(csv.reader(slow))
@@ -0,0 +1,56 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from usaspending_api.common.elasticsearch import client
+from usaspending_api.common.elasticsearch.client import (
+    get_es_client,
+    get_es_query_metrics,
+    record_es_query,
+    reset_es_query_metrics,
+)
+
+
+def test_get_es_client_is_shared_per_host_and_process(settings, monkeypatch):
+    settings.ES_HOSTNAME = "http://first:9200"
+    first = get_es_client()
+    assert get_es_client() is first
+
+    settings.ES_HOSTNAME = "http://second:9200"
+    assert get_es_client() is not first
+
+    settings.ES_HOSTNAME = "http://first:9200"
+    assert get_es_client() is first
+
+    # A forked child must not reuse its parent's connections
+    monkeypatch.setattr(client, "_CLIENTS_PID", -1)
+    assert get_es_client() is not first
+
+
+def test_es_query_metrics():
+    reset_es_query_metrics()
+    assert get_es_query_metrics() == {"es_queries": 0, "es_took_ms": 0, "es_round_trip_ms": 0}
+
+    record_es_query(10, 25)
+    record_es_query(5, 8)
+    assert get_es_query_metrics() == {"es_queries": 2, "es_took_ms": 15, "es_round_trip_ms": 33}
+
+    reset_es_query_metrics()
+    assert get_es_query_metrics()["es_queries"] == 0
+
+
+def test_es_query_metrics_include_threads_running_in_the_context():
+    reset_es_query_metrics()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for future in [executor.submit(contextvars.copy_context().run, record_es_query, 10, 20) for i in range(4)]:
+            future.result()
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(record_es_query, 1, 2))
+    thread.start()
+    thread.join()
+    assert get_es_query_metrics() == {"es_queries": 5, "es_took_ms": 41, "es_round_trip_ms": 82}
+
+    # A thread that resets its copy starts its own totals without touching the ones it was copied from
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(reset_es_query_metrics,))
+    thread.start()
+    thread.join()
+    assert get_es_query_metrics()["es_queries"] == 5
@@ -0,0 +1,47 @@
+import json
+import pytest
+
+from django.core.management.base import CommandError
+
+from usaspending_api.common.management.commands.matview_runner import (
+    BUILD,
+    REFRESH,
+    SKIP,
+    choose_action,
+    dependency_order,
+    has_unique_index,
+)
+
+
+def test_dependency_order():
+    matviews = {"c": {"depends_on": ["b"]}, "b": {"depends_on": ["a", "not_running"]}, "a": {}, "d": {}}
+    assert dependency_order(matviews) == ["a", "b", "c", "d"]
+
+    with pytest.raises(CommandError):
+        dependency_order({"a": {"depends_on": ["b"]}, "b": {"depends_on": ["a"]}})
+
+
+def test_choose_action():
+    watermark = {"definition": "abc", "source_changes": 10}
+
+    def state(populated=True, **previous):
+        return {"populated": populated, "comment": json.dumps({**watermark, **previous})}
+
+    assert choose_action(None, watermark, True) == BUILD
+    assert choose_action(state(populated=False), watermark, True) == BUILD
+    assert choose_action({"populated": True, "comment": None}, watermark, True) == BUILD
+    assert choose_action(state(definition="xyz"), watermark, True) == BUILD
+    assert choose_action(state(), watermark, True) == SKIP
+    assert choose_action(state(), {**watermark, "source_changes": None}, True) == REFRESH
+    assert choose_action(state(source_changes=None), watermark, True) == REFRESH
+    assert choose_action(state(source_changes=20), watermark, True) == REFRESH
+    assert choose_action(state(source_changes=5), watermark, False) == BUILD
+
+
+def test_has_unique_index():
+    assert has_unique_index({"indexes": [{"name": "id", "unique": True, "columns": [{"name": "id"}]}]})
+    assert not has_unique_index({"indexes": [{"name": "id", "columns": [{"name": "id"}]}]})
+    assert not has_unique_index(
+        {"indexes": [{"name": "id", "unique": True, "where": "id > 0", "columns": [{"name": "id"}]}]}
+    )
+    assert not has_unique_index({"indexes": [{"name": "id", "unique": True, "columns": [{"expression": "lower(x)"}]}]})
@@ -0,0 +1,101 @@
+import psycopg2
+import pytest
+
+from collections import Counter
+from django.db import OperationalError
+
+from usaspending_api.routers import replicas
+from usaspending_api.routers.replicas import DatabaseStats, ReadReplicaRouter, ReplicaMonitor
+
+
+def _monitor(**stats):
+    monitor = ReplicaMonitor()
+    monitor.stats = {alias: DatabaseStats() for alias in ["default", "db_r1", "db_r2"]}
+    monitor.replicas = ["db_r1", "db_r2"]
+    for alias, values in stats.items():
+        for key, value in values.items():
+            setattr(monitor.stats[alias], key, value)
+    return monitor
+
+
+def test_lagging_and_unhealthy_replicas_are_out_of_rotation(settings):
+    settings.READ_REPLICA_MAX_LAG_SECONDS = 30
+    databases = ["default", "db_r1", "db_r2"]
+
+    assert _monitor().available(databases) == databases
+    assert _monitor(db_r1={"lag_seconds": 31}).available(databases) == ["default", "db_r2"]
+    assert _monitor(db_r2={"healthy": False}).available(databases) == ["default", "db_r1"]
+    assert _monitor(db_r1={"healthy": False}, db_r2={"lag_seconds": 600}).available(databases) == ["default"]
+
+
+def test_reads_are_weighted_by_latency_and_load():
+    monitor = _monitor(
+        default={"latency_seconds": 0.01, "in_flight": 1},
+        db_r1={"latency_seconds": 0.01},
+        db_r2={"latency_seconds": 0.1},
+    )
+    chosen = Counter(monitor.choose(["default", "db_r1", "db_r2"]) for _ in range(2000))
+    assert chosen["db_r1"] > chosen["default"] > chosen["db_r2"]
+
+
+def test_read_your_writes(settings, monkeypatch):
+    settings.DATABASE_READ_REPLICAS = ["db_r1"]
+    monkeypatch.setattr(replicas, "MONITOR", _monitor())
+    monkeypatch.setattr(replicas.MONITOR, "start", lambda *args: None)
+    router = ReadReplicaRouter()
+    replicas.ReadYourWritesMiddleware().process_request(None)
+
+    settings.READ_REPLICA_READ_YOUR_WRITES = True
+    router.db_for_write(None)
+    assert {router.db_for_read(None) for _ in range(50)} == {"default"}
+
+    replicas.ReadYourWritesMiddleware().process_request(None)
+    assert "db_r1" in {router.db_for_read(None) for _ in range(50)}
+
+    settings.READ_REPLICA_READ_YOUR_WRITES = False
+    router.db_for_write(None)
+    assert "db_r1" in {router.db_for_read(None) for _ in range(50)}
+
+
+def test_failed_query_takes_replica_out_of_rotation():
+    monitor = _monitor()
+
+    def execute(sql, params, many, context):
+        raise OperationalError("server closed the connection unexpectedly")
+
+    with pytest.raises(OperationalError):
+        monitor.track_query("db_r1")(execute, "select 1", None, False, {})
+    assert monitor.stats["db_r1"].healthy is False
+    assert monitor.stats["db_r1"].in_flight == 0
+    assert monitor.available(["default", "db_r1", "db_r2"]) == ["default", "db_r2"]
+
+
+def test_health_check_connects_with_database_options(settings, monkeypatch):
+    settings.READ_REPLICA_HEALTH_CHECK_SECONDS = 15
+    settings.DATABASES = {
+        **settings.DATABASES,
+        "db_r1": {
+            "ENGINE": "django.db.backends.postgresql_psycopg2",
+            "NAME": "data_store_api",
+            "USER": "reader",
+            "PASSWORD": "secret",
+            "HOST": "replica.example.com",
+            "PORT": "5432",
+            "OPTIONS": {"sslmode": "require", "options": "-c statement_timeout=60000"},
+        },
+    }
+    connect_kwargs = {}
+
+    def connect(**kwargs):
+        connect_kwargs.update(kwargs)
+        raise psycopg2.OperationalError("could not connect to server")
+
+    monkeypatch.setattr(replicas.psycopg2, "connect", connect)
+    monitor = _monitor()
+    monitor.check_health("db_r1")
+
+    assert connect_kwargs["sslmode"] == "require"
+    assert connect_kwargs["options"] == "-c statement_timeout=60000"
+    assert connect_kwargs["host"] == "replica.example.com"
+    assert connect_kwargs["connect_timeout"] == 15
+    assert monitor.stats["db_r1"].healthy is False
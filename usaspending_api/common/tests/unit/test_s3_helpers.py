@@ -0,0 +1,63 @@
+import boto3
+import pytest
+import zipfile
+
+from io import BytesIO
+from moto import mock_s3
+
+from usaspending_api.common.helpers.s3_helpers import S3MultipartUploadStream
+from usaspending_api.download.filestreaming.zip_file import open_zip_file_for_stream, open_zip_member_for_write
+
+BUCKET_NAME = "test-bulk-downloads"
+REGION_NAME = "us-east-1"
+PART_SIZE = S3MultipartUploadStream.MIN_PART_SIZE
+
+
+@pytest.fixture
+def s3_bucket(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_s3():
+        s3client = boto3.client("s3", region_name=REGION_NAME)
+        s3client.create_bucket(Bucket=BUCKET_NAME)
+        yield s3client
+
+
+def test_multipart_upload_stream(s3_bucket):
+    data = bytes(range(256)) * (PART_SIZE // 100)
+    with S3MultipartUploadStream(BUCKET_NAME, "streamed.bin", REGION_NAME, part_size=PART_SIZE) as stream:
+        for offset in range(0, len(data), 1000000):
+            stream.write(data[offset : offset + 1000000])
+        assert stream.tell() == len(data)
+
+    uploaded = s3_bucket.get_object(Bucket=BUCKET_NAME, Key="streamed.bin")
+    assert uploaded["Body"].read() == data
+    assert uploaded["ETag"].endswith('-3"')  # two full parts and the remainder
+
+
+def test_multipart_upload_stream_abort(s3_bucket):
+    stream = S3MultipartUploadStream(BUCKET_NAME, "aborted.bin", REGION_NAME, part_size=PART_SIZE)
+    stream.write(b"x" * (PART_SIZE + 1))
+    stream.abort()
+
+    assert stream.closed
+    assert s3_bucket.list_objects_v2(Bucket=BUCKET_NAME).get("KeyCount") == 0
+    assert s3_bucket.list_multipart_uploads(Bucket=BUCKET_NAME).get("Uploads", []) == []
+
+
+def test_zip_file_written_to_multipart_upload_stream(s3_bucket, tmp_path):
+    data_file = tmp_path / "data_2.csv"
+    data_file.write_bytes(b"header\nlast row\n")
+
+    stream = S3MultipartUploadStream(BUCKET_NAME, "download.zip", REGION_NAME, part_size=PART_SIZE)
+    with open_zip_file_for_stream(stream) as zip_file:
+        with open_zip_member_for_write(zip_file, "data_1.csv") as member:
+            member.write(b"header\n" + b"row\n" * 1000)
+        zip_file.write(str(data_file), data_file.name)
+    stream.close()
+
+    uploaded = s3_bucket.get_object(Bucket=BUCKET_NAME, Key="download.zip")["Body"].read()
+    with zipfile.ZipFile(BytesIO(uploaded)) as zf:
+        assert zf.testzip() is None
+        assert zf.read("data_1.csv") == b"header\n" + b"row\n" * 1000
+        assert zf.read("data_2.csv") == b"header\nlast row\n"
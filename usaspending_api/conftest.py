@@ -20,6 +20,7 @@ from usaspending_api.common.sqs.sqs_handler import (
     _FakeUnitTestFileBackedSQSQueue,
 )
 from usaspending_api.common.helpers.generic_helper import generate_matviews
+from usaspending_api.references.v2.views.filter_tree.filter_tree import clear_filter_tree_cache
 from usaspending_api.conftest_helpers import (
     TestElasticSearchIndex,
     ensure_broker_server_dblink_exists,
@@ -48,6 +49,12 @@ def local(request):
     return request.config.getoption("--local")
 
 
+@pytest.fixture(autouse=True)
+def reset_filter_trees():
+    """Filter trees are kept in memory, so don't let one test's tree be served to the next"""
+    clear_filter_tree_cache()
+
+
 @pytest.fixture(scope="session")
 def django_db_setup(
     request,
@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import List, Optional, Dict
+from typing import List, Dict
 
 from django.conf import settings
 from django.utils.functional import cached_property
@@ -15,8 +15,9 @@ from usaspending_api.common.helpers.generic_helper import get_pagination_metadat
 from usaspending_api.common.query_with_filters import QueryWithFilters
 from usaspending_api.disaster.v2.views.disaster_base import DisasterBase, _BasePaginationMixin
 from usaspending_api.search.v2.elasticsearch_helper import (
+    get_all_unique_terms_aggregation,
     get_scaled_sum_aggregations,
-    get_number_of_unique_terms_for_awards,
+    has_all_unique_terms,
 )
 
 
@@ -82,8 +83,6 @@ class ElasticsearchDisasterBase(DisasterBase):
             non_zero_queries.append(ES_Q("range", **{field: {"lt": 0}}))
         self.filter_query.must.append(ES_Q("bool", should=non_zero_queries, minimum_should_match=1))
 
-        self.bucket_count = get_number_of_unique_terms_for_awards(self.filter_query, f"{self.agg_key}.hash")
-
         results = self.query_elasticsearch()
 
         return Response(
@@ -99,7 +98,7 @@ class ElasticsearchDisasterBase(DisasterBase):
     def build_elasticsearch_result(self, response: dict) -> List[dict]:
         pass
 
-    def build_elasticsearch_search_with_aggregations(self) -> Optional[AwardSearch]:
+    def build_elasticsearch_search_with_aggregations(self) -> AwardSearch:
         """
         Using the provided ES_Q object creates an AwardSearch object with the necessary applied aggregations.
         """
@@ -112,35 +111,28 @@ class ElasticsearchDisasterBase(DisasterBase):
         }
 
         # As of writing this the value of settings.ES_ROUTING_FIELD is the only high cardinality aggregation that
-        # we support. Since the Elasticsearch clusters are routed by this field we don't care to get a count of
-        # unique buckets, but instead we use the upper_limit and don't allow an upper_limit > 10k.
+        # we support. Since the Elasticsearch clusters are routed by this field we don't need every unique bucket,
+        # but instead we use the upper_limit and don't allow an upper_limit > 10k.
         if self.agg_key == settings.ES_ROUTING_FIELD:
             size = self.pagination.upper_limit
             shard_size = size
-            group_by_agg_key_values = {
-                "order": {self.sort_column_mapping[self.pagination.sort_key]: self.pagination.sort_order}
-            }
+            if shard_size > 10000:
+                self._raise_too_many_buckets()
+            group_by_agg_key = A(
+                "terms",
+                field=self.agg_key,
+                size=size,
+                shard_size=shard_size,
+                order={self.sort_column_mapping[self.pagination.sort_key]: self.pagination.sort_order},
+            )
             bucket_sort_values = {**pagination_values}
         else:
-            if self.bucket_count == 0:
-                return None
-            else:
-                size = self.bucket_count
-                shard_size = self.bucket_count + 100
-                group_by_agg_key_values = {}
-                bucket_sort_values = {
-                    "sort": {self.sort_column_mapping[self.pagination.sort_key]: {"order": self.pagination.sort_order}},
-                    **pagination_values,
-                }
-
-        if shard_size > 10000:
-            raise ForbiddenException(
-                "Current filters return too many unique items. Narrow filters to return results or use downloads."
-            )
-
-        # Define all aggregations needed to build the response
-        group_by_agg_key_values.update({"field": self.agg_key, "size": size, "shard_size": shard_size})
-        group_by_agg_key = A("terms", **group_by_agg_key_values)
+            # Every bucket is needed to sort them; query_elasticsearch checks that all of them were returned
+            group_by_agg_key = get_all_unique_terms_aggregation(self.agg_key)
+            bucket_sort_values = {
+                "sort": {self.sort_column_mapping[self.pagination.sort_key]: {"order": self.pagination.sort_order}},
+                **pagination_values,
+            }
 
         bucket_sort_aggregation = A("bucket_sort", **bucket_sort_values)
         sum_aggregations = {
@@ -154,6 +146,9 @@ class ElasticsearchDisasterBase(DisasterBase):
             search.aggs[self.agg_group_name].metric(field, sum_aggregations["sum_field"])
         search.aggs[self.agg_group_name].pipeline("pagination_aggregation", bucket_sort_aggregation)
 
+        # The number of unique buckets (for the page metadata) is counted in the same request
+        search.aggs.metric("unique_bucket_count", A("cardinality", field=f"{self.agg_key}.hash"))
+
         # If provided, break down primary bucket aggregation into sub-aggregations based on a sub_agg_key
         if self.sub_agg_key:
             self.extend_elasticsearch_search_with_sub_aggregation(search)
@@ -170,26 +165,10 @@ class ElasticsearchDisasterBase(DisasterBase):
 
         Example: Subtier Agency spending rolled up to Toptier Agency spending
         """
-        sub_bucket_count = get_number_of_unique_terms_for_awards(self.filter_query, f"{self.sub_agg_key}.hash")
-        size = sub_bucket_count
-        shard_size = sub_bucket_count + 100
-        sub_group_by_sub_agg_key_values = {}
-
-        if shard_size > 10000:
-            raise ForbiddenException(
-                "Current filters return too many unique items. Narrow filters to return results or use downloads."
-            )
-
-        # Sub-aggregation to append to primary agg
-        sub_group_by_sub_agg_key_values.update(
-            {
-                "field": self.sub_agg_key,
-                "size": size,
-                "shard_size": shard_size,
-                "order": {self.sort_column_mapping[self.pagination.sort_key]: self.pagination.sort_order},
-            }
+        # Sub-aggregation to append to primary agg; query_elasticsearch checks that it returned every bucket
+        sub_group_by_sub_agg_key = get_all_unique_terms_aggregation(
+            self.sub_agg_key, order={self.sort_column_mapping[self.pagination.sort_key]: self.pagination.sort_order}
         )
-        sub_group_by_sub_agg_key = A("terms", **sub_group_by_sub_agg_key_values)
 
         sum_aggregations = {
             mapping: get_scaled_sum_aggregations(mapping) for mapping in self.sum_column_mapping.values()
@@ -202,8 +181,24 @@ class ElasticsearchDisasterBase(DisasterBase):
 
     def query_elasticsearch(self) -> list:
         search = self.build_elasticsearch_search_with_aggregations()
-        if search is None:
-            return []
         response = search.handle_execute()
-        results = self.build_elasticsearch_result(response.aggs.to_dict())
+        response_dict = response.aggs.to_dict()
+        self.bucket_count = response_dict.get("unique_bucket_count", {"value": 0})["value"]
+
+        group_by_agg_key = response_dict.get(self.agg_group_name, {})
+        if self.agg_key != settings.ES_ROUTING_FIELD and not has_all_unique_terms(group_by_agg_key):
+            self._raise_too_many_buckets()
+        if self.sub_agg_key and not all(
+            has_all_unique_terms(bucket.get(self.sub_agg_group_name, {}))
+            for bucket in group_by_agg_key.get("buckets", [])
+        ):
+            self._raise_too_many_buckets()
+
+        results = self.build_elasticsearch_result(response_dict)
         return results
+
+    @staticmethod
+    def _raise_too_many_buckets():
+        raise ForbiddenException(
+            "Current filters return too many unique items. Narrow filters to return results or use downloads."
+        )
@@ -5,18 +5,19 @@ from typing import Optional, List, Dict
 
 from rest_framework.request import Request
 from rest_framework.response import Response
-from elasticsearch_dsl import A, Q as ES_Q
+from elasticsearch_dsl import Q as ES_Q
 
 from usaspending_api.common.cache_decorator import cache_response
 from usaspending_api.common.elasticsearch.search_wrappers import AwardSearch
-from usaspending_api.common.exceptions import UnprocessableEntityException
+from usaspending_api.common.exceptions import ForbiddenException, UnprocessableEntityException
 from usaspending_api.common.helpers.generic_helper import get_generic_filters_message
 from usaspending_api.common.query_with_filters import QueryWithFilters
 from usaspending_api.common.validator import TinyShield
 from usaspending_api.disaster.v2.views.disaster_base import DisasterBase
 from usaspending_api.search.v2.elasticsearch_helper import (
+    get_all_unique_terms_aggregation,
     get_scaled_sum_aggregations,
-    get_number_of_unique_terms_for_awards,
+    has_all_unique_terms,
 )
 
 
@@ -113,18 +114,12 @@ class SpendingByGeographyViewSet(DisasterBase):
             }
         )
 
-    def build_elasticsearch_search_with_aggregation(self, filter_query: ES_Q) -> Optional[AwardSearch]:
+    def build_elasticsearch_search_with_aggregation(self, filter_query: ES_Q) -> AwardSearch:
         # Create the initial search using filters
         search = AwardSearch().filter(filter_query)
 
-        # Check number of unique terms (buckets) for performance and restrictions on maximum buckets allowed
-        bucket_count = get_number_of_unique_terms_for_awards(filter_query, f"{self.agg_key}.hash")
-
-        if bucket_count == 0:
-            return None
-
-        # Add 100 to make sure that we consider enough records in each shard for accurate results
-        group_by_agg_key = A("terms", field=self.agg_key, size=bucket_count, shard_size=bucket_count + 100)
+        # Every unique term is returned in the same request; query_elasticsearch checks that none were left out
+        group_by_agg_key = get_all_unique_terms_aggregation(self.agg_key)
         sum_aggregations = get_scaled_sum_aggregations(self.metric_field)
         sum_field = sum_aggregations["sum_field"]
 
@@ -169,10 +164,13 @@ class SpendingByGeographyViewSet(DisasterBase):
 
     def query_elasticsearch(self, filter_query: ES_Q) -> list:
         search = self.build_elasticsearch_search_with_aggregation(filter_query)
-        if search is None:
-            return []
         response = search.handle_execute()
-        results_dict = self.build_elasticsearch_result(response.aggs.to_dict())
+        response_dict = response.aggs.to_dict()
+        if not has_all_unique_terms(response_dict.get("group_by_agg_key", {})):
+            raise ForbiddenException(
+                "Current filters return too many unique items. Narrow filters to return results or use downloads."
+            )
+        results_dict = self.build_elasticsearch_result(response_dict)
 
         if self.geo_layer_filters:
             filtered_shape_codes = set(self.geo_layer_filters) & set(results_dict.keys())
@@ -1,9 +1,20 @@
+import hashlib
+
 from datetime import datetime, timezone
+from django.db import connection
+from django.db.models import Max
+from usaspending_api.broker import lookups
+from usaspending_api.broker.models import ExternalDataLoadDate
 from usaspending_api.common.helpers.text_helpers import slugify_text_for_file_names
 from usaspending_api.common.logging import get_remote_addr
 from usaspending_api.download.helpers import write_to_download_log
 from usaspending_api.download.lookups import VALUE_MAPPINGS
 from usaspending_api.references.models import ToptierAgency
+from usaspending_api.submissions.models import SubmissionAttributes
+
+# Loads that change the data behind award downloads.  The Elasticsearch loads run after the Broker loads and the
+# materialized view refreshes, so the latest of these is when award data last changed.
+AWARD_DOWNLOAD_DATA_LOAD_TYPES = ("fpds", "fabs", "es_transactions", "es_awards")
 
 
 def create_unique_filename(json_request, origination=None):
@@ -78,3 +89,47 @@ def construct_data_date_range(provided_filters: dict) -> str:
     if provided_filters.get("quarter") != 1:
         string += f"-Q{provided_filters.get('quarter')}"
     return string
+
+
+def create_download_request_hash(ordered_json_request: str) -> str:
+    """
+    Hash of a download request that has been validated (so default values are filled in) and serialized with
+    order_nested_object (so equivalent key and filter orderings serialize the same).  Identical requests have the
+    same hash, which is used to find an existing download job for the request.
+    """
+    return hashlib.sha256(ordered_json_request.encode("utf-8")).hexdigest()
+
+
+def get_download_data_watermark(request_type: str) -> datetime:
+    """
+    Time the data behind a download of request_type last changed.  Download jobs created after this time can be
+    reused for identical requests.
+
+    Award data changes with the loads in AWARD_DOWNLOAD_DATA_LOAD_TYPES, and with submission loads, since award,
+    IDV, contract and assistance downloads all include File C (award financial) data.  Account data changes when
+    submissions are loaded, but also becomes visible as submission windows are revealed, so account downloads are
+    never reused across days.  When nothing has been recorded, the start of the current day (UTC) is used.  (Disaster
+    downloads are pre-generated files, which are never looked up here.)
+    """
+    start_of_today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    last_submission_update = SubmissionAttributes.objects.aggregate(Max("update_date"))["update_date__max"]
+    if request_type == "account":
+        return max(start_of_today, last_submission_update or start_of_today)
+
+    external_data_type_ids = [lookups.EXTERNAL_DATA_TYPE_DICT[key] for key in AWARD_DOWNLOAD_DATA_LOAD_TYPES]
+    last_load_date = ExternalDataLoadDate.objects.filter(external_data_type_id__in=external_data_type_ids).aggregate(
+        Max("last_load_date")
+    )["last_load_date__max"]
+    changes = [change for change in (last_load_date, last_submission_update) if change is not None]
+    return max(changes) if changes else start_of_today
+
+
+def lock_download_request_hash(request_hash: str) -> None:
+    """
+    Block until no other transaction holds the lock for request_hash, then hold it until the current transaction
+    ends.  Used to make looking up and creating the download job for a request atomic, so concurrent identical
+    requests share one job instead of each creating (and queuing) their own.
+    """
+    lock_id = int.from_bytes(bytes.fromhex(request_hash[:16]), "big", signed=True)
+    with connection.cursor() as cursor:
+        cursor.execute("select pg_advisory_xact_lock(%s)", [lock_id])
@@ -12,24 +12,40 @@ import subprocess
 import tempfile
 import time
 import traceback
+import zipfile
 
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timezone
 from django.conf import settings
 
 from usaspending_api.awards.v2.filters.filter_helpers import add_date_range_comparison_types
 from usaspending_api.awards.v2.lookups.lookups import contract_type_mapping, assistance_type_mapping, idv_type_mapping
-from usaspending_api.common.csv_helpers import count_rows_in_delimited_file, partition_large_delimited_file
+from usaspending_api.common.csv_helpers import (
+    count_rows_in_delimited_file,
+    partition_delimited_stream,
+    partition_large_delimited_file,
+)
 from usaspending_api.common.exceptions import InvalidParameterException
 from usaspending_api.common.helpers.orm_helpers import generate_raw_quoted_query
-from usaspending_api.common.helpers.s3_helpers import multipart_upload
+from usaspending_api.common.helpers.s3_helpers import S3MultipartUploadStream, multipart_upload
 from usaspending_api.common.helpers.text_helpers import slugify_text_for_file_names
 from usaspending_api.common.retrieve_file_from_uri import RetrieveFileFromUri
 from usaspending_api.download.download_utils import construct_data_date_range
 from usaspending_api.download.filestreaming import NAMING_CONFLICT_DISCRIMINATOR
 from usaspending_api.download.filestreaming.download_source import DownloadSource
 from usaspending_api.download.filestreaming.file_description import build_file_description, save_file_description
-from usaspending_api.download.filestreaming.zip_file import append_files_to_zip_file
+from usaspending_api.download.filestreaming.zip_file import (
+    append_files_to_zip_file,
+    append_zip_members_to_zip_file,
+    open_zip_file_for_append,
+    open_zip_file_for_stream,
+    open_zip_member_for_write,
+)
 from usaspending_api.download.helpers import verify_requested_columns_available, write_to_download_log as write_to_log
+from usaspending_api.download.helpers.elasticsearch_download_functions import (
+    get_download_ids_table,
+    write_download_ids_table_sql,
+)
 from usaspending_api.download.lookups import JOB_STATUS_DICT, VALUE_MAPPINGS, FILE_FORMATS
 from usaspending_api.download.models import DownloadJob
 
@@ -55,6 +71,8 @@ def generate_download(download_job: DownloadJob, origination: Optional[str] = No
 
     file_name = start_download(download_job)
     working_dir = None
+    upload_stream = None
+    sources = []
     try:
         # Create temporary files and working directory
         zip_file_path = settings.CSV_LOCAL_PATH + file_name
@@ -65,25 +83,25 @@ def generate_download(download_job: DownloadJob, origination: Optional[str] = No
         if not os.path.exists(working_dir):
             os.mkdir(working_dir)
 
+        archive = zip_file_path
+        if settings.STREAM_DOWNLOAD_UPLOADS and not settings.IS_LOCAL:
+            # Write the zip file straight into a multipart upload; parts go to S3 while later files are generated
+            upload_stream = S3MultipartUploadStream(
+                settings.BULK_DOWNLOAD_S3_BUCKET_NAME,
+                file_name,
+                settings.USASPENDING_AWS_REGION,
+                part_size=settings.DOWNLOAD_S3_UPLOAD_PART_SIZE,
+            )
+            archive = open_zip_file_for_stream(upload_stream, settings.DOWNLOAD_ZIP_COMPRESSION_LEVEL)
+
         write_to_log(message=f"Generating {file_name}", download_job=download_job)
 
         # Generate sources from the JSON request object
         sources = get_download_sources(json_request, origination)
-        for source in sources:
-            # Parse and write data to the file; if there are no matching columns for a source then add an empty file
-            source_column_count = len(source.columns(columns))
-            if source_column_count == 0:
-                create_empty_data_file(
-                    source, download_job, working_dir, piid, assistance_id, zip_file_path, file_format
-                )
-            else:
-                download_job.number_of_columns += source_column_count
-                parse_source(
-                    source, columns, download_job, working_dir, piid, assistance_id, zip_file_path, limit, file_format
-                )
+        parse_sources(sources, columns, download_job, working_dir, piid, assistance_id, archive, limit, file_format)
         include_data_dictionary = json_request.get("include_data_dictionary")
         if include_data_dictionary:
-            add_data_dictionary_to_zip(working_dir, zip_file_path)
+            add_data_dictionary_to_zip(working_dir, archive)
         include_file_description = json_request.get("include_file_description")
         if include_file_description:
             write_to_log(message="Adding file description to zip file")
@@ -92,8 +110,17 @@ def generate_download(download_job: DownloadJob, origination: Optional[str] = No
             file_description_path = save_file_description(
                 working_dir, include_file_description["destination"], file_description
             )
-            append_files_to_zip_file([file_description_path], zip_file_path)
-        download_job.file_size = os.stat(zip_file_path).st_size
+            append_files_to_zip_file([file_description_path], archive)
+        if upload_stream:
+            start_uploading = time.perf_counter()
+            archive.close()
+            download_job.file_size = upload_stream.tell()
+            upload_stream.close()
+            write_to_log(
+                message=f"Finishing upload took {time.perf_counter() - start_uploading:.2f}s", download_job=download_job
+            )
+        else:
+            download_job.file_size = os.stat(zip_file_path).st_size
     except InvalidParameterException as e:
         exc_msg = "InvalidParameterException was raised while attempting to process the DownloadJob"
         fail_download(download_job, e, exc_msg)
@@ -104,14 +131,18 @@ def generate_download(download_job: DownloadJob, origination: Optional[str] = No
         fail_download(download_job, e, exc_msg)
         raise Exception(download_job.error_message) from e
     finally:
-        # Remove working directory
+        # Discard a partial upload
+        if upload_stream and not upload_stream.closed:
+            upload_stream.abort()
+        # Remove working directory and the files of Elasticsearch download IDs
         if working_dir and os.path.exists(working_dir):
             shutil.rmtree(working_dir)
+        remove_download_ids_files(source.queryset for source in sources)
         _kill_spawned_processes(download_job)
 
     try:
-        # push file to S3 bucket, if not local
-        if not settings.IS_LOCAL:
+        # push file to S3 bucket, if not local and not already uploaded while it was generated
+        if not settings.IS_LOCAL and not upload_stream:
             bucket = settings.BULK_DOWNLOAD_S3_BUCKET_NAME
             region = settings.USASPENDING_AWS_REGION
             start_uploading = time.perf_counter()
@@ -138,64 +169,83 @@ def generate_download(download_job: DownloadJob, origination: Optional[str] = No
 
 def get_download_sources(json_request: dict, origination: Optional[str] = None):
     download_sources = []
-    for download_type in json_request["download_types"]:
-        agency_id = json_request.get("agency", "all")
-        filter_function = VALUE_MAPPINGS[download_type]["filter_function"]
-        download_type_table = VALUE_MAPPINGS[download_type]["table"]
-
-        if VALUE_MAPPINGS[download_type]["source_type"] == "award":
-            # Award downloads
-
-            # Use correct date range columns for advanced search
-            # (Will not change anything for keyword search since "time_period" is not provided))
-            filters = add_date_range_comparison_types(
-                json_request["filters"],
-                is_subaward=download_type != "awards",
-                gte_date_type="action_date",
-                lte_date_type="date_signed",
-            )
+    # Querysets filtered by Elasticsearch hold a file of download IDs, which is removed if the sources can't be built
+    querysets = []
+    try:
+        for download_type in json_request["download_types"]:
+            agency_id = json_request.get("agency", "all")
+            filter_function = VALUE_MAPPINGS[download_type]["filter_function"]
+            download_type_table = VALUE_MAPPINGS[download_type]["table"]
+
+            if VALUE_MAPPINGS[download_type]["source_type"] == "award":
+                # Award downloads
+
+                # Use correct date range columns for advanced search
+                # (Will not change anything for keyword search since "time_period" is not provided))
+                filters = add_date_range_comparison_types(
+                    json_request["filters"],
+                    is_subaward=download_type != "awards",
+                    gte_date_type="action_date",
+                    lte_date_type="date_signed",
+                )
 
-            queryset = filter_function(filters)
-            if filters.get("prime_and_sub_award_types") is not None:
-                award_type_codes = set(filters["prime_and_sub_award_types"][download_type])
-            else:
-                award_type_codes = set(filters["award_type_codes"])
-
-            if (
-                award_type_codes & (set(contract_type_mapping.keys()) | set(idv_type_mapping.keys()))
-                or "procurement" in award_type_codes
-            ):
-                # only generate d1 files if the user is asking for contract data
-                d1_source = DownloadSource(VALUE_MAPPINGS[download_type]["table_name"], "d1", download_type, agency_id)
-                d1_filters = {f"{VALUE_MAPPINGS[download_type]['contract_data']}__isnull": False}
-                d1_source.queryset = queryset & download_type_table.objects.filter(**d1_filters)
-                download_sources.append(d1_source)
-
-            if award_type_codes & set(assistance_type_mapping.keys()) or ("grant" in award_type_codes):
-                # only generate d2 files if the user is asking for assistance data
-                d2_source = DownloadSource(VALUE_MAPPINGS[download_type]["table_name"], "d2", download_type, agency_id)
-                d2_filters = {f"{VALUE_MAPPINGS[download_type]['assistance_data']}__isnull": False}
-                d2_source.queryset = queryset & download_type_table.objects.filter(**d2_filters)
-                download_sources.append(d2_source)
-
-        elif VALUE_MAPPINGS[download_type]["source_type"] == "account":
-            # Account downloads
-            account_source = DownloadSource(
-                VALUE_MAPPINGS[download_type]["table_name"], json_request["account_level"], download_type, agency_id
-            )
-            account_source.queryset = filter_function(
-                download_type,
-                VALUE_MAPPINGS[download_type]["table"],
-                json_request["filters"],
-                json_request["account_level"],
-            )
-            download_sources.append(account_source)
+                queryset = filter_function(filters)
+                querysets.append(queryset)
+                if filters.get("prime_and_sub_award_types") is not None:
+                    award_type_codes = set(filters["prime_and_sub_award_types"][download_type])
+                else:
+                    award_type_codes = set(filters["award_type_codes"])
+
+                if (
+                    award_type_codes & (set(contract_type_mapping.keys()) | set(idv_type_mapping.keys()))
+                    or "procurement" in award_type_codes
+                ):
+                    # only generate d1 files if the user is asking for contract data
+                    d1_source = DownloadSource(
+                        VALUE_MAPPINGS[download_type]["table_name"], "d1", download_type, agency_id
+                    )
+                    d1_filters = {f"{VALUE_MAPPINGS[download_type]['contract_data']}__isnull": False}
+                    d1_source.queryset = queryset & download_type_table.objects.filter(**d1_filters)
+                    download_sources.append(d1_source)
+
+                if award_type_codes & set(assistance_type_mapping.keys()) or ("grant" in award_type_codes):
+                    # only generate d2 files if the user is asking for assistance data
+                    d2_source = DownloadSource(
+                        VALUE_MAPPINGS[download_type]["table_name"], "d2", download_type, agency_id
+                    )
+                    d2_filters = {f"{VALUE_MAPPINGS[download_type]['assistance_data']}__isnull": False}
+                    d2_source.queryset = queryset & download_type_table.objects.filter(**d2_filters)
+                    download_sources.append(d2_source)
+
+            elif VALUE_MAPPINGS[download_type]["source_type"] == "account":
+                # Account downloads
+                account_source = DownloadSource(
+                    VALUE_MAPPINGS[download_type]["table_name"], json_request["account_level"], download_type, agency_id
+                )
+                account_source.queryset = filter_function(
+                    download_type,
+                    VALUE_MAPPINGS[download_type]["table"],
+                    json_request["filters"],
+                    json_request["account_level"],
+                )
+                querysets.append(account_source.queryset)
+                download_sources.append(account_source)
 
-    verify_requested_columns_available(tuple(download_sources), json_request.get("columns", []))
+        verify_requested_columns_available(tuple(download_sources), json_request.get("columns", []))
+    except Exception:
+        remove_download_ids_files(querysets)
+        raise
 
     return download_sources
 
 
+def remove_download_ids_files(querysets):
+    """Remove the files of Elasticsearch download IDs that querysets join against (see get_download_ids_table)"""
+    for download_ids_table in {get_download_ids_table(queryset) for queryset in querysets} - {None}:
+        if os.path.exists(download_ids_table.ids_file_path):
+            os.remove(download_ids_table.ids_file_path)
+
+
 def build_data_file_name(source, download_job, piid, assistance_id):
     d_map = {"d1": "Contracts", "d2": "Assistance", "treasury_account": "TAS", "federal_account": "FA"}
 
@@ -237,94 +287,243 @@ def build_data_file_name(source, download_job, piid, assistance_id):
     return data_file_name
 
 
-def parse_source(source, columns, download_job, working_dir, piid, assistance_id, zip_file_path, limit, file_format):
-    """Write to delimited text file(s) and zip file(s) using the source data"""
+def parse_sources(sources, columns, download_job, working_dir, piid, assistance_id, zip_file_path, limit, file_format):
+    """
+    Write to delimited text file(s) and zip file(s) using the data of each source; if there are no matching columns
+    for a source then add an empty file.
 
-    data_file_name = build_data_file_name(source, download_job, piid, assistance_id)
+    The COPY and partition steps of up to DOWNLOAD_SOURCE_MAX_CONCURRENCY sources run at the same time, each in its
+    own process.  Their output is added to the zip file one source at a time, in source order.  zip_file_path can
+    also be an open ZipFile (see open_zip_file_for_stream).
+    """
+    start_time = time.perf_counter()
+    temp_files = []
+    futures = []
+    with ProcessPoolExecutor(max_workers=settings.DOWNLOAD_SOURCE_MAX_CONCURRENCY) as executor:
+        try:
+            for source in sources:
+                source_column_count = len(source.columns(columns))
+                if source_column_count == 0:
+                    futures.append(None)
+                    continue
+                download_job.number_of_columns += source_column_count
 
-    source_query = source.row_emitter(columns)
-    extension = FILE_FORMATS[file_format]["extension"]
-    source.file_name = f"{data_file_name}.{extension}"
-    source_path = os.path.join(working_dir, source.file_name)
+                data_file_name = build_data_file_name(source, download_job, piid, assistance_id)
+                extension = FILE_FORMATS[file_format]["extension"]
+                source.file_name = f"{data_file_name}.{extension}"
+                write_to_log(message=f"Preparing to download data as {source.file_name}", download_job=download_job)
 
-    write_to_log(message=f"Preparing to download data as {source.file_name}", download_job=download_job)
+                # Generate the query file; values, limits, dates fixed
+                source_query = source.row_emitter(columns)
+                export_query = generate_export_query(source_query, limit, source, columns, file_format)
+                temp_file, temp_file_path = generate_export_query_temp_file(
+                    export_query, download_job, download_ids_table=get_download_ids_table(source_query)
+                )
+                temp_files.append((temp_file, temp_file_path))
 
-    # Generate the query file; values, limits, dates fixed
-    export_query = generate_export_query(source_query, limit, source, columns, file_format)
-    temp_file, temp_file_path = generate_export_query_temp_file(export_query, download_job)
+                futures.append(
+                    executor.submit(
+                        generate_data_files, temp_file_path, working_dir, data_file_name, file_format, download_job
+                    )
+                )
 
-    start_time = time.perf_counter()
-    try:
-        # Create a separate process to run the PSQL command; wait
-        psql_process = multiprocessing.Process(target=execute_psql, args=(temp_file_path, source_path, download_job))
-        psql_process.start()
-        wait_for_process(psql_process, start_time, download_job)
+            for source, future in zip(sources, futures):
+                if future is None:
+                    create_empty_data_file(
+                        source, download_job, working_dir, piid, assistance_id, zip_file_path, file_format
+                    )
+                    continue
+
+                row_count, data_file_paths = wait_for_future(future, start_time, download_job)
+                download_job.number_of_rows += row_count
+                download_job.save()
+
+                if isinstance(zip_file_path, zipfile.ZipFile):
+                    # The zip file is open in this process (e.g. it is being uploaded as it is written)
+                    zip_data_files(zip_file_path, data_file_paths, download_job)
+                else:
+                    # Create a separate process to write the data files to zip; wait
+                    zip_process = multiprocessing.Process(
+                        target=zip_data_files, args=(zip_file_path, data_file_paths, download_job)
+                    )
+                    zip_process.start()
+                    wait_for_process(zip_process, start_time, download_job)
+        except Exception:
+            # Don't wait on sources that are still running once the download has failed
+            for future in futures:
+                if future:
+                    future.cancel()
+            _kill_spawned_processes(download_job)
+            raise
+        finally:
+            # Remove temporary files
+            for temp_file, temp_file_path in temp_files:
+                os.close(temp_file)
+                os.remove(temp_file_path)
+
+
+def generate_data_files(temp_sql_file_path, working_dir, data_file_name, file_format, download_job):
+    """
+    Run the export query of a single source and split its output into data files of at most EXCEL_ROW_LIMIT rows.
+    Returns the number of rows and the paths of the files to add to the download's zip file.
 
-        delim = FILE_FORMATS[file_format]["delimiter"]
+    With STREAM_DOWNLOAD_FILES the output is partitioned and compressed into a zip file of its own as it is read from
+    psql; otherwise it is written to a delimited text file first and then counted and partitioned.
+    """
+    if settings.STREAM_DOWNLOAD_FILES:
+        source_zip_file_path = os.path.join(working_dir, f"{data_file_name}.zip")
+        row_count = execute_psql_to_zip(
+            temp_sql_file_path, source_zip_file_path, data_file_name, file_format, download_job
+        )
+        return row_count, [source_zip_file_path]
 
-        # Log how many rows we have
-        write_to_log(message="Counting rows in delimited text file", download_job=download_job)
-        try:
-            download_job.number_of_rows += count_rows_in_delimited_file(
-                filename=source_path, has_header=True, delimiter=delim
-            )
-        except Exception:
-            write_to_log(
-                message="Unable to obtain delimited text file line count", is_error=True, download_job=download_job
-            )
-        download_job.save()
+    extension = FILE_FORMATS[file_format]["extension"]
+    source_path = os.path.join(working_dir, f"{data_file_name}.{extension}")
+    execute_psql(temp_sql_file_path, source_path, download_job)
 
-        # Create a separate process to split the large data files into smaller file and write to zip; wait
-        zip_process = multiprocessing.Process(
-            target=split_and_zip_data_files,
-            args=(zip_file_path, source_path, data_file_name, file_format, download_job),
+    # Log how many rows we have
+    row_count = 0
+    write_to_log(message="Counting rows in delimited text file", download_job=download_job)
+    try:
+        row_count = count_rows_in_delimited_file(
+            filename=source_path, has_header=True, delimiter=FILE_FORMATS[file_format]["delimiter"]
         )
-        zip_process.start()
-        wait_for_process(zip_process, start_time, download_job)
-        download_job.save()
+    except Exception:
+        write_to_log(
+            message="Unable to obtain delimited text file line count", is_error=True, download_job=download_job
+        )
+
+    try:
+        return row_count, split_data_files(source_path, data_file_name, file_format, download_job)
     except Exception as e:
+        fail_partitioning(download_job, e)
         raise e
-    finally:
-        # Remove temporary files
-        os.close(temp_file)
-        os.remove(temp_file_path)
 
 
-def split_and_zip_data_files(zip_file_path, source_path, data_file_name, file_format, download_job=None):
+def zip_data_files(zip_file_path, data_file_paths, download_job=None):
+    """Add the output of generate_data_files to the zip file, removing each data file once it has been added"""
+    write_to_log(message="Beginning zipping and compression", download_job=download_job)
+    log_time = time.perf_counter()
+    if settings.STREAM_DOWNLOAD_FILES:
+        for source_zip_file_path in data_file_paths:
+            append_zip_members_to_zip_file(
+                source_zip_file_path,
+                zip_file_path,
+                compression_level=settings.DOWNLOAD_ZIP_COMPRESSION_LEVEL,
+                copy_compressed=settings.DOWNLOAD_ZIP_COPY_COMPRESSED,
+            )
+            os.remove(source_zip_file_path)
+    else:
+        append_files_to_zip_file(
+            data_file_paths,
+            zip_file_path,
+            compression_level=settings.DOWNLOAD_ZIP_COMPRESSION_LEVEL,
+            max_workers=settings.DOWNLOAD_ZIP_MAX_WORKERS,
+            copy_compressed=settings.DOWNLOAD_ZIP_COPY_COMPRESSED,
+        )
+        for data_file_path in data_file_paths:
+            os.remove(data_file_path)
+    write_to_log(message=f"Writing to zipfile took {time.perf_counter() - log_time:.4f}s", download_job=download_job)
+
+
+def execute_psql_to_zip(temp_sql_file_path, zip_file_path, data_file_name, file_format, download_job):
+    """
+    Executes a single PSQL command within its own Subprocess, reading its output from the pipe and writing it
+    directly into partitioned zip members (e.g. `Assistance_prime_transactions_delta_%s.csv`) of EXCEL_ROW_LIMIT
+    rows each.  Returns the number of rows written.
+    """
     try:
-        # Split data files into separate files
-        # e.g. `Assistance_prime_transactions_delta_%s.csv`
         log_time = time.perf_counter()
-        delim = FILE_FORMATS[file_format]["delimiter"]
         extension = FILE_FORMATS[file_format]["extension"]
-
         output_template = f"{data_file_name}_%s.{extension}"
-        write_to_log(message="Beginning the delimited text file partition", download_job=download_job)
-        list_of_files = partition_large_delimited_file(
-            file_path=source_path, delimiter=delim, row_limit=EXCEL_ROW_LIMIT, output_name_template=output_template
+
+        write_to_log(message="Beginning streamed COPY, partition, and compression", download_job=download_job)
+        with open(temp_sql_file_path, "rb") as sql_file, tempfile.TemporaryFile() as psql_errors:
+            psql_process = subprocess.Popen(
+                ["psql", "-q", retrieve_db_string(), "-v", "ON_ERROR_STOP=1"],
+                stdin=sql_file,
+                stdout=subprocess.PIPE,
+                stderr=psql_errors,
+            )
+            try:
+                with open_zip_file_for_append(zip_file_path, settings.DOWNLOAD_ZIP_COMPRESSION_LEVEL) as zip_file:
+                    row_count = partition_delimited_stream(
+                        psql_process.stdout,
+                        lambda partition_number: open_zip_member_for_write(
+                            zip_file, output_template % partition_number
+                        ),
+                        row_limit=EXCEL_ROW_LIMIT,
+                    )
+            finally:
+                psql_process.stdout.close()
+                return_code = psql_process.wait()
+
+            if return_code != 0:
+                psql_errors.seek(0)
+                raise subprocess.CalledProcessError(return_code, "[redacted psql command]", output=psql_errors.read())
+
+        duration = time.perf_counter() - log_time
+        write_to_log(
+            message=f"Streamed {row_count:,} rows into {os.path.basename(zip_file_path)}, took {duration:.4f}s",
+            download_job=download_job,
         )
+        return row_count
+    except Exception as e:
+        logger.error(e)
+        sql = subprocess.check_output(["cat", temp_sql_file_path]).decode()
+        logger.error(f"Faulty SQL: {sql}")
+        raise e
 
-        msg = f"Partitioning data into {len(list_of_files)} files took {time.perf_counter() - log_time:.4f}s"
-        write_to_log(message=msg, download_job=download_job)
+
+def split_data_files(source_path, data_file_name, file_format, download_job=None):
+    """Split data files into separate files, e.g. `Assistance_prime_transactions_delta_%s.csv`"""
+    log_time = time.perf_counter()
+    delim = FILE_FORMATS[file_format]["delimiter"]
+    extension = FILE_FORMATS[file_format]["extension"]
+
+    output_template = f"{data_file_name}_%s.{extension}"
+    write_to_log(message="Beginning the delimited text file partition", download_job=download_job)
+    list_of_files = partition_large_delimited_file(
+        file_path=source_path, delimiter=delim, row_limit=EXCEL_ROW_LIMIT, output_name_template=output_template
+    )
+
+    msg = f"Partitioning data into {len(list_of_files)} files took {time.perf_counter() - log_time:.4f}s"
+    write_to_log(message=msg, download_job=download_job)
+    return list_of_files
+
+
+def split_and_zip_data_files(zip_file_path, source_path, data_file_name, file_format, download_job=None):
+    try:
+        list_of_files = split_data_files(source_path, data_file_name, file_format, download_job)
 
         # Zip the split files into one zipfile
         write_to_log(message="Beginning zipping and compression", download_job=download_job)
         log_time = time.perf_counter()
-        append_files_to_zip_file(list_of_files, zip_file_path)
+        append_files_to_zip_file(
+            list_of_files,
+            zip_file_path,
+            compression_level=settings.DOWNLOAD_ZIP_COMPRESSION_LEVEL,
+            max_workers=settings.DOWNLOAD_ZIP_MAX_WORKERS,
+            copy_compressed=settings.DOWNLOAD_ZIP_COPY_COMPRESSED,
+        )
 
         write_to_log(
             message=f"Writing to zipfile took {time.perf_counter() - log_time:.4f}s", download_job=download_job
         )
 
     except Exception as e:
-        message = "Exception while partitioning text file"
-        if download_job:
-            fail_download(download_job, e, message)
-            write_to_log(message=message, download_job=download_job, is_error=True)
-        logger.error(e)
+        fail_partitioning(download_job, e)
         raise e
 
 
+def fail_partitioning(download_job, exception):
+    message = "Exception while partitioning text file"
+    if download_job:
+        fail_download(download_job, exception, message)
+        write_to_log(message=message, download_job=download_job, is_error=True)
+    logger.error(exception)
+
+
 def start_download(download_job):
     # Update job attributes
     download_job.job_status_id = JOB_STATUS_DICT["running"]
@@ -386,6 +585,19 @@ def wait_for_process(process, start_time, download_job):
     return time.perf_counter() - log_time
 
 
+def wait_for_future(future, start_time, download_job):
+    """Wait for the future's result, throw errors for timeouts or exceptions raised by the work it represents"""
+    timeout = None
+    if download_job and not download_job.monthly_download:
+        timeout = max(MAX_VISIBILITY_TIMEOUT - (time.perf_counter() - start_time), 0)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        raise TimeoutError(
+            f"DownloadJob {download_job.download_job_id} lasted longer than {MAX_VISIBILITY_TIMEOUT / 3600} hours"
+        )
+
+
 def generate_export_query(source_query, limit, source, columns, file_format):
     if limit:
         source_query = source_query[:limit]
@@ -394,15 +606,18 @@ def generate_export_query(source_query, limit, source, columns, file_format):
     return r"\COPY ({}) TO STDOUT {}".format(query_annotated, options)
 
 
-def generate_export_query_temp_file(export_query, download_job, temp_dir=None):
+def generate_export_query_temp_file(export_query, download_job, temp_dir=None, download_ids_table=None):
     write_to_log(message=f"Saving PSQL Query: {export_query}", download_job=download_job, is_debug=True)
     dir_name = "/tmp"
     if temp_dir:
         dir_name = temp_dir
     # Create a unique temporary file to hold the raw query, using \copy
-    (temp_sql_file, temp_sql_file_path) = tempfile.mkstemp(prefix="bd_sql_", dir=dir_name)
+    temp_sql_file, temp_sql_file_path = tempfile.mkstemp(prefix="bd_sql_", dir=dir_name)
 
     with open(temp_sql_file_path, "w") as file:
+        if download_ids_table:
+            # The query joins against a table of IDs from Elasticsearch that has to be loaded first
+            write_download_ids_table_sql(download_ids_table, file)
         file.write(export_query)
 
     return temp_sql_file, temp_sql_file_path
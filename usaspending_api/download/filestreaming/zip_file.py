@@ -1,19 +1,175 @@
+import contextlib
 import os
+import shutil
+import struct
 import zipfile
+import zlib
 
+from concurrent.futures import ProcessPoolExecutor
 
-def append_files_to_zip_file(file_paths, zip_file_path):
+# Bytes read from a file at a time while it is being deflated or copied
+DEFLATE_BUFFER_SIZE = 1024 * 1024
+
+# Positions of the file name and extra field lengths in an unpacked zipfile.structFileHeader
+_FH_FILENAME_LENGTH = 10
+_FH_EXTRA_FIELD_LENGTH = 11
+
+
+def open_zip_file_for_append(zip_file_path, compression_level=None):
+    """
+    Open (creating if needed) the zip archive at zip_file_path in append mode with the download settings.
+    compression_level is passed to zlib; None uses zlib's default.
+
+    zip_file_path can also be a ZipFile that is already open for writing (see open_zip_file_for_stream); it is
+    returned as-is and left open when the context exits.
+    """
+    if isinstance(zip_file_path, zipfile.ZipFile):
+        return contextlib.nullcontext(zip_file_path)
+    return zipfile.ZipFile(
+        zip_file_path, "a", compression=zipfile.ZIP_DEFLATED, allowZip64=True, compresslevel=compression_level
+    )
+
+
+def open_zip_file_for_stream(stream, compression_level=None):
+    """
+    Open a new zip archive, with the download settings, that is written front to back to the binary stream (e.g. an
+    upload) without ever seeking.  The returned ZipFile can be passed anywhere a zip file path is accepted by the
+    functions in this module; it must be closed to write the archive's central directory.
+    """
+    return zipfile.ZipFile(
+        stream, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True, compresslevel=compression_level
+    )
+
+
+def append_files_to_zip_file(file_paths, zip_file_path, compression_level=None, max_workers=1, copy_compressed=False):
     """
     Create zip archive at the specified zip_file_path if it does not exist, and add all the files at provided
     file_paths to it.
 
+    When copy_compressed is True, max_workers is greater than 1, and there are several files, each file is deflated
+    in its own process (up to max_workers at a time) and members are written into the archive, in the order given,
+    as soon as they are ready (see _write_compressed_member).  Otherwise each file is compressed by ZipFile.write.
+    compression_level is passed to zlib; None uses zlib's default.
+
     NOTE: If a zip file already exists at zip_file_path, the given files will be added in addition to the ones
     already in the zip when using append (`a`) mode. If that zip contains a file with the same name as one provided,
     it will throw a UserWarning and duplicate the file.
     Use caution in this case by removing the zip in the finally of an exception and also checking for and removing
     the zip if it exists before you begin to create it from scratch
     """
-    with zipfile.ZipFile(zip_file_path, "a", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zip_file:
-        for file_path in file_paths:
-            archive_name = os.path.basename(file_path)
-            zip_file.write(file_path, archive_name)
+    with open_zip_file_for_append(zip_file_path, compression_level) as zip_file:
+        if copy_compressed and max_workers > 1 and len(file_paths) > 1:
+            _append_files_in_parallel(zip_file, file_paths, compression_level, max_workers)
+        else:
+            for file_path in file_paths:
+                archive_name = os.path.basename(file_path)
+                zip_file.write(file_path, archive_name)
+
+
+def open_zip_member_for_write(zip_file, archive_name):
+    """
+    Return a writable binary file object for a new member of an open zip_file.  Data written to it is deflated
+    straight into the archive, so the member never needs to exist on disk.  Only one member can be open at a time.
+
+    The size of streamed data is unknown up front, so ZIP64 headers are always written.
+    """
+    return zip_file.open(archive_name, "w", force_zip64=True)
+
+
+def append_zip_members_to_zip_file(source_zip_file_path, zip_file_path, compression_level=None, copy_compressed=False):
+    """
+    Add every member of the zip archive at source_zip_file_path to the archive at zip_file_path (created if it does
+    not exist).  When copy_compressed is True the compressed data is copied as-is (see _write_compressed_member);
+    otherwise each member is decompressed and recompressed with compression_level.
+    """
+    with zipfile.ZipFile(source_zip_file_path, "r") as source_zip_file, open_zip_file_for_append(
+        zip_file_path, compression_level
+    ) as zip_file:
+        for source_zinfo in source_zip_file.infolist():
+            if copy_compressed:
+                _copy_compressed_member(source_zip_file, source_zinfo, zip_file)
+            else:
+                with source_zip_file.open(source_zinfo) as source, open_zip_member_for_write(
+                    zip_file, source_zinfo.filename
+                ) as member:
+                    shutil.copyfileobj(source, member, DEFLATE_BUFFER_SIZE)
+
+
+def _copy_compressed_member(source_zip_file, source_zinfo, zip_file):
+    source_zip_file.fp.seek(source_zinfo.header_offset)
+    file_header = source_zip_file.fp.read(zipfile.sizeFileHeader)
+    file_header = struct.unpack(zipfile.structFileHeader, file_header)
+    header_remainder = file_header[_FH_FILENAME_LENGTH] + file_header[_FH_EXTRA_FIELD_LENGTH]
+    source_zip_file.fp.seek(header_remainder, os.SEEK_CUR)
+
+    zinfo = zipfile.ZipInfo(source_zinfo.filename, source_zinfo.date_time)
+    zinfo.compress_type = source_zinfo.compress_type
+    zinfo.external_attr = source_zinfo.external_attr
+    zinfo.file_size = source_zinfo.file_size
+    compress_size = source_zinfo.compress_size
+    _write_compressed_member(zip_file, zinfo, source_zip_file.fp, source_zinfo.CRC, compress_size)
+
+
+def _append_files_in_parallel(zip_file, file_paths, compression_level, max_workers):
+    if compression_level is None:
+        compression_level = zlib.Z_DEFAULT_COMPRESSION
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(file_paths))) as executor:
+        futures = [executor.submit(_deflate_file, file_path, compression_level) for file_path in file_paths]
+        for file_path, future in zip(file_paths, futures):
+            deflated_file_path, crc, compress_size = future.result()
+            try:
+                zinfo = zipfile.ZipInfo.from_file(file_path, os.path.basename(file_path))
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+                with open(deflated_file_path, "rb") as deflated_file:
+                    _write_compressed_member(zip_file, zinfo, deflated_file, crc, compress_size)
+            finally:
+                os.remove(deflated_file_path)
+
+
+def _deflate_file(file_path, compression_level):
+    """
+    Deflate file_path into a raw deflate stream (the format of a ZIP_DEFLATED member's data) next to it.
+    Returns the path of the deflated file, the CRC-32 of the original data, and the compressed size.
+    """
+    compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    crc = 0
+    deflated_file_path = f"{file_path}.deflated"
+    with open(file_path, "rb") as source, open(deflated_file_path, "wb") as dest:
+        for chunk in iter(lambda: source.read(DEFLATE_BUFFER_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+            dest.write(compressor.compress(chunk))
+        dest.write(compressor.flush())
+        compress_size = dest.tell()
+    return deflated_file_path, crc, compress_size
+
+
+def _write_compressed_member(zip_file, zinfo, compressed_data, crc, compress_size):
+    """
+    Add a member to zip_file whose data is read, already compressed, from the compressed_data file object.
+    zinfo must have its name, compress_type, and (uncompressed) file_size set.
+
+    zipfile has no public API for writing pre-compressed data, so this does the same bookkeeping ZipFile does when a
+    member opened with ZipFile.open(mode="w") is written and closed: local header and data go after the last member,
+    then the member is registered so the central directory includes it when the archive is closed.  That relies on
+    ZipFile internals, which is why callers only get here when copy_compressed is turned on.
+    """
+    zinfo.CRC = crc
+    zinfo.compress_size = compress_size
+
+    with zip_file._lock:
+        zip_file._writecheck(zinfo)
+        if zip_file._seekable:
+            zip_file.fp.seek(zip_file.start_dir)
+        zinfo.header_offset = zip_file.fp.tell()
+        zip_file._didModify = True
+        zip_file.fp.write(zinfo.FileHeader())
+        remaining = compress_size
+        while remaining:
+            chunk = compressed_data.read(min(remaining, DEFLATE_BUFFER_SIZE))
+            if not chunk:
+                raise EOFError(f"Compressed data for {zinfo.filename} ended {remaining:,} bytes early")
+            zip_file.fp.write(chunk)
+            remaining -= len(chunk)
+        zip_file.start_dir = zip_file.fp.tell()
+        zip_file.filelist.append(zinfo)
+        zip_file.NameToInfo[zinfo.filename] = zinfo
@@ -1,7 +1,12 @@
-import itertools
+import contextvars
 import logging
+import os
+import shutil
+import tempfile
 from abc import ABCMeta, abstractmethod
-from typing import Union
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Union
 
 from django.conf import settings
 from django.db.models import QuerySet
@@ -13,6 +18,31 @@ from usaspending_api.search.models import AwardSearchView, UniversalTransactionV
 
 logger = logging.getLogger(__name__)
 
+# The table of IDs a download query is joined against and the file holding those IDs, one per line
+DownloadIdsTable = namedtuple("DownloadIdsTable", ["table_name", "ids_file_path"])
+
+
+def get_download_ids_table(queryset: QuerySet) -> Optional[DownloadIdsTable]:
+    """
+    Returns the DownloadIdsTable that a queryset built by an _ElasticsearchDownload (or any queryset derived from
+    one) is joined against, or None for other querysets.
+    """
+    return getattr(queryset.query, "download_ids_table", None)
+
+
+def write_download_ids_table_sql(download_ids_table: DownloadIdsTable, sql_file) -> None:
+    """
+    Write to sql_file the psql commands that create and fill the temporary table of a DownloadIdsTable.  The IDs are
+    inlined as COPY data so the table is loaded in the same psql session that runs the download query.
+    """
+    table_name = download_ids_table.table_name
+    sql_file.write(f"CREATE TEMPORARY TABLE {table_name} (id INTEGER);\n")
+    sql_file.write(f"COPY {table_name} (id) FROM STDIN;\n")
+    with open(download_ids_table.ids_file_path) as ids_file:
+        shutil.copyfileobj(ids_file, sql_file)
+    sql_file.write("\\.\n")
+    sql_file.write(f"ANALYZE {table_name};\n")
+
 
 class _ElasticsearchDownload(metaclass=ABCMeta):
     _source_field = None
@@ -24,6 +54,9 @@ class _ElasticsearchDownload(metaclass=ABCMeta):
         """
         Takes an AwardSearch or TransactionSearch object (that specifies the index, filter, and source) and returns
         a generator that yields list of IDs in chunksize SIZE.
+
+        Up to DOWNLOAD_ES_ID_MAX_CONCURRENCY partitions are retrieved at the same time over the client of the search;
+        lists are yielded as their partitions complete, so not in any particular order.
         """
         max_retries = 10
         total = search.handle_count(retries=max_retries)
@@ -34,40 +67,83 @@ class _ElasticsearchDownload(metaclass=ABCMeta):
         req_iterations = (total // size) + 1
         num_iterations = min(max(1, req_iterations), max_iterations)
 
+        max_workers = min(settings.DOWNLOAD_ES_ID_MAX_CONCURRENCY, num_iterations)
+        # Each partition runs in a copy of this context so its queries count toward this download's metrics
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="es_download_ids") as executor:
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    cls._get_download_ids_partition,
+                    search,
+                    iteration,
+                    num_iterations,
+                    size,
+                    max_retries,
+                )
+                for iteration in range(num_iterations)
+            ]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    @classmethod
+    def _get_download_ids_partition(
+        cls, search: Union[AwardSearch, TransactionSearch], partition: int, num_partitions: int, size: int, retries: int
+    ) -> List[int]:
         # Setting the shard_size below works in this case because we are aggregating on a unique field. Otherwise, this
         # would not work due to the number of records. Other places this is set are in the different spending_by
         # endpoints which are either routed or contain less than 10k unique values, both allowing for the shard
         # size to be manually set to 10k.
-        for iteration in range(num_iterations):
-            aggregation = A(
-                "terms",
-                field=cls._source_field,
-                include={"partition": iteration, "num_partitions": num_iterations},
-                size=size,
-                shard_size=size,
-            )
-            search.aggs.bucket("results", aggregation)
-            response = search.handle_execute(retries=max_retries).to_dict()
-
-            if response is None:
-                raise Exception("Breaking generator, unable to reach cluster")
-            results = []
-            for bucket in response["aggregations"]["results"]["buckets"]:
-                results.append(bucket["key"])
-
-            yield results
+        aggregation = A(
+            "terms",
+            field=cls._source_field,
+            include={"partition": partition, "num_partitions": num_partitions},
+            size=size,
+            shard_size=size,
+        )
+        # Only the aggregation is needed, not any hits
+        partition_search = search.extra(size=0)
+        partition_search.aggs.bucket("results", aggregation)
+        response = partition_search.handle_execute(retries=retries)
+
+        if response is None:
+            raise Exception("Breaking generator, unable to reach cluster")
+        return [bucket["key"] for bucket in response.to_dict()["aggregations"]["results"]["buckets"]]
 
     @classmethod
-    def _get_download_ids(cls, filters: dict, size: int = 10000) -> QuerySet:
+    def _get_download_ids(cls, filters: dict, size: int = 10000) -> DownloadIdsTable:
         """
-        Takes a dictionary of the different download filters and returns a flattened list of ids.
+        Takes a dictionary of the different download filters and writes the matching ids to a file as they are
+        retrieved.  Returns the DownloadIdsTable to load them into.
         """
         filter_query = cls._filter_query_func(filters)
         search = cls._search_type().filter(filter_query).source([cls._source_field])
-        ids = cls._get_download_ids_generator(search, size)
-        flat_ids = list(itertools.chain.from_iterable(ids))
-        logger.info(f"Found {len(flat_ids)} {cls._source_field} based on filters")
-        return flat_ids
+        ids_file, ids_file_path = tempfile.mkstemp(prefix="es_download_ids_")
+        id_count = 0
+        try:
+            with os.fdopen(ids_file, "w") as f:
+                for ids in cls._get_download_ids_generator(search, size):
+                    f.writelines(f"{download_id}\n" for download_id in ids)
+                    id_count += len(ids)
+        except Exception:
+            os.remove(ids_file_path)
+            raise
+        logger.info(f"Found {id_count} {cls._source_field} based on filters")
+        return DownloadIdsTable(f"temp_download_{cls._source_field}s", ids_file_path)
+
+    @classmethod
+    def _join_download_ids(cls, queryset: QuerySet, id_column: str, filters: dict) -> QuerySet:
+        """
+        Limit queryset to the rows whose id_column matches the filters in Elasticsearch.  The returned queryset
+        joins against a temporary table; see get_download_ids_table.
+        """
+        download_ids_table = cls._get_download_ids(filters)
+        queryset = queryset.extra(where=[f"{id_column} IN (SELECT id FROM {download_ids_table.table_name})"])
+        queryset.query.download_ids_table = download_ids_table
+        return queryset
 
     @classmethod
     @abstractmethod
@@ -83,9 +159,7 @@ class AwardsElasticsearchDownload(_ElasticsearchDownload):
     @classmethod
     def query(cls, filters: dict) -> QuerySet:
         base_queryset = AwardSearchView.objects.all()
-        flat_ids = cls._get_download_ids(filters)
-        queryset = base_queryset.extra(where=[f'"awards"."id" = ANY(SELECT UNNEST(ARRAY{flat_ids}::INTEGER[]))'])
-        return queryset
+        return cls._join_download_ids(base_queryset, '"awards"."id"', filters)
 
 
 class TransactionsElasticsearchDownload(_ElasticsearchDownload):
@@ -96,8 +170,4 @@ class TransactionsElasticsearchDownload(_ElasticsearchDownload):
     @classmethod
     def query(cls, filters: dict) -> QuerySet:
         base_queryset = UniversalTransactionView.objects.all()
-        flat_ids = cls._get_download_ids(filters)
-        queryset = base_queryset.extra(
-            where=[f'"transaction_normalized"."id" = ANY(SELECT UNNEST(ARRAY{flat_ids}::INTEGER[]))']
-        )
-        return queryset
+        return cls._join_download_ids(base_queryset, '"transaction_normalized"."id"', filters)
@@ -0,0 +1,16 @@
+# Generated by Django 2.2.13 on 2020-07-14 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("download", "0003_auto_20180306_1726"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="downloadjob", name="request_hash", field=models.TextField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -26,6 +26,7 @@ class DownloadJob(models.Model):
     update_date = models.DateTimeField(auto_now=True, null=True)
     monthly_download = models.BooleanField(default=False)
     json_request = models.TextField(blank=True, null=True)
+    request_hash = models.TextField(blank=True, null=True, db_index=True)
 
     class Meta:
         managed = True
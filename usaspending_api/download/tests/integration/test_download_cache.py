@@ -0,0 +1,94 @@
+import json
+import pytest
+
+from datetime import datetime, timedelta, timezone
+from model_mommy import mommy
+
+from usaspending_api.broker.helpers.last_load_date import update_last_load_date
+from usaspending_api.broker.lookups import EXTERNAL_DATA_TYPE
+from usaspending_api.common.helpers.dict_helpers import order_nested_object
+from usaspending_api.download.download_utils import create_download_request_hash, get_download_data_watermark
+from usaspending_api.download.lookups import JOB_STATUS, JOB_STATUS_DICT
+from usaspending_api.download.models import DownloadJob
+from usaspending_api.download.v2.base_download_viewset import get_cached_download
+from usaspending_api.submissions.models import SubmissionAttributes
+
+
+def _hash(json_request):
+    return create_download_request_hash(json.dumps(order_nested_object(json_request)))
+
+
+@pytest.fixture
+def cache_test_data(db):
+    for js in JOB_STATUS:
+        mommy.make("download.JobStatus", job_status_id=js.id, name=js.name, description=js.desc)
+    for external_data_type in EXTERNAL_DATA_TYPE:
+        mommy.make(
+            "broker.ExternalDataType",
+            external_data_type_id=external_data_type.id,
+            name=external_data_type.name,
+            description=external_data_type.desc,
+        )
+
+
+def _make_job(request_hash, status, create_date):
+    download_job = mommy.make(
+        "download.DownloadJob",
+        job_status_id=JOB_STATUS_DICT[status],
+        file_name=f"{status}.zip",
+        request_hash=request_hash,
+    )
+    DownloadJob.objects.filter(download_job_id=download_job.download_job_id).update(create_date=create_date)
+    return download_job
+
+
+def test_request_hash_ignores_ordering():
+    first = {"request_type": "award", "filters": {"agencies": ["b", "a"], "keywords": ["x"]}, "limit": 5}
+    second = {"limit": 5, "filters": {"keywords": ["x"], "agencies": ["a", "b"]}, "request_type": "award"}
+
+    assert _hash(first) == _hash(second)
+    assert _hash(first) != _hash({**first, "limit": 6})
+
+
+def test_watermark_uses_latest_award_load(cache_test_data):
+    now = datetime.now(timezone.utc)
+    update_last_load_date("fpds", now - timedelta(days=3))
+    update_last_load_date("es_awards", now - timedelta(days=2))
+    update_last_load_date("exec_comp", now - timedelta(days=1))
+
+    assert get_download_data_watermark("award") == now - timedelta(days=2)
+
+
+@pytest.mark.parametrize("request_type", ["award", "idv", "contract", "assistance"])
+def test_watermark_includes_submission_updates(cache_test_data, request_type):
+    now = datetime.now(timezone.utc)
+    update_last_load_date("fpds", now - timedelta(days=3))
+    submission = mommy.make("submissions.SubmissionAttributes")
+    SubmissionAttributes.objects.filter(pk=submission.pk).update(update_date=now - timedelta(days=4))
+    assert get_download_data_watermark(request_type) == now - timedelta(days=3)
+
+    SubmissionAttributes.objects.filter(pk=submission.pk).update(update_date=now - timedelta(days=1))
+    assert get_download_data_watermark(request_type) == now - timedelta(days=1)
+
+
+def test_cached_download_reused_until_data_changes(cache_test_data):
+    now = datetime.now(timezone.utc)
+    update_last_load_date("fabs", now - timedelta(days=5))
+    finished = _make_job("abc", "finished", now - timedelta(days=3))
+    _make_job("abc", "failed", now - timedelta(days=1))
+
+    assert get_cached_download("abc", "award")["download_job_id"] == finished.download_job_id
+    assert get_cached_download("xyz", "award") is None
+
+    update_last_load_date("fabs", now - timedelta(days=2))
+    assert get_cached_download("abc", "award") is None
+
+
+def test_cached_download_coalesces_in_flight_jobs(cache_test_data):
+    now = datetime.now(timezone.utc)
+    update_last_load_date("fpds", now - timedelta(days=5))
+    _make_job("abc", "running", now - timedelta(days=1))
+    assert get_cached_download("abc", "award") is None
+
+    running = _make_job("abc", "running", now - timedelta(minutes=5))
+    assert get_cached_download("abc", "award")["download_job_id"] == running.download_job_id
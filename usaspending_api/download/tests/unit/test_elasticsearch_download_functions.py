@@ -0,0 +1,55 @@
+import io
+import itertools
+
+from unittest.mock import MagicMock
+
+from usaspending_api.download.helpers.elasticsearch_download_functions import (
+    AwardsElasticsearchDownload,
+    DownloadIdsTable,
+    write_download_ids_table_sql,
+)
+
+
+def _mock_search(total, ids):
+    def extra(**kwargs):
+        partition_search = MagicMock()
+
+        def handle_execute(retries):
+            include = partition_search.aggs.bucket.call_args[0][1].to_dict()["terms"]["include"]
+            buckets = [{"key": i} for i in ids if i % include["num_partitions"] == include["partition"]]
+            response = MagicMock()
+            response.to_dict.return_value = {"aggregations": {"results": {"buckets": buckets}}}
+            return response
+
+        partition_search.handle_execute.side_effect = handle_execute
+        return partition_search
+
+    search = MagicMock()
+    search.handle_count.return_value = total
+    search.extra.side_effect = extra
+    return search
+
+
+def test_get_download_ids_generator_retrieves_every_partition(settings):
+    settings.DOWNLOAD_ES_ID_MAX_CONCURRENCY = 3
+    ids = list(range(1, 46))
+
+    results = AwardsElasticsearchDownload._get_download_ids_generator(_mock_search(len(ids), ids), size=10)
+
+    assert sorted(itertools.chain.from_iterable(results)) == ids
+
+
+def test_write_download_ids_table_sql(tmp_path):
+    ids_file = tmp_path / "ids"
+    ids_file.write_text("1\n2\n3\n")
+    sql_file = io.StringIO()
+
+    write_download_ids_table_sql(DownloadIdsTable("temp_download_award_ids", str(ids_file)), sql_file)
+
+    assert sql_file.getvalue() == (
+        "CREATE TEMPORARY TABLE temp_download_award_ids (id INTEGER);\n"
+        "COPY temp_download_award_ids (id) FROM STDIN;\n"
+        "1\n2\n3\n"
+        "\\.\n"
+        "ANALYZE temp_download_award_ids;\n"
+    )
@@ -1,7 +1,11 @@
+import pytest
+
 from unittest.mock import MagicMock
 
 from usaspending_api.awards.v2.lookups.lookups import award_type_mapping, contract_type_mapping, idv_type_mapping
+from usaspending_api.common.exceptions import InvalidParameterException
 from usaspending_api.download.filestreaming import download_generation
+from usaspending_api.download.helpers.elasticsearch_download_functions import DownloadIdsTable
 from usaspending_api.download.lookups import VALUE_MAPPINGS
 
 
@@ -127,3 +131,38 @@ def test_idv_treasury_account_funding_csv_sources():
     VALUE_MAPPINGS["idv_federal_account_funding"]["filter_function"] = original
     assert csv_sources[0].file_type == "treasury_account"
     assert csv_sources[0].source_type == "idv_federal_account_funding"
+
+
+def test_download_ids_file_removed_when_sources_fail(monkeypatch, tmp_path):
+    ids_file = tmp_path / "es_download_ids"
+    ids_file.write_text("1\n2\n")
+    queryset = MagicMock()
+    queryset.query.download_ids_table = DownloadIdsTable("temp_download_award_ids", str(ids_file))
+    monkeypatch.setitem(VALUE_MAPPINGS["sub_awards"], "filter_function", MagicMock(return_value=queryset))
+
+    def verify_requested_columns_available(sources, columns):
+        raise InvalidParameterException("Unknown columns: ['foo']")
+
+    monkeypatch.setattr(download_generation, "verify_requested_columns_available", verify_requested_columns_available)
+    with pytest.raises(InvalidParameterException):
+        download_generation.get_download_sources(
+            {"download_types": ["sub_awards"], "filters": {"award_type_codes": list(award_type_mapping.keys())}}
+        )
+    assert not ids_file.exists()
+
+
+def test_partitioning_failure_fails_download(monkeypatch, settings, tmp_path):
+    settings.STREAM_DOWNLOAD_FILES = False
+    download_job = MagicMock()
+    fail_download = MagicMock()
+    monkeypatch.setattr(download_generation, "execute_psql", MagicMock())
+    monkeypatch.setattr(download_generation, "count_rows_in_delimited_file", MagicMock(return_value=10))
+    monkeypatch.setattr(download_generation, "split_data_files", MagicMock(side_effect=OSError("No space left")))
+    monkeypatch.setattr(download_generation, "fail_download", fail_download)
+    monkeypatch.setattr(download_generation, "write_to_log", MagicMock())
+
+    with pytest.raises(OSError):
+        download_generation.generate_data_files("query.sql", str(tmp_path), "Contracts", "csv", download_job)
+    fail_download.assert_called_once()
+    assert fail_download.call_args[0][0] is download_job
+    assert fail_download.call_args[0][2] == "Exception while partitioning text file"
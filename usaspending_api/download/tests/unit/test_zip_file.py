@@ -1,8 +1,9 @@
 import os
+import pytest
 import zipfile
 
 from tempfile import NamedTemporaryFile
-from usaspending_api.download.filestreaming.zip_file import append_files_to_zip_file
+from usaspending_api.download.filestreaming.zip_file import append_files_to_zip_file, append_zip_members_to_zip_file
 
 
 def test_append_files_to_zip_file():
@@ -20,3 +21,48 @@ def test_append_files_to_zip_file():
                         os.path.basename(include_file_1.name),
                         os.path.basename(include_file_2.name),
                     ]
+
+
+@pytest.mark.parametrize("copy_compressed", [False, True])
+def test_append_files_to_zip_file_in_parallel(tmp_path, copy_compressed):
+    zip_file_path = str(tmp_path / "archive.zip")
+    contents = {f"partition_{i}.csv": b"header\n" + f"row,{i}\n".encode() * 5000 for i in range(1, 5)}
+    for file_name, content in contents.items():
+        (tmp_path / file_name).write_bytes(content)
+    (tmp_path / "existing.txt").write_bytes(b"already in the archive")
+    append_files_to_zip_file([str(tmp_path / "existing.txt")], zip_file_path)
+
+    append_files_to_zip_file(
+        [str(tmp_path / file_name) for file_name in contents],
+        zip_file_path,
+        compression_level=9,
+        max_workers=3,
+        copy_compressed=copy_compressed,
+    )
+
+    with zipfile.ZipFile(zip_file_path, "r") as zf:
+        assert zf.testzip() is None
+        assert [z.filename for z in zf.filelist] == ["existing.txt", *contents]
+        assert all(z.compress_type == zipfile.ZIP_DEFLATED for z in zf.filelist)
+        assert {name: zf.read(name) for name in contents} == contents
+    assert sorted(os.listdir(tmp_path)) == sorted(["archive.zip", "existing.txt", *contents])
+
+
+@pytest.mark.parametrize("copy_compressed", [False, True])
+def test_append_zip_members_to_zip_file(tmp_path, copy_compressed):
+    source_zip_file_path = str(tmp_path / "source.zip")
+    zip_file_path = str(tmp_path / "archive.zip")
+    with zipfile.ZipFile(source_zip_file_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("data_1.csv", b"header\n" + b"row\n" * 1000)
+        with zf.open("data_2.csv", "w", force_zip64=True) as member:
+            member.write(b"header\nlast row\n")
+    with zipfile.ZipFile(zip_file_path, "w") as zf:
+        zf.writestr("existing.txt", b"already in the archive")
+
+    append_zip_members_to_zip_file(source_zip_file_path, zip_file_path, copy_compressed=copy_compressed)
+
+    with zipfile.ZipFile(zip_file_path, "r") as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["existing.txt", "data_1.csv", "data_2.csv"]
+        assert zf.read("data_1.csv") == b"header\n" + b"row\n" * 1000
+        assert zf.read("data_2.csv") == b"header\nlast row\n"
@@ -1,9 +1,11 @@
 import json
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from rest_framework.exceptions import NotFound
 from rest_framework.request import Request
 from rest_framework.response import Response
@@ -12,7 +14,13 @@ from rest_framework.views import APIView
 from usaspending_api.common.api_versioning import api_transformations, API_TRANSFORM_FUNCTIONS
 from usaspending_api.common.helpers.dict_helpers import order_nested_object
 from usaspending_api.common.sqs.sqs_handler import get_sqs_queue
-from usaspending_api.download.download_utils import create_unique_filename, log_new_download_job
+from usaspending_api.download.download_utils import (
+    create_download_request_hash,
+    create_unique_filename,
+    get_download_data_watermark,
+    lock_download_request_hash,
+    log_new_download_job,
+)
 from usaspending_api.download.filestreaming import download_generation
 from usaspending_api.download.filestreaming.s3_handler import S3Handler
 from usaspending_api.download.helpers import write_to_download_log as write_to_log
@@ -54,26 +62,28 @@ class BaseDownloadViewSet(APIView):
         json_request["request_type"] = request_type
         ordered_json_request = json.dumps(order_nested_object(json_request))
 
-        # Check if the same request has been called today
-        # TODO!!! Use external_data_load_date to determine data freshness
-        updated_date_timestamp = datetime.strftime(datetime.now(timezone.utc), "%Y-%m-%d")
-        cached_download = (
-            DownloadJob.objects.filter(json_request=ordered_json_request, update_date__gte=updated_date_timestamp)
-            .exclude(job_status_id=JOB_STATUS_DICT["failed"])
-            .values("download_job_id", "file_name")
-            .first()
-        )
+        request_hash = create_download_request_hash(ordered_json_request)
 
-        if cached_download and not settings.IS_LOCAL:
-            # By returning the cached files, there should be no duplicates on a daily basis
-            write_to_log(message=f"Generating file from cached download job ID: {cached_download['download_job_id']}")
-            cached_filename = cached_download["file_name"]
-            return self.get_download_response(file_name=cached_filename)
+        with transaction.atomic():
+            # Identical requests wait here for each other so that only the first creates a download job
+            lock_download_request_hash(request_hash)
+            cached_download = get_cached_download(request_hash, request_type)
 
-        final_output_zip_name = create_unique_filename(json_request, origination=origination)
-        download_job = DownloadJob.objects.create(
-            job_status_id=JOB_STATUS_DICT["ready"], file_name=final_output_zip_name, json_request=ordered_json_request
-        )
+            if cached_download and not settings.IS_LOCAL:
+                # Return the finished or in-flight job for the same request until the underlying data changes
+                write_to_log(
+                    message=f"Generating file from cached download job ID: {cached_download['download_job_id']}"
+                )
+                cached_filename = cached_download["file_name"]
+                return self.get_download_response(file_name=cached_filename)
+
+            final_output_zip_name = create_unique_filename(json_request, origination=origination)
+            download_job = DownloadJob.objects.create(
+                job_status_id=JOB_STATUS_DICT["ready"],
+                file_name=final_output_zip_name,
+                json_request=ordered_json_request,
+                request_hash=request_hash,
+            )
 
         log_new_download_job(request, download_job)
         self.process_request(download_job)
@@ -141,6 +151,25 @@ def get_file_path(file_name: str) -> str:
     return file_path
 
 
+def get_cached_download(request_hash: str, request_type: str) -> Optional[dict]:
+    """
+    Most recent download job for the request with request_hash that was created after the data it covers last
+    changed and has not failed.  Jobs that are still ready or running are included so that identical requests share
+    them, unless they have been going for longer than a download is allowed to run (the worker likely died).
+    """
+    in_flight_cutoff = datetime.now(timezone.utc) - timedelta(seconds=download_generation.MAX_VISIBILITY_TIMEOUT)
+    return (
+        DownloadJob.objects.filter(
+            request_hash=request_hash, create_date__gte=get_download_data_watermark(request_type)
+        )
+        .exclude(job_status_id=JOB_STATUS_DICT["failed"])
+        .filter(Q(job_status_id=JOB_STATUS_DICT["finished"]) | Q(create_date__gte=in_flight_cutoff))
+        .order_by("-create_date")
+        .values("download_job_id", "file_name")
+        .first()
+    )
+
+
 def get_download_job(file_name: str) -> DownloadJob:
     download_job = DownloadJob.objects.filter(file_name=file_name).first()
     if not download_job:
@@ -1,6 +1,39 @@
-from typing import Optional
+import logging
 
-from django.db import connection
+from typing import Iterable, Optional
+
+from django.db import connection, transaction
+
+logger = logging.getLogger("script")
+
+# Most awards recomputed or queued per statement.  Batches of neighboring award ids keep each recompute to an index
+# range of transaction_normalized.award_id and each transaction short.
+AWARD_UPDATE_BATCH_SIZE = 10000
+
+queue_award_updates_sql_string = """
+INSERT INTO award_update_queue (award_id, queued_at)
+SELECT award_id, now() FROM unnest(%s::BIGINT[]) AS award_id
+ON CONFLICT (award_id) DO NOTHING
+"""
+
+# Removes a batch of queued awards which no other process is recomputing, returning their ids.  The removal is only
+# committed along with their recompute.
+dequeue_award_updates_sql_string = """
+DELETE FROM award_update_queue
+WHERE award_id IN (
+  SELECT award_id FROM award_update_queue ORDER BY award_id LIMIT %s FOR UPDATE SKIP LOCKED
+)
+RETURNING award_id
+"""
+
+# Removes the listed awards from the queue, waiting for (rather than skipping) any which another process has dequeued.
+# The rows are locked in award id order so that two callers removing overlapping awards can't deadlock.
+dequeue_listed_award_updates_sql_string = """
+DELETE FROM award_update_queue
+WHERE award_id IN (
+  SELECT award_id FROM award_update_queue WHERE award_id = ANY(%s::BIGINT[]) ORDER BY award_id FOR UPDATE
+)
+"""
 
 general_award_update_sql_string = """
 WITH
@@ -371,3 +404,49 @@ def update_award_subawards(award_tuple: Optional[tuple] = None) -> int:
         predicate = ""
 
     return execute_database_statement(subaward_award_update_sql_string.format(predicate=predicate), values)
+
+
+def queue_award_updates(award_ids: Iterable[int]) -> None:
+    """Queue awards to be recomputed from their transactions by update_queued_awards"""
+    award_ids = sorted(set(award_ids) - {None})
+    with connection.cursor() as cursor:
+        for start in range(0, len(award_ids), AWARD_UPDATE_BATCH_SIZE):
+            cursor.execute(queue_award_updates_sql_string, [award_ids[start : start + AWARD_UPDATE_BATCH_SIZE]])
+
+
+def update_queued_awards(award_ids: Optional[Iterable[int]] = None, batch_size: int = AWARD_UPDATE_BATCH_SIZE) -> int:
+    """
+    Recompute queued awards from their transactions, batch_size awards (in award id order) per transaction.  Only
+    awards whose rolled up values changed are updated (and get a new update_date), so the work scales with the number
+    of queued awards rather than the size of transaction_normalized.  Returns the number of awards updated.
+
+    Loaders pass the award_ids they queued: just those awards are recomputed and removed from the queue, even if
+    another process is already recomputing some of them, so they reflect the caller's transactions when this returns.
+    Without award_ids the whole queue is drained (as the update_queued_awards command does), skipping awards another
+    process is recomputing; awards left queued by a failed load are picked up this way.
+    """
+    remaining_award_ids = None if award_ids is None else sorted(set(award_ids) - {None})
+    queued_count = 0
+    updated_count = 0
+    while True:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                if remaining_award_ids is None:
+                    cursor.execute(dequeue_award_updates_sql_string, [batch_size])
+                    award_tuple = tuple(sorted(row[0] for row in cursor.fetchall()))
+                else:
+                    award_tuple = tuple(remaining_award_ids[:batch_size])
+                    remaining_award_ids = remaining_award_ids[batch_size:]
+                    cursor.execute(dequeue_listed_award_updates_sql_string, [list(award_tuple)])
+            if not award_tuple:
+                break
+            batch_updated_count = update_awards(award_tuple)
+            update_procurement_awards(award_tuple)
+            update_assistance_awards(award_tuple)
+        queued_count += len(award_tuple)
+        updated_count += batch_updated_count
+        logger.info(
+            f"Recomputed {queued_count:,} queued awards, {updated_count:,} of which changed "
+            f"(awards {award_tuple[0]} to {award_tuple[-1]})"
+        )
+    return updated_count
@@ -1,5 +1,6 @@
 from typing import Optional
 
+import csv
 import json
 import os
 import pandas as pd
@@ -7,15 +8,19 @@ import psycopg2
 import subprocess
 
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
 from django.conf import settings
-from django.core.management import call_command
 from elasticsearch import helpers, TransportError
-from time import perf_counter, sleep
+from math import ceil
+from multiprocessing import Lock, Value
+from time import perf_counter
 
 from usaspending_api.awards.v2.lookups.elasticsearch_lookups import INDEX_ALIASES_TO_AWARD_TYPES
 from usaspending_api.common.csv_helpers import count_rows_in_delimited_file
-from usaspending_api.common.helpers.s3_helpers import retrieve_s3_bucket_object_list, access_s3_object
+from usaspending_api.common.elasticsearch.client import instantiate_elasticsearch_client
+from usaspending_api.common.helpers.s3_helpers import retrieve_s3_bucket_object_list, stream_s3_object_lines
 from usaspending_api.common.helpers.sql_helpers import get_database_dsn_string
 
 # ==============================================================================
@@ -196,12 +201,26 @@ AWARD_VIEW_COLUMNS = [
 
 UPDATE_DATE_SQL = " AND update_date >= '{}'"
 
+ID_RANGE_SQL = " AND {id_column} BETWEEN {min_id} AND {max_id}"
+
+ID_RANGE_STATS_SQL = """
+SELECT COUNT(*) AS count, MIN({id_column}) AS min_id, MAX({id_column}) AS max_id
+FROM {view}
+WHERE {type_fy}fiscal_year={fy}{update_date}
+"""
+
 COUNT_SQL = """
 SELECT COUNT(*) AS count
 FROM {view}
 WHERE {type_fy}fiscal_year={fy}{update_date}
 """
 
+SELECT_SQL = """
+SELECT *
+FROM {view}
+WHERE {type_fy}fiscal_year={fy}{update_date}
+"""
+
 COPY_SQL = """"COPY (
     SELECT *
     FROM {view}
@@ -241,6 +260,33 @@ AWARD_DESC_CATEGORIES = {
 UNIVERSAL_TRANSACTION_ID_NAME = "generated_unique_transaction_id"
 UNIVERSAL_AWARD_ID_NAME = "generated_unique_award_id"
 
+# Number of deleted-records CSV files downloaded from S3 at the same time
+DELETED_IDS_FETCH_WORKERS = 8
+
+# Columns of the deleted-records CSV files, and the prefix that makes their values universal transaction ids
+DELETED_ID_COLUMNS = {"detached_award_proc_unique": "CONT_TX_", "afa_generated_unique": "ASST_TX_"}
+
+# Postgres array columns, which Elasticsearch needs as lists
+ARRAY_COLUMNS = ("business_categories", "tas_paths", "tas_components", "disaster_emergency_fund_codes")
+# Postgres JSON array columns, which are flattened into lists of JSON strings
+JSON_ARRAY_COLUMNS = ("federal_accounts",)
+
+# When streaming from the database, scalar values are passed to Elasticsearch as the text Postgres formats them as, the
+# same as they are in the CSV files
+POSTGRES_TEXT_TYPE = psycopg2.extensions.new_type(
+    psycopg2.extensions.BOOLEAN.values
+    + psycopg2.extensions.DECIMAL.values
+    + psycopg2.extensions.FLOAT.values
+    + psycopg2.extensions.INTEGER.values
+    + psycopg2.extensions.LONGINTEGER.values
+    + psycopg2.extensions.PYDATE.values
+    + psycopg2.extensions.PYDATETIME.values
+    + psycopg2.extensions.PYDATETIMETZ.values
+    + psycopg2.extensions.PYTIME.values,
+    "POSTGRES_TEXT",
+    lambda value, cursor: value,
+)
+
 
 class DataJob:
     def __init__(self, *args):
@@ -248,9 +294,55 @@ class DataJob:
         self.index = args[1]
         self.fy = args[2]
         self.csv = args[3]
+        # Optional (min, max) of the ids to load from the fiscal year, inclusive.  The whole year is loaded without it
+        self.id_range = args[4] if len(args) > 4 else None
         self.count = None
 
 
+class StageProgress:
+    """
+    Counters shared by the worker processes of one stage of the load (e.g. the CSV downloads), used to report how far
+    along the stage is and how long its workers spent blocked on the other stage.
+    """
+
+    def __init__(self, name, workers, blocked_on):
+        self.name = name
+        self.workers = workers
+        self.blocked_on = blocked_on
+        self._lock = Lock()
+        self._jobs = Value("i", 0, lock=False)
+        self._rows = Value("q", 0, lock=False)
+        self._busy_seconds = Value("d", 0.0, lock=False)
+        self._blocked_seconds = Value("d", 0.0, lock=False)
+        self._finished_workers = Value("i", 0, lock=False)
+
+    def add(self, jobs=0, rows=0, busy_seconds=0.0, blocked_seconds=0.0):
+        with self._lock:
+            self._jobs.value += jobs
+            self._rows.value += rows or 0
+            self._busy_seconds.value += busy_seconds
+            self._blocked_seconds.value += blocked_seconds
+
+    def finish_worker(self) -> bool:
+        """Record that a worker of this stage is done.  Returns True for the last one to finish"""
+        with self._lock:
+            self._finished_workers.value += 1
+            return self._finished_workers.value == self.workers
+
+    def summary(self, total_jobs) -> str:
+        with self._lock:
+            return "{}: {:,}/{:,} jobs, {:,} rows | {} worker(s) busy {:.0f}s, blocked {:.0f}s {}".format(
+                self.name,
+                self._jobs.value,
+                total_jobs,
+                self._rows.value,
+                self.workers,
+                self._busy_seconds.value,
+                self._blocked_seconds.value,
+                self.blocked_on,
+            )
+
+
 # ==============================================================================
 # Helper functions for several Django management commands focused on ETL into a Elasticsearch cluster
 # ==============================================================================
@@ -273,8 +365,16 @@ def convert_postgres_json_array_as_string_to_list(json_array_as_string: str) ->
     """
     if json_array_as_string is None or len(json_array_as_string) == 0:
         return None
+    return convert_postgres_json_array_to_list(json.loads(json_array_as_string))
+
+
+def convert_postgres_json_array_to_list(json_array: Optional[list]) -> Optional[list]:
+    """
+        Same as convert_postgres_json_array_as_string_to_list for a JSON array already parsed by psycopg2.
+    """
+    if json_array is None:
+        return None
     result = []
-    json_array = json.loads(json_array_as_string)
     for j in json_array:
         for key, value in j.items():
             j[key] = "" if value is None else str(j[key])
@@ -299,19 +399,56 @@ def process_guarddog(process_list):
     return False
 
 
+def get_etl_view_details(load_type):
+    """Returns the ETL view name, the record type it holds, and the prefix of its fiscal year column"""
+    if load_type == "awards":
+        return settings.ES_AWARDS_ETL_VIEW_NAME, "award", ""
+    return settings.ES_TRANSACTIONS_ETL_VIEW_NAME, "transaction", "transaction_"
+
+
+def split_fiscal_year_into_id_ranges(config, fiscal_year):
+    """
+    Split the records of a fiscal year into ranges of ids holding about config["partition_size"] records each, so
+    that a single year can be downloaded and indexed by several workers at once.  Returns an empty list when there is
+    nothing to load for the year.
+    """
+    view_name, view_type, type_fy = get_etl_view_details(config["load_type"])
+    sql = ID_RANGE_STATS_SQL.format(
+        id_column="{}_id".format(view_type),
+        view=view_name,
+        type_fy=type_fy,
+        fy=fiscal_year,
+        update_date=UPDATE_DATE_SQL.format(config["starting_date"].strftime("%Y-%m-%d")),
+    )
+    stats = execute_sql_statement(sql, True, config["verbose"])[0]
+    if not stats["count"]:
+        return []
+
+    # Ids aren't contiguous, so this assumes the records of the year are spread evenly between its first and last id
+    partitions = ceil(stats["count"] / config["partition_size"])
+    width = ceil((stats["max_id"] - stats["min_id"] + 1) / partitions)
+    return [
+        (min_id, min(min_id + width - 1, stats["max_id"]))
+        for min_id in range(stats["min_id"], stats["max_id"] + 1, width)
+    ]
+
+
+def get_update_date_sql(config, view_type):
+    """The conditions on the update date, and id range if there is one, of the records to load"""
+    update_date_str = UPDATE_DATE_SQL.format(config["starting_date"].strftime("%Y-%m-%d"))
+    if config.get("id_range"):
+        update_date_str += ID_RANGE_SQL.format(
+            id_column="{}_id".format(view_type), min_id=config["id_range"][0], max_id=config["id_range"][1]
+        )
+    return update_date_str
+
+
 def configure_sql_strings(config, filename, deleted_ids):
     """
     Populates the formatted strings defined globally in this file to create the desired SQL
     """
-    update_date_str = UPDATE_DATE_SQL.format(config["starting_date"].strftime("%Y-%m-%d"))
-    if config["load_type"] == "awards":
-        view_name = settings.ES_AWARDS_ETL_VIEW_NAME
-        view_type = "award"
-        type_fy = ""
-    else:
-        view_name = settings.ES_TRANSACTIONS_ETL_VIEW_NAME
-        view_type = "transaction"
-        type_fy = "transaction_"
+    view_name, view_type, type_fy = get_etl_view_details(config["load_type"])
+    update_date_str = get_update_date_sql(config, view_type)
 
     copy_sql = COPY_SQL.format(
         fy=config["fiscal_year"], update_date=update_date_str, filename=filename, view=view_name, type_fy=type_fy
@@ -327,6 +464,14 @@ def configure_sql_strings(config, filename, deleted_ids):
     return copy_sql, id_sql, count_sql
 
 
+def configure_select_sql(config):
+    """The records of configure_sql_strings' COPY statement, for reading from a cursor instead of a CSV file"""
+    view_name, view_type, type_fy = get_etl_view_details(config["load_type"])
+    return SELECT_SQL.format(
+        view=view_name, type_fy=type_fy, fy=config["fiscal_year"], update_date=get_update_date_sql(config, view_type)
+    )
+
+
 def execute_sql_statement(cmd, results=False, verbose=False):
     """ Simple function to execute SQL using a psycopg2 connection"""
     rows = None
@@ -348,45 +493,43 @@ def db_rows_to_dict(cursor):
     return [dict(zip(columns, row)) for row in cursor.fetchall()]
 
 
-def download_db_records(fetch_jobs, done_jobs, config):
-    # There has been a recurring issue with .empty() returning true when the queue actually
-    # contains multiple jobs. Wait a few seconds before starting to see if it helps
-    sleep(5)
-    printf({"msg": "Queue has items: {}".format(not fetch_jobs.empty()), "f": "Download"})
-    while not fetch_jobs.empty():
-        if done_jobs.full():
-            printf({"msg": "Paused downloading new CSVs so ES indexing can catch up", "f": "Download"})
-            sleep(60)
-        else:
-            start = perf_counter()
-            job = fetch_jobs.get_nowait()
-            printf({"msg": 'Preparing to download "{}"'.format(job.csv), "job": job.name, "f": "Download"})
-
-            sql_config = {
-                "starting_date": config["starting_date"],
-                "fiscal_year": job.fy,
-                "process_deletes": config["process_deletes"],
-                "load_type": config["load_type"],
-            }
-            copy_sql, _, count_sql = configure_sql_strings(sql_config, job.csv, [])
+def download_db_records(fetch_jobs, done_jobs, config, progress):
+    while True:
+        job = fetch_jobs.get()
+        if job.name is None:
+            break
+
+        start = perf_counter()
+        printf({"msg": 'Preparing to download "{}"'.format(job.csv), "job": job.name, "f": "Download"})
+
+        sql_config = {
+            "starting_date": config["starting_date"],
+            "fiscal_year": job.fy,
+            "id_range": job.id_range,
+            "process_deletes": config["process_deletes"],
+            "load_type": config["load_type"],
+        }
+        copy_sql, _, count_sql = configure_sql_strings(sql_config, job.csv, [])
 
-            if os.path.isfile(job.csv):
-                os.remove(job.csv)
+        if os.path.isfile(job.csv):
+            os.remove(job.csv)
 
-            job.count = download_csv(count_sql, copy_sql, job.csv, job.name, config["skip_counts"], config["verbose"])
-            done_jobs.put(job)
-            printf(
-                {
-                    "msg": 'CSV "{}" copy took {} seconds'.format(job.csv, perf_counter() - start),
-                    "job": job.name,
-                    "f": "Download",
-                }
-            )
-            sleep(1)
+        job.count = download_csv(count_sql, copy_sql, job.csv, job.name, config["skip_counts"], config["verbose"])
+        download_seconds = perf_counter() - start
+        printf(
+            {"msg": 'CSV "{}" copy took {} seconds'.format(job.csv, download_seconds), "job": job.name, "f": "Download"}
+        )
+
+        # Blocks while the ES ingest queue is full, so downloads pause until ES indexing catches up
+        start = perf_counter()
+        done_jobs.put(job)
+        progress.add(jobs=1, rows=job.count, busy_seconds=download_seconds, blocked_seconds=perf_counter() - start)
 
-    # This "Null Job" is used to notify the other (ES data load) process this is the final job
-    done_jobs.put(DataJob(None, None, None, None))
-    printf({"msg": "PostgreSQL COPY operations complete", "f": "Download"})
+    # These "Null Jobs" are used to notify the other (ES data load) processes there are no more jobs
+    if progress.finish_worker():
+        for _ in range(config["ingest_workers"]):
+            done_jobs.put(DataJob(None, None, None, None))
+        printf({"msg": "PostgreSQL COPY operations complete", "f": "Download"})
     return
 
 
@@ -412,13 +555,8 @@ def download_csv(count_sql, copy_sql, filename, job_id, skip_counts, verbose):
 def csv_chunk_gen(filename, chunksize, job_id, load_type):
     printf({"msg": "Opening {} (batch size = {})".format(filename, chunksize), "job": job_id, "f": "ES Ingest"})
     # Need a specific converter to handle converting strings to correct data types (e.g. string -> array)
-    converters = {
-        "business_categories": convert_postgres_array_as_string_to_list,
-        "tas_paths": convert_postgres_array_as_string_to_list,
-        "tas_components": convert_postgres_array_as_string_to_list,
-        "federal_accounts": convert_postgres_json_array_as_string_to_list,
-        "disaster_emergency_fund_codes": convert_postgres_array_as_string_to_list,
-    }
+    converters = {column: convert_postgres_array_as_string_to_list for column in ARRAY_COLUMNS}
+    converters.update({column: convert_postgres_json_array_as_string_to_list for column in JSON_ARRAY_COLUMNS})
     # Panda's data type guessing causes issues for Elasticsearch. Explicitly cast using dictionary
     dtype = {k: str for k in VIEW_COLUMNS if k not in converters}
     for file_df in pd.read_csv(filename, dtype=dtype, converters=converters, header=0, chunksize=chunksize):
@@ -432,25 +570,122 @@ def csv_chunk_gen(filename, chunksize, job_id, load_type):
         yield file_df.to_dict(orient="records")
 
 
-def es_data_loader(client, fetch_jobs, done_jobs, config):
-    if config["create_new_index"]:
-        # ensure template for index is present and the latest version
-        call_command("es_configure", "--template-only", "--load_type={}".format(config["load_type"]))
+def db_row_to_es_document(columns, row):
+    """
+    Convert a row of an ETL view to the document csv_chunk_gen would have produced for it from the CSV file: arrays
+    as lists (None when empty), JSON arrays as lists of JSON strings, and NULLs and empty strings as None
+    """
+    document = {}
+    for column, value in zip(columns, row):
+        if column in ARRAY_COLUMNS:
+            value = value or None
+        elif column in JSON_ARRAY_COLUMNS:
+            value = convert_postgres_json_array_to_list(value)
+        elif value == "":
+            value = None
+        document[column] = value
+    # See csv_chunk_gen
+    document["routing"] = document[settings.ES_ROUTING_FIELD]
+    return document
+
+
+def db_document_gen(client, cursor, job, config):
+    """
+    Yield the documents of a job from a server-side cursor, fetching config["bulk_chunk_size"] rows at a time.  With
+    --process-deletes, the existing documents of each fetched batch are deleted before it is yielded, as
+    post_to_elasticsearch does for each CSV chunk.
+    """
+    columns = None
     while True:
-        if not done_jobs.empty():
-            job = done_jobs.get_nowait()
-            if job.name is None:
-                break
+        rows = cursor.fetchmany(config["bulk_chunk_size"])
+        if not rows:
+            break
+        columns = columns or [column[0] for column in cursor.description]
+        documents = [db_row_to_es_document(columns, row) for row in rows]
+        if config["process_deletes"]:
+            id_name = UNIVERSAL_AWARD_ID_NAME if config["load_type"] == "awards" else UNIVERSAL_TRANSACTION_ID_NAME
+            id_list = [{"key": document[id_name], "col": id_name} for document in documents]
+            delete_from_es(client, id_list, job.name, config, job.index, refresh=False)
+        yield from documents
+
+
+def stream_to_elasticsearch(client, job, config):
+    """
+    Index the records of a job straight from the ETL view, without writing and re-reading a CSV file.  Memory use
+    is bounded by the cursor fetching config["bulk_chunk_size"] rows at a time and parallel_bulk keeping only a couple
+    of chunks per thread in flight.  Returns the number of documents indexed.
+    """
+    printf({"msg": 'Streaming to ES Index "{}"'.format(job.index), "job": job.name, "f": "ES Ingest"})
+    start = perf_counter()
+    sql_config = {
+        "starting_date": config["starting_date"],
+        "fiscal_year": job.fy,
+        "id_range": job.id_range,
+        "process_deletes": config["process_deletes"],
+        "load_type": config["load_type"],
+    }
+    _, _, count_sql = configure_sql_strings(sql_config, None, [])
+    if not config["skip_counts"]:
+        job.count = execute_sql_statement(count_sql, True, config["verbose"])[0]["count"]
+
+    success, failed = 0, 0
+    with closing(psycopg2.connect(dsn=get_database_dsn_string())) as connection:
+        psycopg2.extensions.register_type(POSTGRES_TEXT_TYPE, connection)
+        # A named cursor is a server-side cursor, so rows are only fetched as they are indexed
+        with connection.cursor(name="es_stream_{}".format(job.name)) as cursor:
+            cursor.execute(configure_select_sql(sql_config))
+            try:
+                for ok, item in helpers.parallel_bulk(
+                    client,
+                    db_document_gen(client, cursor, job, config),
+                    thread_count=config["bulk_threads"],
+                    chunk_size=config["bulk_chunk_size"],
+                    queue_size=config["bulk_threads"],
+                    index=job.index,
+                ):
+                    success = [success, success + 1][ok]
+                    failed = [failed + 1, failed][ok]
+            except Exception as e:
+                print("Fatal error: \n\n{}...\n\n{}".format(str(e)[:5000], "*" * 80))
+                raise SystemExit(1)
+
+    printf({"msg": "Success: {}, Fails: {}".format(success, failed), "job": job.name, "f": "ES Ingest"})
+    if job.count is not None and job.count != success + failed:
+        msg = "Mismatch between streamed and DB rows! Expected: {} | Actual {}"
+        printf({"msg": msg.format(job.count, success + failed), "job": job.name, "f": "ES Ingest"})
+        raise SystemExit(1)
+    printf(
+        {
+            "msg": "Elasticsearch Index streaming took {}s".format(perf_counter() - start),
+            "job": job.name,
+            "f": "ES Ingest",
+        }
+    )
+    return success + failed
+
 
-            printf({"msg": "Starting new job", "job": job.name, "f": "ES Ingest"})
-            post_to_elasticsearch(client, job, config)
+def es_data_loader(done_jobs, config, progress):
+    # Each worker process needs its own connections to the cluster
+    client = instantiate_elasticsearch_client()
+    while True:
+        start = perf_counter()
+        job = done_jobs.get()
+        blocked_seconds = perf_counter() - start
+        if job.name is None:
+            break
+
+        printf({"msg": "Starting new job", "job": job.name, "f": "ES Ingest"})
+        start = perf_counter()
+        if config["stream"]:
+            rows = stream_to_elasticsearch(client, job, config)
+        else:
+            rows = post_to_elasticsearch(client, job, config)
             if os.path.exists(job.csv):
                 os.remove(job.csv)
-        else:
-            printf({"msg": "No Job. Sleeping 45s", "f": "ES Ingest"})
-            sleep(45)
+        progress.add(jobs=1, rows=rows, busy_seconds=perf_counter() - start, blocked_seconds=blocked_seconds)
 
-    printf({"msg": "Completed Elasticsearch data load", "f": "ES Ingest"})
+    if progress.finish_worker():
+        printf({"msg": "Completed Elasticsearch data load", "f": "ES Ingest"})
     return
 
 
@@ -555,6 +790,7 @@ def post_to_elasticsearch(client, job, config, chunksize=250000):
         client.indices.create(index=job.index)
         client.indices.refresh(job.index)
 
+    rows = 0
     csv_generator = csv_chunk_gen(job.csv, chunksize, job.name, config["load_type"])
     for count, chunk in enumerate(csv_generator):
         if len(chunk) == 0:
@@ -564,12 +800,12 @@ def post_to_elasticsearch(client, job, config, chunksize=250000):
         if config["process_deletes"]:
             if config["load_type"] == "awards":
                 id_list = [{"key": c[UNIVERSAL_AWARD_ID_NAME], "col": UNIVERSAL_AWARD_ID_NAME} for c in chunk]
-                delete_from_es(client, id_list, job.name, config, job.index)
+                delete_from_es(client, id_list, job.name, config, job.index, refresh=False)
             else:
                 id_list = [
                     {"key": c[UNIVERSAL_TRANSACTION_ID_NAME], "col": UNIVERSAL_TRANSACTION_ID_NAME} for c in chunk
                 ]
-                delete_from_es(client, id_list, job.name, config, job.index)
+                delete_from_es(client, id_list, job.name, config, job.index, refresh=False)
 
         current_rows = "({}-{})".format(count * chunksize + 1, count * chunksize + len(chunk))
         printf(
@@ -580,6 +816,7 @@ def post_to_elasticsearch(client, job, config, chunksize=250000):
             }
         )
         streaming_post_to_es(client, chunk, job.index, config["load_type"], job.name)
+        rows += len(chunk)
         printf(
             {
                 "msg": "Iteration group #{} took {}s".format(count, perf_counter() - iteration),
@@ -594,12 +831,25 @@ def post_to_elasticsearch(client, job, config, chunksize=250000):
             "f": "ES Ingest",
         }
     )
+    return rows
 
 
 def deleted_transactions(client, config):
-    deleted_ids = gather_deleted_ids(config)
-    id_list = [{"key": deleted_id, "col": UNIVERSAL_TRANSACTION_ID_NAME} for deleted_id in deleted_ids]
-    delete_from_es(client, id_list, None, config, None)
+    """
+    Delete the transactions removed from the DB since the last load.  This can run while new documents are being
+    indexed: a document is only deleted if it was last updated before its transaction was deleted, so a transaction
+    that was deleted and then loaded again keeps its new document whichever happens first.
+    """
+    manifest = load_deleted_ids_manifest(config)
+    deleted_ids = gather_deleted_ids(config, manifest)
+    id_list = [
+        {"key": deleted_id, "col": UNIVERSAL_TRANSACTION_ID_NAME, "timestamp": deleted_dict["timestamp"]}
+        for deleted_id, deleted_dict in deleted_ids.items()
+    ]
+    if delete_from_es(client, id_list, None, config, None):
+        save_deleted_ids_manifest(config, manifest)
+    else:
+        printf({"msg": "Not all deletes succeeded, so they'll be retried by the next load", "f": "ES Delete"})
 
 
 def deleted_awards(client, config):
@@ -607,11 +857,13 @@ def deleted_awards(client, config):
     so we have to find all the awards connected to these transactions,
     if we can't find the awards in the database, then we have to delete them from es
     """
-    deleted_ids = gather_deleted_ids(config)
+    manifest = load_deleted_ids_manifest(config)
+    deleted_ids = gather_deleted_ids(config, manifest)
     id_list = [{"key": deleted_id, "col": UNIVERSAL_TRANSACTION_ID_NAME} for deleted_id in deleted_ids]
     award_ids = get_deleted_award_ids(client, id_list, config, settings.ES_TRANSACTIONS_QUERY_ALIAS_PREFIX + "-*")
     if (len(award_ids)) == 0:
         printf({"msg": "No related awards require deletion. ", "f": "ES Delete", "job": None})
+        save_deleted_ids_manifest(config, manifest)
         return
     deleted_award_ids = check_awards_for_deletes(award_ids)
     if len(deleted_award_ids) != 0:
@@ -619,9 +871,12 @@ def deleted_awards(client, config):
             {"key": deleted_award["generated_unique_award_id"], "col": UNIVERSAL_AWARD_ID_NAME}
             for deleted_award in deleted_award_ids
         ]
-        delete_from_es(client, award_id_list, None, config, None)
+        if not delete_from_es(client, award_id_list, None, config, None):
+            printf({"msg": "Not all deletes succeeded, so they'll be retried by the next load", "f": "ES Delete"})
+            return
     else:
         printf({"msg": "No related awards require deletion. ", "f": "ES Delete", "job": None})
+    save_deleted_ids_manifest(config, manifest)
     return
 
 
@@ -640,10 +895,52 @@ def take_snapshot(client, index, repository):
         raise SystemExit(1)
 
 
-def gather_deleted_ids(config):
+def get_deleted_ids_manifest_path(config):
+    return config["directory"] / "deleted_{}_manifest.json".format(config["load_type"])
+
+
+def load_deleted_ids_manifest(config):
+    """
+    The deleted-records CSV files already processed by previous loads, as a dict of S3 key to ETag, so that they
+    aren't downloaded again
+    """
+    path = get_deleted_ids_manifest_path(config)
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_deleted_ids_manifest(config, manifest):
+    """Only save the manifest once the deletes it records have been made, so a failed load processes them again"""
+    path = get_deleted_ids_manifest_path(config)
+    temp_path = path.with_suffix(".tmp")
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def read_deleted_ids(bucket_name, key):
+    """Read the universal transaction ids out of a deleted-records CSV file as it is downloaded"""
+    reader = csv.reader(stream_s3_object_lines(bucket_name, key))
+    header = next(reader, [])
+    column = next((column for column in DELETED_ID_COLUMNS if column in header), None)
+    if column is None:
+        printf({"msg": f"  [Missing valid col] in {key}"})
+        return []
+
+    position = header.index(column)
+    prefix = DELETED_ID_COLUMNS[column]
+    return [prefix + row[position].upper() for row in reader if len(row) > position and row[position]]
+
+
+def gather_deleted_ids(config, manifest=None):
     """
     Connect to S3 and gather all of the transaction ids stored in CSV files
     generated by the broker when transactions are removed from the DB.
+
+    Files listed in the manifest (see load_deleted_ids_manifest) with an unchanged ETag are skipped.  The manifest
+    is updated in place to the files processed by this and previous loads which are still in the bucket.
     """
 
     if not config["process_deletes"]:
@@ -651,6 +948,8 @@ def gather_deleted_ids(config):
         return
     printf({"msg": "Gathering all deleted transactions from S3"})
     start = perf_counter()
+    if manifest is None:
+        manifest = {}
 
     bucket_objects = retrieve_s3_bucket_object_list(bucket_name=config["s3_bucket"])
     printf({"msg": f"{len(bucket_objects):,} files found in bucket '{config['s3_bucket']}'."})
@@ -663,31 +962,27 @@ def gather_deleted_ids(config):
         for x in bucket_objects
         if (x.key.endswith(".csv") and not x.key.startswith("staging") and x.last_modified >= config["starting_date"])
     ]
+    new_csv_list = [x for x in filtered_csv_list if manifest.get(x.key) != x.e_tag]
 
     if config["verbose"]:
-        printf({"msg": f"Found {len(filtered_csv_list)} csv files"})
+        printf({"msg": f"Found {len(filtered_csv_list)} csv files, {len(new_csv_list)} not processed before"})
 
     deleted_ids = {}
 
-    for obj in filtered_csv_list:
-        object_data = access_s3_object(bucket_name=config["s3_bucket"], obj=obj)
-
-        # Ingests the CSV into a dataframe. pandas thinks some ids are dates, so disable parsing
-        data = pd.read_csv(object_data, dtype=str)
-
-        if "detached_award_proc_unique" in data:
-            new_ids = ["CONT_TX_" + x.upper() for x in data["detached_award_proc_unique"].values]
-        elif "afa_generated_unique" in data:
-            new_ids = ["ASST_TX_" + x.upper() for x in data["afa_generated_unique"].values]
-        else:
-            printf({"msg": f"  [Missing valid col] in {obj.key}"})
-
-        for uid in new_ids:
-            if uid in deleted_ids:
-                if deleted_ids[uid]["timestamp"] < obj.last_modified:
-                    deleted_ids[uid]["timestamp"] = obj.last_modified
-            else:
-                deleted_ids[uid] = {"timestamp": obj.last_modified}
+    with ThreadPoolExecutor(max_workers=DELETED_IDS_FETCH_WORKERS) as executor:
+        new_ids_per_object = executor.map(lambda obj: read_deleted_ids(config["s3_bucket"], obj.key), new_csv_list)
+        for obj, new_ids in zip(new_csv_list, new_ids_per_object):
+            for uid in new_ids:
+                if uid in deleted_ids:
+                    if deleted_ids[uid]["timestamp"] < obj.last_modified:
+                        deleted_ids[uid]["timestamp"] = obj.last_modified
+                else:
+                    deleted_ids[uid] = {"timestamp": obj.last_modified}
+
+    manifest_keys = {x.key for x in filtered_csv_list}
+    for key in [key for key in manifest if key not in manifest_keys]:
+        del manifest[key]
+    manifest.update({x.key: x.e_tag for x in new_csv_list})
 
     if config["verbose"]:
         for uid, deleted_dict in deleted_ids.items():
@@ -702,8 +997,37 @@ def filter_query(column, values, query_type="match_phrase"):
     return {"query": {"bool": {"should": [queries]}}}
 
 
-def delete_query(response):
-    return {"query": {"ids": {"values": [i["_id"] for i in response["hits"]["hits"]]}}}
+def delete_actions(client, index, column, values, size, deleted_before=None):
+    """
+    Bulk delete actions for the documents whose column is one of values.  Documents are routed, so each action
+    carries the routing of the document it deletes along with its _id.
+
+    deleted_before optionally maps values to when they were deleted; documents updated since then are kept.
+    """
+    body = filter_query(column, values)
+    # A phrase can also match longer ids, so only delete documents whose id is one of values
+    body["_source"] = [column]
+    if deleted_before:
+        body["docvalue_fields"] = [{"field": "update_date", "format": "epoch_millis"}]
+    response = client.search(index=index, body=json.dumps(body), size=size)
+    values = {str(value) for value in values}
+    actions = []
+    for hit in response["hits"]["hits"]:
+        value = str(hit["_source"].get(column))
+        if value in values and not updated_since_deleted(hit, (deleted_before or {}).get(value)):
+            action = {"_op_type": "delete", "_index": hit["_index"], "_id": hit["_id"]}
+            if hit.get("_routing") is not None:
+                action["routing"] = hit["_routing"]
+            actions.append(action)
+    return actions
+
+
+def updated_since_deleted(hit, deleted_at):
+    """Whether the document of a search hit was last updated after deleted_at"""
+    update_date = hit.get("fields", {}).get("update_date")
+    if deleted_at is None or not update_date:
+        return False
+    return int(float(update_date[0])) >= deleted_at.timestamp() * 1000
 
 
 def chunks(l, n):
@@ -712,7 +1036,7 @@ def chunks(l, n):
         yield l[i : i + n]
 
 
-def delete_from_es(client, id_list, job_id, config, index=None):
+def delete_from_es(client, id_list, job_id, config, index=None, refresh=True):
     """
     id_list = [{key:'key1',col:'tranaction_id'},
                {key:'key2',col:'generated_unique_transaction_id'}],
@@ -721,6 +1045,14 @@ def delete_from_es(client, id_list, job_id, config, index=None):
     id_list = [{key:'key1',col:'award_id'},
                {key:'key2',col:'generated_unique_award_id'}],
                ...]
+
+    Items can also have a "timestamp" of when the record was deleted, in which case documents updated since then are
+    kept (see delete_actions).
+
+    Documents are deleted with bulk delete actions by _id, and the index is refreshed once at the end.  Callers that
+    don't need the deletes to be visible right away (e.g. before indexing new versions of the documents) can skip
+    the refresh and leave it to the index's refresh interval.  Returns whether every delete succeeded:  False if a
+    chunk's search or bulk request failed or any bulk delete action errored.
     """
     start = perf_counter()
 
@@ -728,34 +1060,36 @@ def delete_from_es(client, id_list, job_id, config, index=None):
 
     if index is None:
         index = "{}-*".format(config["root_index"])
-    start_ = client.count(index=index)["count"]
-    printf({"msg": "Starting amount of indices ----- {}".format(start_), "f": "ES Delete", "job": job_id})
     col_to_items_dict = defaultdict(list)
+    deleted_before = defaultdict(dict)
     for l in id_list:
         col_to_items_dict[l["col"]].append(l["key"])
+        if l.get("timestamp"):
+            deleted_before[l["col"]][str(l["key"])] = l["timestamp"]
 
+    deleted, failed, failed_chunks = 0, 0, 0
     for column, values in col_to_items_dict.items():
         printf({"msg": 'Deleting {} of "{}"'.format(len(values), column), "f": "ES Delete", "job": job_id})
         values_generator = chunks(values, 1000)
         for v in values_generator:
-            # IMPORTANT: This delete routine looks at just 1 index at a time. If there are duplicate records across
-            # multiple indexes, those duplicates will not be caught by this routine. It is left as is because at the
-            # time of this comment, we are migrating to using a single index.
-            body = filter_query(column, v)
-            response = client.search(index=index, body=json.dumps(body), size=config["max_query_size"])
-            delete_body = delete_query(response)
             try:
-                client.delete_by_query(
-                    index=index, body=json.dumps(delete_body), refresh=True, size=config["max_query_size"]
-                )
+                actions = delete_actions(client, index, column, v, config["max_query_size"], deleted_before.get(column))
+                success, errors = helpers.bulk(client, actions, raise_on_error=False)
+                deleted += success
+                failed += len(errors)
             except Exception as e:
+                failed_chunks += 1
                 printf({"msg": "[ERROR][ERROR][ERROR]\n{}".format(str(e)), "f": "ES Delete", "job": job_id})
-    end_ = client.count(index=index)["count"]
+
+    if deleted and refresh:
+        client.indices.refresh(index=index)
 
     t = perf_counter() - start
-    total = str(start_ - end_)
-    printf({"msg": "ES Deletes took {}s. Deleted {} records".format(t, total), "f": "ES Delete", "job": job_id})
-    return
+    msg = "ES Deletes took {}s. Deleted {} records ({} failed, {} failed chunks)".format(
+        t, deleted, failed, failed_chunks
+    )
+    printf({"msg": msg, "f": "ES Delete", "job": job_id})
+    return failed == 0 and failed_chunks == 0
 
 
 def get_deleted_award_ids(client, id_list, config, index=None):
@@ -0,0 +1,120 @@
+import logging
+import os
+import resource
+import tempfile
+
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from multiprocessing import Process, Queue
+from pathlib import Path
+from time import perf_counter
+
+from usaspending_api.common.elasticsearch.client import instantiate_elasticsearch_client
+from usaspending_api.common.elasticsearch.elasticsearch_sql_helpers import ensure_view_exists
+from usaspending_api.etl.es_etl_helpers import (
+    DataJob,
+    configure_sql_strings,
+    download_csv,
+    post_to_elasticsearch,
+    stream_to_elasticsearch,
+)
+
+
+logger = logging.getLogger("script")
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare documents/sec and peak RSS of the CSV (psql COPY + pandas) and streaming (server-side cursor + "
+        "parallel bulk) Elasticsearch ingest paths of es_rapidloader on the same records. Each path loads a new, "
+        "throwaway index in its own process. The peak RSS of the CSV path does not include the psql process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--load_type",
+            type=str,
+            choices=["transactions", "awards"],
+            default="transactions",
+            help="Which ETL view to load from",
+        )
+        parser.add_argument("--fiscal-year", type=int, required=True, help="Fiscal year of the records to load")
+        parser.add_argument("--min-id", type=int, help="Only load records with this id or greater")
+        parser.add_argument("--max-id", type=int, help="Only load records with this id or less")
+        parser.add_argument("--bulk-threads", type=int, default=4, help="Bulk request threads of the streaming path")
+        parser.add_argument("--bulk-chunk-size", type=int, default=5000, help="Bulk chunk size of the streaming path")
+        parser.add_argument("--keep-indexes", action="store_true", help="Don't delete the benchmark indexes")
+
+    def handle(self, *args, **options):
+        load_type = options["load_type"]
+        ensure_view_exists(
+            settings.ES_AWARDS_ETL_VIEW_NAME if load_type == "awards" else settings.ES_TRANSACTIONS_ETL_VIEW_NAME
+        )
+        call_command("es_configure", "--template-only", "--load_type={}".format(load_type))
+
+        config = {
+            "load_type": load_type,
+            "starting_date": datetime.strptime("{}+0000".format(settings.API_SEARCH_MIN_DATE), "%Y-%m-%d%z"),
+            "process_deletes": False,
+            "skip_counts": True,
+            "verbose": False,
+            "bulk_threads": options["bulk_threads"],
+            "bulk_chunk_size": options["bulk_chunk_size"],
+        }
+        id_range = None
+        if options["min_id"] is not None or options["max_id"] is not None:
+            id_range = (options["min_id"] or 0, options["max_id"] or 2 ** 63 - 1)
+
+        suffix = settings.ES_AWARDS_NAME_SUFFIX if load_type == "awards" else settings.ES_TRANSACTIONS_NAME_SUFFIX
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        client = instantiate_elasticsearch_client()
+
+        results = {}
+        with tempfile.TemporaryDirectory() as working_dir:
+            for mode in ("csv", "stream"):
+                index = "benchmark-{}-{}-{}".format(mode, timestamp, suffix)
+                client.indices.create(index=index)
+                job = DataJob(mode, index, options["fiscal_year"], str(Path(working_dir) / "benchmark.csv"), id_range)
+                try:
+                    results[mode] = run_in_process(mode, job, config)
+                finally:
+                    if not options["keep_indexes"]:
+                        client.indices.delete(index=index, ignore_unavailable=True)
+
+        for mode, (documents, duration, peak_rss_kb) in results.items():
+            logger.info(
+                f"{mode}: indexed {documents:,} documents in {duration:.2f}s "
+                f"({documents / duration if duration else 0:,.0f} documents/sec), peak RSS {peak_rss_kb / 1024:,.0f} MiB"
+            )
+        if results["csv"][0] != results["stream"][0]:
+            raise RuntimeError(f"Ingest paths indexed different numbers of documents: {results}")
+
+
+def run_in_process(mode, job, config):
+    """
+    Run one ingest path in a new process so that its peak RSS isn't mixed up with the other's.  Returns the number of
+    documents indexed, the seconds it took, and the peak RSS in KiB.
+    """
+    results = Queue()
+    process = Process(target=_ingest, args=(mode, job, config, results), name="Benchmark {}".format(mode))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError("{} ingest exited with {}".format(mode, process.exitcode))
+    return results.get()
+
+
+def _ingest(mode, job, config, results):
+    client = instantiate_elasticsearch_client()
+    start = perf_counter()
+    if mode == "stream":
+        documents = stream_to_elasticsearch(client, job, config)
+    else:
+        sql_config = {**config, "fiscal_year": job.fy, "id_range": job.id_range}
+        copy_sql, _, count_sql = configure_sql_strings(sql_config, job.csv, [])
+        download_csv(count_sql, copy_sql, job.csv, job.name, config["skip_counts"], config["verbose"])
+        documents = post_to_elasticsearch(client, job, config)
+        os.remove(job.csv)
+    results.put((documents, perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
@@ -13,17 +13,20 @@ from usaspending_api.common.helpers.fiscal_year_helpers import create_fiscal_yea
 from usaspending_api.etl.es_etl_helpers import printf
 from usaspending_api.etl.rapidloader import Rapidloader
 
+POSITIVE_INTEGER_ARGS = ("download_workers", "ingest_workers", "partition_size", "bulk_threads", "bulk_chunk_size")
+
 
 class Command(BaseCommand):
     """ETL script for indexing transaction data into Elasticsearch
 
     HIGHLEVEL PROCESS OVERVIEW
-         1. Generate the full list of fiscal years to process as jobs
+         1. Generate the full list of jobs to process, splitting each fiscal year into ranges of ids
          2. Iterate by job
-           a. Download a CSV file by year (one at a time)
-               i. Continue to download a CSV file until all years are downloaded
-           b. Upload a CSV to Elasticsearch
-               i. Continue to upload a CSV file until all years are uploaded to ES
+           a. Download a CSV file by id range (one per Download Process at a time)
+               i. Continue to download CSV files until all jobs are downloaded, pausing while the ES ingest queue is
+                  full
+           b. Upload a CSV to Elasticsearch (one per ES Index Process at a time)
+               i. Continue to upload CSV files until all jobs are uploaded to ES
            c. Delete CSV file
     TO RELOAD ALL data:
         python3 manage.py es_rapidloader --index-name <NEW-INDEX-NAME> --create-new-index all
@@ -99,6 +102,41 @@ class Command(BaseCommand):
             help="When creating a new index skip the step that deletes the old indexes and swaps the aliases. "
             "Only used when --create-new-index is provided.",
         )
+        parser.add_argument(
+            "--download-workers",
+            type=int,
+            default=2,
+            help="Number of processes downloading CSV files from the database at the same time",
+        )
+        parser.add_argument(
+            "--ingest-workers",
+            type=int,
+            default=2,
+            help="Number of processes uploading CSV files to Elasticsearch at the same time",
+        )
+        parser.add_argument(
+            "--partition-size",
+            type=int,
+            default=1000000,
+            help="Approximate number of records in each job. Fiscal years with more records are split by id range",
+        )
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help="Index records straight from the database with a server-side cursor instead of downloading CSV files",
+        )
+        parser.add_argument(
+            "--bulk-threads",
+            type=int,
+            default=4,
+            help="Number of threads each ES Index Process uses for bulk requests. Only used with --stream",
+        )
+        parser.add_argument(
+            "--bulk-chunk-size",
+            type=int,
+            default=5000,
+            help="Number of records fetched from the database and sent in each bulk request. Only used with --stream",
+        )
 
     def handle(self, *args, **options):
         elasticsearch_client = instantiate_elasticsearch_client()
@@ -134,6 +172,12 @@ def process_cli_parameters(options: dict, es_client) -> dict:
         "directory",
         "skip_counts",
         "load_type",
+        "download_workers",
+        "ingest_workers",
+        "partition_size",
+        "stream",
+        "bulk_threads",
+        "bulk_chunk_size",
     )
     config = set_config(simple_args, options)
 
@@ -189,6 +233,9 @@ def process_cli_parameters(options: dict, es_client) -> dict:
     elif config["starting_date"] < default_datetime:
         printf({"msg": "Fatal error: --start-datetime is too early. Set no earlier than {}".format(default_datetime)})
         raise SystemExit(1)
+    elif any(config[arg] < 1 for arg in POSITIVE_INTEGER_ARGS):
+        printf({"msg": "Fatal error: worker counts, --partition-size, and --bulk-chunk-size must be at least 1"})
+        raise SystemExit(1)
     elif not config["is_incremental_load"] and config["process_deletes"]:
         printf({"msg": "Skipping deletions for ths load, --deleted overwritten to False"})
         config["process_deletes"] = False
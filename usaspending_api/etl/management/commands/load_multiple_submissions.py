@@ -1,11 +1,19 @@
 import logging
+import multiprocessing
 
 from collections import namedtuple
+from django import db
 from django.conf import settings
 from django.core.management import call_command
 from django.core.management.base import BaseCommand
+from functools import partial
+from time import perf_counter
 from usaspending_api.common.helpers.date_helper import datetime_command_line_argument_type
 from usaspending_api.common.helpers.sql_helpers import execute_sql_to_named_tuple
+from usaspending_api.etl.management.commands.load_submission import (
+    Command as LoadSubmissionCommand,
+    update_shared_records,
+)
 from usaspending_api.etl.management.helpers.load_submission import (
     calculate_load_submissions_since_datetime,
     get_publish_history_table,
@@ -40,6 +48,16 @@ class Command(BaseCommand):
             action="store_true",
             help="Only list submissions to be loaded.  Do not actually load them.",
         )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Load this many submissions concurrently, each in its own process and transaction.  Submissions for "
+            "the same agency are still loaded one after another.",
+        )
+        parser.add_argument(
+            "--bulk", action="store_true", help="Load File C with load_submission's set-based --bulk mode.",
+        )
 
     def handle(self, *args, **options):
         certified_only_submission_ids, load_submission_ids = self.get_submission_ids(
@@ -54,7 +72,9 @@ class Command(BaseCommand):
             logger.info("Exiting script before data load occurs in accordance with the --list-ids-only flag.")
             return
 
-        self.process_submissions(certified_only_submission_ids, load_submission_ids)
+        self.process_submissions(
+            certified_only_submission_ids, load_submission_ids, processes=options["processes"], bulk=options["bulk"]
+        )
 
     def get_submission_ids(self, submission_ids, start_datetime):
         if submission_ids:
@@ -88,8 +108,8 @@ class Command(BaseCommand):
             logger.info(f"Performing incremental load starting from {since_datetime}.")
         return since_datetime
 
-    @staticmethod
-    def process_submissions(certified_only_submission_ids, load_submission_ids):
+    @classmethod
+    def process_submissions(cls, certified_only_submission_ids, load_submission_ids, processes=1, bulk=False):
         failed_submissions = []
 
         for submission in certified_only_submission_ids:
@@ -103,12 +123,32 @@ class Command(BaseCommand):
                 logger.exception(f"Submission {submission.submission_id} failed to update")
                 failed_submissions.append(submission.submission_id)
 
-        for submission_id in load_submission_ids:
-            try:
-                call_command("load_submission", submission_id)
-            except (Exception, SystemExit):
-                logger.exception(f"Submission {submission_id} failed to load")
-                failed_submissions.append(submission_id)
+        start = perf_counter()
+        load_options = ["--bulk"] if bulk else []
+        if processes > 1 and load_submission_ids:
+            agency_submission_ids = cls.group_submission_ids_by_agency(load_submission_ids)
+            logger.info(
+                f"Loading {len(agency_submission_ids):,} agencies' submissions with {processes} processes, one "
+                f"submission per agency at a time"
+            )
+            # Submissions touch the same final_of_fy flags and awards, so those updates are applied once at the end
+            # rather than contending for locks in every submission's transaction
+            load_options.append("--defer-shared-updates")
+            # Forked processes must not share this process's database connection
+            db.connections.close_all()
+            load_submissions = partial(_load_submissions, load_options=load_options)
+            results = []
+            with multiprocessing.Pool(processes) as pool:
+                for agency_results in pool.imap_unordered(load_submissions, agency_submission_ids):
+                    results.extend(agency_results)
+            award_ids = set(award_id for _, _, ids in results for award_id in ids or [])
+            logger.info(f"Updating records shared by submissions, including {len(award_ids):,} awards")
+            update_shared_records(award_ids)
+        else:
+            results = _load_submissions(load_submission_ids, load_options)
+
+        failed_submissions.extend(submission_id for submission_id, _, award_ids in results if award_ids is None)
+        cls.log_load_times(results, perf_counter() - start)
 
         if failed_submissions:
             logger.error(
@@ -119,6 +159,39 @@ class Command(BaseCommand):
         else:
             logger.info("Script completed with no failures.")
 
+    @staticmethod
+    def group_submission_ids_by_agency(submission_ids):
+        """
+        Split submission ids (keeping their order) into one list per Broker agency, largest first.  An agency's
+        submissions are loaded one after another since they can create the same program activities.
+        """
+        with db.connections["data_broker"].cursor() as cursor:
+            cursor.execute(
+                "select submission_id, coalesce(cgac_code, frec_code) from submission where submission_id in %s",
+                [tuple(submission_ids)],
+            )
+            agencies = dict(cursor.fetchall())
+
+        agency_submission_ids = {}
+        for submission_id in submission_ids:
+            # Submissions missing from Broker fail to load on their own
+            agency = agencies.get(submission_id, f"submission {submission_id}")
+            agency_submission_ids.setdefault(agency, []).append(submission_id)
+        return sorted(agency_submission_ids.values(), key=len, reverse=True)
+
+    @staticmethod
+    def log_load_times(results, elapsed_seconds):
+        if not results:
+            return
+        logger.info("Submission load times, slowest first:")
+        for submission_id, seconds, award_ids in sorted(results, key=lambda r: r[1], reverse=True):
+            outcome = "failed" if award_ids is None else f"{len(set(award_ids)):,} awards touched"
+            logger.info(f"    {submission_id}: {seconds:,.2f}s ({outcome})")
+        load_seconds = sum(seconds for _, seconds, _ in results)
+        logger.info(
+            f"Loaded {len(results):,} submissions in {elapsed_seconds:,.2f}s ({load_seconds:,.2f}s of submission loads)"
+        )
+
     @staticmethod
     def get_since_sql(since_datetime=None):
         """
@@ -225,3 +298,24 @@ class Command(BaseCommand):
             ],
             [r.submission_id for r in rows if r.anything_other_than_certified_date_has_changed],
         )
+
+
+def _load_submissions(submission_ids, load_options):
+    """
+    Load submissions one after another with load_submission, each in its own transaction.  Returns the id, seconds
+    taken, and ids of the awards linked to File C (None if it failed to load) of each submission.
+    """
+    results = []
+    for submission_id in submission_ids:
+        start = perf_counter()
+        command = LoadSubmissionCommand()
+        try:
+            call_command(command, submission_id, *load_options)
+            award_ids = command.award_ids
+        except (Exception, SystemExit):
+            logger.exception(f"Submission {submission_id} failed to load")
+            award_ids = None
+        seconds = perf_counter() - start
+        logger.info(f"Submission {submission_id} {'failed' if award_ids is None else 'loaded'} in {seconds:,.2f}s")
+        results.append((submission_id, seconds, award_ids))
+    return results
@@ -5,7 +5,8 @@ import signal
 from datetime import datetime, timezone
 from django.core.management import call_command
 from django.core.management.base import CommandError
-from django.db import transaction
+from django.db import connection, transaction
+from psycopg2.extras import execute_values
 from usaspending_api.accounts.models import AppropriationAccountBalances, TreasuryAppropriationAccount
 from usaspending_api.awards.models import Award, FinancialAccountsByAwards
 from usaspending_api.common.helpers.dict_helpers import upper_case_dict_values
@@ -30,6 +31,10 @@ from usaspending_api.submissions.models import SubmissionAttributes
 # account data
 TAS_ID_TO_ACCOUNT = {}
 
+# Temporary table File C records are staged in by bulk_load_file_c, and the number of records written per statement
+FILE_C_TEMP_TABLE = "temp_load_submission_file_c"
+BULK_WRITE_SIZE = 5000
+
 logger = logging.getLogger("script")
 
 
@@ -46,6 +51,19 @@ class Command(load_base.Command):
 
     def add_arguments(self, parser):
         parser.add_argument("submission_id", help="Broker submission_id to load", type=int)
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Load File C by staging its records in a temporary table, matching them to awards with one "
+            "set-based query, and inserting them together rather than one at a time",
+        )
+        parser.add_argument(
+            "--defer-shared-updates",
+            action="store_true",
+            help="Skip the updates of records shared with other submissions (final_of_fy flags and the update_date of "
+            "awards linked to File C) so that submissions can be loaded concurrently.  The caller must apply them; "
+            "load_multiple_submissions --processes does once all of its submissions are loaded.",
+        )
         super(Command, self).add_arguments(parser)
 
     @transaction.atomic
@@ -137,9 +155,15 @@ class Command(load_base.Command):
         )
         logger.info("Loading File C data")
         start_time = datetime.now()
-        load_file_c(submission_attributes, db_cursor, certified_award_financial)
+        if options["bulk"]:
+            self.award_ids = bulk_load_file_c(submission_attributes, db_cursor, certified_award_financial)
+        else:
+            self.award_ids = load_file_c(submission_attributes, db_cursor, certified_award_financial)
         logger.info(f"Finished loading File C data, took {datetime.now() - start_time}")
 
+        if not options["defer_shared_updates"]:
+            update_shared_records(self.award_ids)
+
         # Once all the files have been processed, run any global cleanup/post-load tasks.
         # Cleanup not specific to this submission is run in the `.handle` method
         logger.info(f"Successfully loaded submission {submission_id}.")
@@ -263,8 +287,6 @@ def load_file_a(submission_attributes, appropriation_data, db_cursor):
             appropriation_balances, row, field_map=field_map, value_map=value_map, save=True, reverse=reverse
         )
 
-    AppropriationAccountBalances.populate_final_of_fy()
-
     for key in skipped_tas:
         logger.info(f"Skipped {skipped_tas[key]['count']:,} rows due to missing TAS: {key}")
 
@@ -454,8 +476,6 @@ def load_file_b(submission_attributes, prg_act_obj_cls_data, db_cursor):
         }
         load_data_into_model(financial_by_prg_act_obj_cls, row, value_map=value_map, save=True, reverse=reverse)
 
-    FinancialAccountsByProgramActivityObjectClass.populate_final_of_fy()
-
     for key in skipped_tas:
         logger.info(f"Skipped {skipped_tas[key]['count']:,} rows due to missing TAS: {key}")
 
@@ -466,6 +486,18 @@ def load_file_b(submission_attributes, prg_act_obj_cls_data, db_cursor):
     logger.info(f"Skipped a total of {total_tas_skipped:,} TAS rows for File B")
 
 
+def update_shared_records(award_ids):
+    """
+    Update the records which loading a submission affects but which aren't part of the submission:  the final_of_fy
+    flags of File A and B records, and the update_date of the awards linked to File C records (award_ids).
+    """
+    AppropriationAccountBalances.populate_final_of_fy()
+    FinancialAccountsByProgramActivityObjectClass.populate_final_of_fy()
+
+    # Mark the award as updated, so it will be reloaded into ElasticSearch during nightly job
+    Award.objects.filter(id__in=set(award_ids)).update(update_date=datetime.now(timezone.utc))
+
+
 def find_matching_award(piid=None, parent_piid=None, fain=None, uri=None):
     """
         Check for a distinct award that matches based on the parameters provided
@@ -521,7 +553,7 @@ def load_file_c(submission_attributes, db_cursor, certified_award_financial):
 
     if certified_award_financial.count == 0:
         logger.warning("No File C (award financial) data found, skipping...")
-        return
+        return []
 
     reverse = re.compile(r"(_(cpe|fyb)$)|^transaction_obligated_amount$")
 
@@ -586,9 +618,6 @@ def load_file_c(submission_attributes, db_cursor, certified_award_financial):
         # Still using the cpe|fyb regex compiled above for reverse
         load_data_into_model(award_financial_data, row, value_map=value_map_faba, save=True, reverse=reverse)
 
-    # Mark the award as updated, so it will be reloaded into ElasticSearch during nightly job
-    Award.objects.filter(id__in=set(a.id for a in awards_touched)).update(update_date=datetime.now(timezone.utc))
-
     for key in skipped_tas:
         logger.info(f"Skipped {skipped_tas[key]['count']:,} rows due to missing TAS: {key}")
 
@@ -599,3 +628,146 @@ def load_file_c(submission_attributes, db_cursor, certified_award_financial):
     logger.info(f"Skipped a total of {total_tas_skipped:,} TAS rows for File C")
 
     return [award.id for award in awards_touched if award]
+
+
+# Resolves the same award as find_matching_award for every staged File C record which has exactly one match
+MATCH_FILE_C_AWARDS_SQL = """
+    with normalized as (
+        select
+            row_number,
+            nullif(piid, '') as piid,
+            case when nullif(piid, '') is not null then nullif(parent_award_id, '') end as parent_piid,
+            case when nullif(piid, '') is null then nullif(fain, '') end as fain,
+            case when nullif(piid, '') is null then nullif(uri, '') end as uri
+        from {temp_table}
+    ),
+    piid_matches as (
+        select      k.piid, k.parent_piid, count(*) as award_count, min(a.id) as award_id
+        from        (select distinct piid, parent_piid from normalized where piid is not null) as k
+                    inner join awards as a on a.piid = k.piid and (
+                        k.parent_piid is null or a.parent_award_piid = k.parent_piid
+                    )
+        where       a.latest_transaction_id is not null
+        group by    k.piid, k.parent_piid
+    ),
+    fain_matches as (
+        select      a.fain, count(*) as award_count, min(a.id) as award_id
+        from        awards as a
+        where       a.latest_transaction_id is not null and a.fain in (select fain from normalized)
+        group by    a.fain
+    ),
+    uri_matches as (
+        select      a.uri, count(*) as award_count, min(a.id) as award_id
+        from        awards as a
+        where       a.latest_transaction_id is not null and a.uri in (select uri from normalized)
+        group by    a.uri
+    )
+    update  {temp_table} as t
+    set     award_id = m.award_id
+    from    (
+                select
+                    n.row_number,
+                    case
+                        when n.piid is not null then case when pm.award_count = 1 then pm.award_id end
+                        when fm.award_count = 1 then fm.award_id
+                        when um.award_count = 1 then um.award_id
+                    end as award_id
+                from
+                    normalized as n
+                    left outer join piid_matches as pm on
+                        pm.piid = n.piid and pm.parent_piid is not distinct from n.parent_piid
+                    left outer join fain_matches as fm on fm.fain = n.fain
+                    left outer join uri_matches as um on um.uri = n.uri
+            ) as m
+    where   m.row_number = t.row_number and m.award_id is not null
+"""
+
+
+def bulk_load_file_c(submission_attributes, db_cursor, certified_award_financial):
+    """
+    Process and load file C broker data like load_file_c, but set-based:  File C records are staged in a temporary
+    table, matched to awards for the whole submission with one query (MATCH_FILE_C_AWARDS_SQL, which keeps the
+    exactly-one-match rules of find_matching_award), then inserted with one statement.
+    """
+    if certified_award_financial.count == 0:
+        logger.warning("No File C (award financial) data found, skipping...")
+        return []
+
+    reverse = re.compile(r"(_(cpe|fyb)$)|^transaction_obligated_amount$")
+
+    meta = FinancialAccountsByAwards._meta
+    fields = [field for field in meta.concrete_fields if not field.primary_key]
+    columns = ", ".join(f'"{field.column}"' for field in fields)
+    skipped_tas = {}
+    disaster_emergency_funds = {}
+    total_rows = certified_award_financial.count
+    start_time = datetime.now()
+    staged_rows = []
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"drop table if exists {FILE_C_TEMP_TABLE}; "
+            f"create temporary table {FILE_C_TEMP_TABLE} on commit drop as "
+            f"select 0 as row_number, {columns} from {meta.db_table} where false"
+        )
+        insert_sql = f"insert into {FILE_C_TEMP_TABLE} (row_number, {columns}) values %s"
+
+        for index, row in enumerate(certified_award_financial, 1):
+            upper_case_dict_values(row)
+
+            treasury_account, tas_rendering_label = get_treasury_appropriation_account_tas_lookup(
+                row.get("tas_id"), db_cursor
+            )
+            if treasury_account is None:
+                update_skipped_tas(row, tas_rendering_label, skipped_tas)
+                continue
+
+            defc = row.get("disaster_emergency_fund_code")
+            if defc not in disaster_emergency_funds:
+                disaster_emergency_funds[defc] = get_disaster_emergency_fund(row)
+
+            value_map_faba = {
+                "award": None,
+                "submission": submission_attributes,
+                "reporting_period_start": submission_attributes.reporting_period_start,
+                "reporting_period_end": submission_attributes.reporting_period_end,
+                "treasury_account": treasury_account,
+                "object_class": row.get("object_class"),
+                "program_activity": row.get("program_activity"),
+                "disaster_emergency_fund": disaster_emergency_funds[defc],
+            }
+            award_financial_data = load_data_into_model(
+                FinancialAccountsByAwards(), row, value_map=value_map_faba, reverse=reverse
+            )
+            staged_rows.append(
+                [index]
+                + [field.get_db_prep_save(field.pre_save(award_financial_data, True), connection) for field in fields]
+            )
+
+            if len(staged_rows) >= BULK_WRITE_SIZE:
+                execute_values(cursor.cursor, insert_sql, staged_rows, page_size=BULK_WRITE_SIZE)
+                staged_rows = []
+                logger.info(f"C File Load: Staged row {index:,} of {total_rows:,} ({datetime.now() - start_time})")
+
+        execute_values(cursor.cursor, insert_sql, staged_rows, page_size=BULK_WRITE_SIZE)
+        cursor.execute(f"analyze {FILE_C_TEMP_TABLE}")
+
+        cursor.execute(MATCH_FILE_C_AWARDS_SQL.format(temp_table=FILE_C_TEMP_TABLE))
+        logger.info(f"C File Load: Matched {cursor.rowcount:,} rows to awards ({datetime.now() - start_time})")
+
+        cursor.execute(
+            f"insert into {meta.db_table} ({columns}) select {columns} from {FILE_C_TEMP_TABLE} order by row_number"
+        )
+        logger.info(f"C File Load: Inserted {cursor.rowcount:,} rows ({datetime.now() - start_time})")
+
+        cursor.execute(f"select award_id from {FILE_C_TEMP_TABLE} where award_id is not null order by row_number")
+        award_ids = [award_id for (award_id,) in cursor.fetchall()]
+        cursor.execute(f"drop table {FILE_C_TEMP_TABLE}")
+
+    for key in skipped_tas:
+        logger.info(f"Skipped {skipped_tas[key]['count']:,} rows due to missing TAS: {key}")
+
+    total_tas_skipped = sum(skipped["count"] for skipped in skipped_tas.values())
+    logger.info(f"Skipped a total of {total_tas_skipped:,} TAS rows for File C")
+
+    return award_ids
@@ -0,0 +1,39 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from usaspending_api.common.helpers.timing_helpers import timer
+from usaspending_api.etl.award_helpers import AWARD_UPDATE_BATCH_SIZE, update_queued_awards
+
+logger = logging.getLogger("script")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the awards queued by the transaction loaders (award_update_queue) from their transactions, in "
+        "batches of neighboring award ids, updating only the awards whose rolled up values changed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=AWARD_UPDATE_BATCH_SIZE, help="Awards recomputed per transaction"
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Queue every award first, to recompute all of them in batches rather than in one statement",
+        )
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "INSERT INTO award_update_queue (award_id, queued_at) SELECT id, now() FROM awards "
+                    "ON CONFLICT (award_id) DO NOTHING"
+                )
+                logger.info(f"Queued {cursor.rowcount:,} awards")
+
+        with timer("recomputing queued awards", logger.info):
+            updated_count = update_queued_awards(batch_size=options["batch_size"])
+        logger.info(f"{updated_count:,} award records updated")
@@ -1,11 +1,13 @@
 from multiprocessing import Process, Queue
 from pathlib import Path
-from time import sleep
+from time import perf_counter, sleep
 
 from django.conf import settings
+from django.core.management import call_command
 from usaspending_api.broker.helpers.last_load_date import update_last_load_date
 from usaspending_api.etl.es_etl_helpers import (
     DataJob,
+    StageProgress,
     deleted_transactions,
     deleted_awards,
     download_db_records,
@@ -13,10 +15,14 @@ from usaspending_api.etl.es_etl_helpers import (
     printf,
     process_guarddog,
     set_final_index_config,
+    split_fiscal_year_into_id_ranges,
     swap_aliases,
     take_snapshot,
 )
 
+# How often to report the progress of the download and ES ingest stages, in seconds
+PROGRESS_REPORT_INTERVAL = 60
+
 
 class Rapidloader:
     def __init__(self, config, elasticsearch_client):
@@ -26,39 +32,69 @@ class Rapidloader:
 
     def run_load_steps(self) -> None:
         download_queue = Queue()  # Queue for jobs which need a csv downloaded
-        es_ingest_queue = Queue(20)  # Queue for jobs which have a csv and are ready for ES ingest
+        # Queue for jobs which have a csv and are ready for ES ingest.  It is bounded so that downloads block once
+        # every ES Index Process has a couple of CSVs waiting, instead of filling the disk
+        es_ingest_queue = Queue(2 * self.config["ingest_workers"])
 
         job_number = 0
         for fiscal_year in self.config["fiscal_years"]:
-            job_number += 1
-            index = self.config["index_name"]
-            filename = str(
-                self.config["directory"] / "{fy}_{type}.csv".format(fy=fiscal_year, type=self.config["load_type"])
-            )
+            for partition, id_range in enumerate(split_fiscal_year_into_id_ranges(self.config, fiscal_year)):
+                job_number += 1
+                index = self.config["index_name"]
+                filename = str(
+                    self.config["directory"]
+                    / "{fy}_{type}_{partition}.csv".format(
+                        fy=fiscal_year, type=self.config["load_type"], partition=partition
+                    )
+                )
 
-            new_job = DataJob(job_number, index, fiscal_year, filename)
+                new_job = DataJob(job_number, index, fiscal_year, filename, id_range)
 
-            if Path(filename).exists():
-                Path(filename).unlink()
-            download_queue.put(new_job)
+                if Path(filename).exists():
+                    Path(filename).unlink()
+                download_queue.put(new_job)
+
+        if self.config["stream"]:
+            # The ES Index Processes read the records of each job straight from the database, without a CSV download
+            download_workers, es_job_queue = 0, download_queue
+            es_progress = StageProgress("ES Ingest", self.config["ingest_workers"], "waiting for jobs")
+        else:
+            download_workers, es_job_queue = self.config["download_workers"], es_ingest_queue
+            es_progress = StageProgress("ES Ingest", self.config["ingest_workers"], "waiting for CSVs to be downloaded")
+        download_progress = StageProgress("Download", download_workers, "on a full ES ingest queue")
+        stages = [download_progress, es_progress] if download_workers else [es_progress]
+
+        # These "Null Jobs" tell each process reading the download queue there are no more jobs
+        for _ in range(download_workers or self.config["ingest_workers"]):
+            download_queue.put(DataJob(None, None, None, None))
 
         printf({"msg": "There are {} jobs to process".format(job_number)})
 
-        process_list = [
+        download_processes = [
             Process(
-                name="Download Process",
+                name="Download Process {}".format(i),
                 target=download_db_records,
-                args=(download_queue, es_ingest_queue, self.config),
-            ),
+                args=(download_queue, es_ingest_queue, self.config, download_progress),
+            )
+            for i in range(download_workers)
+        ]
+        es_processes = [
             Process(
-                name="ES Index Process",
+                name="ES Index Process {}".format(i),
                 target=es_data_loader,
-                args=(self.elasticsearch_client, download_queue, es_ingest_queue, self.config),
-            ),
+                args=(es_job_queue, self.config, es_progress),
+            )
+            for i in range(self.config["ingest_workers"])
         ]
+        process_list = download_processes + es_processes
+
+        for process in download_processes:
+            process.start()
 
-        process_list[0].start()  # Start Download process
+        self.prepare_index()
 
+        # Deletes run alongside ES ingest: they skip documents updated after their records were deleted, and awards
+        # are only deleted once they are confirmed missing from the database
         if self.config["process_deletes"]:
             process_list.append(
                 Process(
@@ -68,12 +104,11 @@ class Rapidloader:
                 )
             )
             process_list[-1].start()  # start S3 csv fetch proces
-            while process_list[-1].is_alive():
-                printf({"msg": "Waiting to start ES ingest until S3 deletes are complete"})
-                sleep(7)
 
-        process_list[1].start()  # start ES ingest process
+        for process in es_processes:
+            process.start()
 
+        last_report = perf_counter()
         while True:
             sleep(10)
             if process_guarddog(process_list):
@@ -81,6 +116,23 @@ class Rapidloader:
             elif all([not x.is_alive() for x in process_list]):
                 printf({"msg": "All ETL processes completed execution with no error codes"})
                 break
+            elif perf_counter() - last_report >= PROGRESS_REPORT_INTERVAL:
+                last_report = perf_counter()
+                for progress in stages:
+                    printf({"msg": progress.summary(job_number), "f": "Progress"})
+
+        for progress in stages:
+            printf({"msg": progress.summary(job_number), "f": "Progress"})
+
+    def prepare_index(self) -> None:
+        """Set up the index before the ES Index Processes start so that they don't race each other to create it"""
+        if self.config["create_new_index"]:
+            # ensure template for index is present and the latest version
+            call_command("es_configure", "--template-only", "--load_type={}".format(self.config["load_type"]))
+        if not self.elasticsearch_client.indices.exists(self.config["index_name"]):
+            printf({"msg": 'Creating index "{}"'.format(self.config["index_name"])})
+            self.elasticsearch_client.indices.create(index=self.config["index_name"])
+            self.elasticsearch_client.indices.refresh(self.config["index_name"])
 
     def complete_process(self) -> None:
         if self.config["create_new_index"]:
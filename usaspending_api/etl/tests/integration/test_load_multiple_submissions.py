@@ -469,3 +469,15 @@ class TestWithMultipleDatabases(TransactionTestCase):
         assert SubmissionAttributes.objects.get(submission_id=3).create_date == create_date_sub_3
 
         # Ok.  That's probably good enough for now.  Thanks for bearing with me.
+
+        # Reload everything with concurrent, bulk loads.
+        SubmissionAttributes.objects.all().delete()
+        call_command("load_multiple_submissions", "--incremental", "--processes", 2, "--bulk")
+        assert SubmissionAttributes.objects.count() == 5
+        assert AppropriationAccountBalances.objects.count() == 5
+        assert FinancialAccountsByProgramActivityObjectClass.objects.count() == 7
+        assert FinancialAccountsByAwards.objects.count() == 11
+        assert AppropriationAccountBalances.objects.filter(final_of_fy=True).count() > 0
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute("select sum(transaction_obligated_amount) from financial_accounts_by_awards")
+            assert cursor.fetchone()[0] == Decimal("-5212070.00")
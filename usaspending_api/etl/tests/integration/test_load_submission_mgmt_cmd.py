@@ -3,10 +3,10 @@ import pytest
 
 from django.core.management import call_command
 from django.db import connections
-from django.db.models import Q
+from django.db.models import F, Q
 from django.test import TestCase
 from model_mommy import mommy
-from usaspending_api.awards.models import FinancialAccountsByAwards
+from usaspending_api.awards.models import Award, FinancialAccountsByAwards
 from usaspending_api.etl.transaction_loaders.data_load_helpers import format_insert_or_update_column_sql
 
 
@@ -238,6 +238,39 @@ class TestWithMultipleDatabases(TestCase):
 
         assert FinancialAccountsByAwards.objects.all().count() == 6
 
+    def test_load_submission_file_c_bulk(self):
+        """
+        Test that the --bulk File C load matches the same awards and loads the same records as the row by row load
+        """
+        mommy.make("awards.Award", id=-999, uri="RANDOM_LOAD_SUB_URI_999", fain="RANDOM_LOAD_SUB_FAIN_999")
+        mommy.make("awards.Award", id=-1999, uri="RANDOM_LOAD_SUB_URI_1999", fain="RANDOM_LOAD_SUB_FAIN_1999")
+        mommy.make("awards.Award", id=-997, fain="RANDOM_LOAD_SUB_FAIN", uri="RANDOM_LOAD_SUB_URI")
+        mommy.make("awards.Award", id=-996, fain="RANDOM_LOAD_SUB_FAIN")
+        mommy.make("awards.Award", id=-998, piid="RANDOM_LOAD_SUB_PIID", parent_award_piid=None)
+        mommy.make("awards.Award", id=-1001, piid="RANDOM_LOAD_SUB_PIID", parent_award_piid="PARENT_LOAD_SUB_PIID")
+        mommy.make(
+            "awards.Award", id=-1002, piid="RANDOM_LOAD_SUB_PIID", parent_award_piid="RANDOM_LOAD_SUB_PARENT_PIID"
+        )
+        for award_id in (-999, -1999, -997, -996, -998, -1001, -1002):
+            mommy.make("awards.TransactionNormalized", id=award_id)
+        Award.objects.update(latest_transaction_id=F("id"))
+
+        def loaded_file_c():
+            ignored = {"financial_accounts_by_awards_id", "create_date", "update_date"}
+            return sorted(
+                str({k: v for k, v in row.items() if k not in ignored})
+                for row in FinancialAccountsByAwards.objects.values()
+            )
+
+        call_command("load_submission", "-9999")
+        expected = loaded_file_c()
+        call_command("load_submission", "-9999", "--bulk")
+
+        assert loaded_file_c() == expected
+        assert sorted(
+            FinancialAccountsByAwards.objects.filter(award_id__isnull=False).values_list("award_id", flat=True)
+        ) == [-1999, -1002, -999, -997]
+
 
 def _assemble_broker_tas_lookup_records() -> list:
     base_record = {
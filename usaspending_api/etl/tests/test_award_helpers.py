@@ -3,7 +3,14 @@ import pytest
 
 from model_mommy import mommy
 
-from usaspending_api.etl.award_helpers import update_awards, update_procurement_awards, update_assistance_awards
+from usaspending_api.awards.models import AwardUpdateQueue
+from usaspending_api.etl.award_helpers import (
+    queue_award_updates,
+    update_assistance_awards,
+    update_awards,
+    update_procurement_awards,
+    update_queued_awards,
+)
 
 
 @pytest.mark.django_db
@@ -191,6 +198,45 @@ def test_award_update_with_list():
     assert awards[4].total_obligation == 0
 
 
+@pytest.mark.django_db
+def test_update_queued_awards():
+    """Test that queued awards are recomputed in batches, and only the ones which changed are updated."""
+    awards = [mommy.make("awards.Award", total_obligation=0, generated_unique_award_id=f"AWARD_{i}") for i in range(4)]
+    for award in awards:
+        mommy.make(
+            "awards.TransactionNormalized",
+            award=award,
+            federal_action_obligation=1000,
+            _quantity=2,
+            unique_award_key=award.generated_unique_award_id,
+        )
+
+    # award 3 isn't queued, and a queued id without an award (e.g. one since deleted) is skipped
+    queue_award_updates([awards[0].id, awards[1].id, awards[2].id, -1])
+    assert AwardUpdateQueue.objects.count() == 4
+
+    # re-queuing awards which are already queued doesn't grow the queue
+    queue_award_updates([awards[0].id, awards[0].id, awards[2].id])
+    assert sorted(AwardUpdateQueue.objects.values_list("award_id", flat=True)) == sorted(
+        [awards[0].id, awards[1].id, awards[2].id, -1]
+    )
+
+    # a loader recomputes only the awards it queued
+    assert update_queued_awards([awards[1].id]) == 1
+    assert AwardUpdateQueue.objects.count() == 3
+
+    assert update_queued_awards(batch_size=2) == 2
+    assert AwardUpdateQueue.objects.count() == 0
+    for award in awards:
+        award.refresh_from_db()
+    assert [award.total_obligation for award in awards] == [2000, 2000, 2000, 0]
+
+    # nothing changed, so nothing is updated
+    queue_award_updates([awards[0].id])
+    assert update_queued_awards([awards[0].id]) == 0
+    assert AwardUpdateQueue.objects.count() == 0
+
+
 @pytest.mark.django_db
 def test_award_update_from_contract_transaction():
     """Test award updates specific to contract transactions."""
@@ -4,10 +4,23 @@ from collections import OrderedDict
 from datetime import datetime, timezone
 from model_mommy import mommy
 from pathlib import Path
+from unittest.mock import MagicMock
 from usaspending_api.common.elasticsearch.client import instantiate_elasticsearch_client
 from usaspending_api.common.helpers.sql_helpers import execute_sql_to_ordered_dictionary
 from usaspending_api.common.helpers.text_helpers import generate_random_string
-from usaspending_api.etl.es_etl_helpers import configure_sql_strings, check_awards_for_deletes, get_deleted_award_ids
+from usaspending_api.etl.es_etl_helpers import (
+    configure_sql_strings,
+    check_awards_for_deletes,
+    csv_chunk_gen,
+    db_row_to_es_document,
+    delete_actions,
+    deleted_transactions,
+    gather_deleted_ids,
+    load_deleted_ids_manifest,
+    save_deleted_ids_manifest,
+    get_deleted_award_ids,
+    split_fiscal_year_into_id_ranges,
+)
 from usaspending_api.etl.rapidloader import Rapidloader
 
 
@@ -96,7 +109,6 @@ def baby_sleeps(monkeypatch):
     def _sleep(seconds):
         sleep(0.001)
 
-    monkeypatch.setattr("usaspending_api.etl.es_etl_helpers.sleep", _sleep)
     monkeypatch.setattr("usaspending_api.etl.rapidloader.sleep", _sleep)
 
 
@@ -117,6 +129,12 @@ config = {
     "starting_date": datetime(2007, 10, 1, 0, 0, tzinfo=timezone.utc),
     "max_query_size": 10000,
     "is_incremental_load": False,
+    "download_workers": 2,
+    "ingest_workers": 2,
+    "partition_size": 1000000,
+    "stream": False,
+    "bulk_threads": 2,
+    "bulk_chunk_size": 1000,
 }
 
 
@@ -160,6 +178,31 @@ WHERE fiscal_year=2019 AND update_date >= '2007-10-01'
     assert count == count_sql
 
 
+def test_configure_sql_strings_with_id_range():
+    sql_config = {
+        "starting_date": datetime(2007, 10, 1, 0, 0, tzinfo=timezone.utc),
+        "fiscal_year": 2019,
+        "id_range": (1, 500),
+        "process_deletes": False,
+        "load_type": "transactions",
+    }
+    copy, id, count = configure_sql_strings(sql_config, "filename", [])
+    where = "WHERE transaction_fiscal_year=2019 AND update_date >= '2007-10-01' AND transaction_id BETWEEN 1 AND 500"
+    assert where in copy
+    assert where in count
+
+
+def test_split_fiscal_year_into_id_ranges(monkeypatch):
+    stats = {"count": 25, "min_id": 101, "max_id": 200}
+    monkeypatch.setattr("usaspending_api.etl.es_etl_helpers.execute_sql_statement", lambda *args: [stats])
+    split_config = {**config, "load_type": "awards", "partition_size": 10}
+
+    assert split_fiscal_year_into_id_ranges(split_config, 2019) == [(101, 134), (135, 168), (169, 200)]
+
+    stats.update({"count": 0, "min_id": None, "max_id": None})
+    assert split_fiscal_year_into_id_ranges(split_config, 2019) == []
+
+
 # SQL method is being mocked here since the `execute_sql_statement` used doesn't use the same DB connection to avoid multiprocessing errors
 def mock_execute_sql(sql, results):
     return execute_sql_to_ordered_dictionary(sql)
@@ -184,3 +227,136 @@ def test_get_award_ids(award_data_fixture, elasticsearch_transaction_index):
     client = elasticsearch_transaction_index.client
     ids = get_deleted_award_ids(client, id_list, config, index=elasticsearch_transaction_index.index_name)
     assert ids == ["CONT_AWD_IND12PB00323"]
+
+
+def test_db_row_to_es_document_matches_csv(tmp_path):
+    columns = ["award_id", "recipient_agg_key", "piid", "tas_paths", "business_categories", "federal_accounts"]
+    row = ("1", "abc", "", [], ["small_business", "other"], [{"id": 5, "account_title": None}])
+    csv_file = tmp_path / "awards.csv"
+    csv_file.write_text(
+        ",".join(columns) + "\n" + '1,abc,,{},"{small_business,other}","[{""id"": 5, ""account_title"": null}]"\n'
+    )
+
+    from_csv = next(csv_chunk_gen(str(csv_file), 10, None, "awards"))[0]
+    assert (
+        db_row_to_es_document(columns, row)
+        == from_csv
+        == {
+            "award_id": "1",
+            "recipient_agg_key": "abc",
+            "piid": None,
+            "tas_paths": None,
+            "business_categories": ["small_business", "other"],
+            "federal_accounts": ['{"account_title": "", "id": "5"}'],
+            "routing": "abc",
+        }
+    )
+
+
+def test_delete_actions_use_id_and_routing():
+    client = MagicMock()
+    client.search.return_value = {
+        "hits": {
+            "hits": [
+                {
+                    "_index": "idx",
+                    "_id": "a1",
+                    "_routing": "r1",
+                    "_source": {"generated_unique_award_id": "CONT_AWD_1"},
+                },
+                {"_index": "idx", "_id": "a2", "_source": {"generated_unique_award_id": "CONT_AWD_2"}},
+                {"_index": "idx", "_id": "a3", "_source": {"generated_unique_award_id": "CONT_AWD_1_MOD"}},
+            ]
+        }
+    }
+
+    actions = delete_actions(client, "idx", "generated_unique_award_id", ["CONT_AWD_1", "CONT_AWD_2"], 10)
+
+    assert actions == [
+        {"_op_type": "delete", "_index": "idx", "_id": "a1", "routing": "r1"},
+        {"_op_type": "delete", "_index": "idx", "_id": "a2"},
+    ]
+
+
+def test_delete_actions_keep_documents_updated_after_delete():
+    client = MagicMock()
+    client.search.return_value = {
+        "hits": {
+            "hits": [
+                {"_index": "idx", "_id": "a1", "_source": {"col": "1"}, "fields": {"update_date": ["1577836800000"]}},
+                {"_index": "idx", "_id": "a2", "_source": {"col": "2"}, "fields": {"update_date": ["1609459200000"]}},
+            ]
+        }
+    }
+    deleted_at = datetime(2020, 6, 1, tzinfo=timezone.utc)
+
+    actions = delete_actions(client, "idx", "col", ["1", "2"], 10, {"1": deleted_at, "2": deleted_at})
+
+    assert [action["_id"] for action in actions] == ["a1"]
+
+
+def test_gather_deleted_ids_skips_processed_files(monkeypatch, tmp_path):
+    def s3_object(key, e_tag, last_modified):
+        return MagicMock(key=key, e_tag=e_tag, last_modified=last_modified)
+
+    files = {
+        "a.csv": ["detached_award_proc_unique,other\n", "abc,1\n", ",2\n"],
+        "b.csv": ["afa_generated_unique\n", "def\n"],
+    }
+    read = []
+
+    def stream_s3_object_lines(bucket_name, key):
+        read.append(key)
+        return iter(files[key])
+
+    objects = [
+        s3_object("a.csv", "etag-a", datetime(2020, 1, 2, tzinfo=timezone.utc)),
+        s3_object("b.csv", "etag-b", datetime(2020, 1, 3, tzinfo=timezone.utc)),
+    ]
+    monkeypatch.setattr(
+        "usaspending_api.etl.es_etl_helpers.retrieve_s3_bucket_object_list", lambda bucket_name: objects
+    )
+    monkeypatch.setattr("usaspending_api.etl.es_etl_helpers.stream_s3_object_lines", stream_s3_object_lines)
+    gather_config = {**config, "process_deletes": True, "s3_bucket": "bucket", "directory": tmp_path}
+
+    manifest = load_deleted_ids_manifest(gather_config)
+    deleted_ids = gather_deleted_ids(gather_config, manifest)
+    save_deleted_ids_manifest(gather_config, manifest)
+
+    assert deleted_ids == {
+        "CONT_TX_ABC": {"timestamp": datetime(2020, 1, 2, tzinfo=timezone.utc)},
+        "ASST_TX_DEF": {"timestamp": datetime(2020, 1, 3, tzinfo=timezone.utc)},
+    }
+    assert load_deleted_ids_manifest(gather_config) == {"a.csv": "etag-a", "b.csv": "etag-b"}
+
+    read.clear()
+    objects[1].e_tag = "etag-b2"
+    manifest = load_deleted_ids_manifest(gather_config)
+    assert gather_deleted_ids(gather_config, manifest) == {
+        "ASST_TX_DEF": {"timestamp": datetime(2020, 1, 3, tzinfo=timezone.utc)}
+    }
+    assert read == ["b.csv"]
+
+
+def test_deleted_ids_manifest_only_saved_when_deletes_succeed(monkeypatch, tmp_path):
+    delete_config = {**config, "load_type": "transactions", "process_deletes": True, "directory": tmp_path}
+    save_deleted_ids_manifest(delete_config, {"a.csv": "etag-a"})
+
+    def gather_deleted_ids(gather_config, manifest):
+        manifest["b.csv"] = "etag-b"
+        return {"CONT_TX_ABC": {"timestamp": datetime(2020, 1, 3, tzinfo=timezone.utc)}}
+
+    monkeypatch.setattr("usaspending_api.etl.es_etl_helpers.gather_deleted_ids", gather_deleted_ids)
+    monkeypatch.setattr(
+        "usaspending_api.etl.es_etl_helpers.delete_actions",
+        lambda *args: [{"_op_type": "delete", "_index": "idx", "_id": "t1"}],
+    )
+
+    bulk_error = {"delete": {"_index": "idx", "_id": "t1", "status": 429, "error": "es_rejected_execution_exception"}}
+    monkeypatch.setattr("usaspending_api.etl.es_etl_helpers.helpers.bulk", lambda *args, **kwargs: (0, [bulk_error]))
+    deleted_transactions(MagicMock(), delete_config)
+    assert load_deleted_ids_manifest(delete_config) == {"a.csv": "etag-a"}
+
+    monkeypatch.setattr("usaspending_api.etl.es_etl_helpers.helpers.bulk", lambda *args, **kwargs: (1, []))
+    deleted_transactions(MagicMock(), delete_config)
+    assert load_deleted_ids_manifest(delete_config) == {"a.csv": "etag-a", "b.csv": "etag-b"}
@@ -1,7 +1,9 @@
+import io
 import logging
+from datetime import date, datetime
 from psycopg2.extras import DictCursor
 from psycopg2 import Error
-from django.db import connection
+from django.db import connection, transaction
 
 from usaspending_api.etl.transaction_loaders.field_mappings_fpds import (
     transaction_fpds_nonboolean_columns,
@@ -99,6 +101,36 @@ def load_fpds_transactions(chunk):
     return retval
 
 
+def bulk_load_fpds_transactions(chunk):
+    """
+    Set-based equivalent of load_fpds_transactions:  the transformed chunk is copied into temporary tables and its
+    awards and transactions are matched, created, and updated with a few statements for the whole chunk instead of
+    several per transaction.  The chunk is loaded in one database transaction; if any statement fails, the chunk is
+    loaded again one transaction at a time so that the failing records are reported in failed_ids.
+
+    Concurrent loads must not share unique_award_keys (see the --processes option of load_fpds_transactions), or they
+    could both create the same award.
+
+    returns ids for each award touched
+    """
+    with Timer() as timer:
+        retval = []
+        if chunk:
+            broker_transactions = _extract_broker_objects(chunk)
+            if broker_transactions:
+                load_objects = _transform_objects(broker_transactions)
+                try:
+                    with transaction.atomic():
+                        retval = _bulk_load_transactions(load_objects)
+                except Error as e:
+                    logger.error(
+                        f"Bulk load failed, loading the batch one transaction at a time.\nDetails: {e.pgerror}"
+                    )
+                    retval = _load_transactions(load_objects)
+    logger.info("batch completed in {}".format(timer.as_string(timer.elapsed)))
+    return retval
+
+
 def _extract_broker_objects(id_list):
 
     connection.ensure_connection()
@@ -229,3 +261,163 @@ def _insert_fpds_transaction(cursor, load_object):
     transaction_fpds_id = insert_transaction_fpds(cursor, load_object)
     logger.debug("created fpds transaction {}".format(transaction_fpds_id))
     return transaction_fpds_id
+
+
+def _bulk_load_transactions(load_objects):
+    """
+    Match each transaction to an award and upsert transaction_normalized and transaction_fpds for a whole chunk,
+    with the same results as _load_transactions:
+      * A transaction belongs to the award with its unique_award_key.  Missing awards are created from the first
+        transaction with each key; transactions without a key each get a new award.
+      * A transaction updates the transaction_fpds (and transaction_normalized) record with its
+        detached_award_proc_unique, keeping create_date and created_at, or else is inserted.  When a chunk has
+        several records with the same detached_award_proc_unique, the last one is loaded.
+
+    returns ids for each award touched
+    """
+    connection.ensure_connection()
+    with connection.connection.cursor() as cursor:
+        _copy_to_temp_table(cursor, load_objects, "award", "awards")
+        _copy_to_temp_table(cursor, load_objects, "transaction_normalized", "transaction_normalized")
+        _copy_to_temp_table(cursor, load_objects, "transaction_fpds", "transaction_fpds")
+        award_ids = _bulk_upsert_awards(cursor, load_objects)
+        _bulk_upsert_transactions(cursor, load_objects)
+    return award_ids
+
+
+def _temp_table(table):
+    return f"temp_load_{table}"
+
+
+def _copy_to_temp_table(cursor, load_objects, type, table):
+    """
+    COPY one part of each load object into a temporary table with the column types of the table it's loaded into,
+    numbered in the order the records are processed
+    """
+    columns = list(load_objects[0][type])
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    cursor.execute(
+        f"DROP TABLE IF EXISTS {_temp_table(table)}; "
+        f"CREATE TEMPORARY TABLE {_temp_table(table)} ON COMMIT DROP AS "
+        f"SELECT 0 AS row_number, {column_list} FROM {table} WHERE false"
+    )
+    rows = io.StringIO()
+    for row_number, load_object in enumerate(load_objects):
+        values = [str(row_number)] + [_copy_text(load_object[type][column]) for column in columns]
+        rows.write("\t".join(values) + "\n")
+    rows.seek(0)
+    cursor.copy_expert(f"COPY {_temp_table(table)} (row_number, {column_list}) FROM STDIN", rows)
+    cursor.execute(f"ANALYZE {_temp_table(table)}")
+
+
+def _copy_text(value):
+    """A value in COPY's text format, as psycopg2 would render it for the column's type"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        text = "t" if value else "f"
+    elif isinstance(value, (datetime, date)):
+        text = value.isoformat()
+    elif isinstance(value, (list, tuple)):
+        elements = (
+            "NULL" if v is None else '"{}"'.format(str(v).replace("\\", "\\\\").replace('"', '\\"')) for v in value
+        )
+        text = "{{{}}}".format(",".join(elements))
+    else:
+        text = str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _bulk_upsert_awards(cursor, load_objects):
+    """Give each record in the award temporary table the id of its matching or newly created award"""
+    temp = _temp_table("awards")
+    columns = ", ".join(f'"{column}"' for column in load_objects[0]["award"])
+    cursor.execute(
+        f"""
+        ALTER TABLE {temp} ADD COLUMN award_id BIGINT, ADD COLUMN is_new BOOLEAN NOT NULL DEFAULT false;
+
+        UPDATE {temp} t SET award_id = a.id
+        FROM awards a
+        WHERE a.generated_unique_award_id = t.generated_unique_award_id;
+
+        UPDATE {temp} SET award_id = nextval(pg_get_serial_sequence('awards', 'id')), is_new = true
+        WHERE row_number IN (
+            SELECT DISTINCT ON (generated_unique_award_id, keyless_row_number) row_number
+            FROM (
+                SELECT *, CASE WHEN generated_unique_award_id IS NULL THEN row_number END AS keyless_row_number
+                FROM {temp}
+                WHERE award_id IS NULL
+            ) AS t
+            ORDER BY generated_unique_award_id, keyless_row_number, row_number
+        );
+
+        UPDATE {temp} t SET award_id = n.award_id
+        FROM {temp} n
+        WHERE t.award_id IS NULL AND n.is_new AND n.generated_unique_award_id = t.generated_unique_award_id;
+
+        INSERT INTO awards (id, {columns})
+        SELECT award_id, {columns} FROM {temp} WHERE is_new ORDER BY row_number;
+
+        SELECT DISTINCT award_id FROM {temp};
+        """
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _bulk_upsert_transactions(cursor, load_objects):
+    """Update or insert the last transaction_normalized and transaction_fpds records of each transaction in the chunk"""
+    awards = _temp_table("awards")
+    normalized = _temp_table("transaction_normalized")
+    fpds = _temp_table("transaction_fpds")
+    normalized_columns = list(load_objects[0]["transaction_normalized"])
+    fpds_columns = list(load_objects[0]["transaction_fpds"])
+
+    def column_list(columns, prefix=""):
+        return ", ".join(f'{prefix}"{column}"' for column in columns)
+
+    def set_list(columns):
+        return ", ".join(
+            f'"{column}" = t."{column}"' for column in columns if column not in ("create_date", "created_at")
+        )
+
+    cursor.execute(
+        f"""
+        DELETE FROM {fpds} t
+        USING {fpds} later
+        WHERE later.detached_award_proc_unique = t.detached_award_proc_unique AND later.row_number > t.row_number;
+
+        ALTER TABLE {fpds} ADD COLUMN transaction_id BIGINT, ADD COLUMN is_new BOOLEAN NOT NULL DEFAULT false;
+
+        UPDATE {fpds} t SET transaction_id = f.transaction_id
+        FROM transaction_fpds f
+        WHERE f.detached_award_proc_unique = t.detached_award_proc_unique;
+
+        UPDATE {fpds}
+        SET transaction_id = nextval(pg_get_serial_sequence('transaction_normalized', 'id')), is_new = true
+        WHERE transaction_id IS NULL;
+
+        UPDATE transaction_normalized n
+        SET {set_list(normalized_columns)}, award_id = a.award_id
+        FROM {normalized} t
+        JOIN {fpds} f ON f.row_number = t.row_number
+        JOIN {awards} a ON a.row_number = t.row_number
+        WHERE n.id = f.transaction_id AND NOT f.is_new;
+
+        UPDATE transaction_fpds n
+        SET {set_list(fpds_columns)}, transaction_id = t.transaction_id
+        FROM {fpds} t
+        WHERE n.detached_award_proc_unique = t.detached_award_proc_unique AND NOT t.is_new;
+
+        INSERT INTO transaction_normalized (id, award_id, {column_list(normalized_columns)})
+        SELECT f.transaction_id, a.award_id, {column_list(normalized_columns, "t.")}
+        FROM {normalized} t
+        JOIN {fpds} f ON f.row_number = t.row_number
+        JOIN {awards} a ON a.row_number = t.row_number
+        WHERE f.is_new
+        ORDER BY t.row_number;
+
+        INSERT INTO transaction_fpds (transaction_id, {column_list(fpds_columns)})
+        SELECT transaction_id, {column_list(fpds_columns)} FROM {fpds} WHERE is_new ORDER BY row_number;
+        """
+    )
+    logger.debug("upserted {} fpds transactions".format(len(load_objects)))
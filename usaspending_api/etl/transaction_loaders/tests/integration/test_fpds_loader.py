@@ -5,7 +5,7 @@ import pytest
 from django.core.management import call_command
 from model_mommy import mommy
 
-from usaspending_api.awards.models import Award, TransactionFPDS
+from usaspending_api.awards.models import Award, TransactionFPDS, TransactionNormalized
 from usaspending_api.etl.transaction_loaders.field_mappings_fpds import (
     transaction_fpds_nonboolean_columns,
     transaction_normalized_nonboolean_columns,
@@ -114,3 +114,45 @@ def test_load_source_procurement_by_ids():
     assert transactions_by_id[101].fiscal_year == 2010
     assert transactions_by_id[201].fiscal_year == 2010
     assert transactions_by_id[301].fiscal_year == 2011
+
+
+def _loaded_values():
+    """Everything loaded except the ids and load times, which differ from load to load"""
+    ignored = {"id", "award_id", "transaction_id", "create_date", "update_date", "latest_transaction_id"}
+    return {
+        "awards": sorted(
+            str({k: v for k, v in award.items() if k not in ignored})
+            for award in Award.objects.values("generated_unique_award_id", "transaction_unique_id", "piid")
+        ),
+        "transactions": sorted(
+            str({k: v for k, v in transaction.items() if k not in ignored})
+            for transaction in TransactionNormalized.objects.values()
+        ),
+        "transaction_fpds": sorted(
+            str({k: v for k, v in fpds.items() if k not in ignored}) for fpds in TransactionFPDS.objects.values()
+        ),
+    }
+
+
+@pytest.mark.django_db
+def test_bulk_load_matches_load_by_record():
+    source_procurement_id_list = [101, 201, 301]
+    _assemble_source_procurement_records(source_procurement_id_list)
+
+    call_command("load_fpds_transactions", "--ids", *source_procurement_id_list)
+    expected = _loaded_values()
+
+    # Reloading updates the same records
+    call_command("load_fpds_transactions", "--bulk", "--ids", *source_procurement_id_list)
+    assert _loaded_values() == expected
+    assert TransactionFPDS.objects.count() == 3
+
+    # Loading into an empty database creates the same records
+    Award.objects.update(latest_transaction=None, earliest_transaction=None)
+    TransactionFPDS.objects.all().delete()
+    TransactionNormalized.objects.all().delete()
+    Award.objects.all().delete()
+    call_command("load_fpds_transactions", "--bulk", "--ids", *source_procurement_id_list)
+    assert _loaded_values() == expected
+    assert Award.objects.get().transaction_unique_id == "101"
+    assert len({fpds.transaction.award_id for fpds in TransactionFPDS.objects.all()}) == 1
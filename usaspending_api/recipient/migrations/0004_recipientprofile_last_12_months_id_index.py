@@ -0,0 +1,17 @@
+# Generated by Django 2.2.28 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipient', '0003_auto_20200312_1656'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipientprofile',
+            index=models.Index(fields=['last_12_months', 'id'], name='recipient_p_last_12_05f267_idx'),
+        ),
+    ]
@@ -102,7 +102,11 @@ class RecipientProfile(models.Model):
         #     create index idx_recipient_profile_name on
         #         public.recipient_profile using gin (recipient_name public.gin_trgm_ops)
         #
-        indexes = [GinIndex(fields=["award_types"]), models.Index(fields=["recipient_unique_id"])]
+        indexes = [
+            GinIndex(fields=["award_types"]),
+            models.Index(fields=["recipient_unique_id"]),
+            models.Index(fields=["-last_12_months", "-id"]),
+        ]
 
 
 class RecipientLookup(models.Model):
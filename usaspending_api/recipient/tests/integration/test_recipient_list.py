@@ -3,6 +3,7 @@ import datetime
 import pytest
 
 # Core Django imports
+from django.db import connection
 
 # Third-party app imports
 from rest_framework import status
@@ -10,7 +11,9 @@ from model_mommy import mommy
 
 # Imports from your apps
 from usaspending_api.common.helpers.fiscal_year_helpers import generate_fiscal_year
+from usaspending_api.common.pagination import get_keyset_queryset, paginate_by_keyset
 from usaspending_api.recipient.models import RecipientProfile
+from usaspending_api.recipient.v2.lookups import SPECIAL_CASES
 from usaspending_api.recipient.v2.views.list_recipients import get_recipients
 
 # Getting relative dates as the 'latest'/default argument returns results relative to when it gets called
@@ -193,3 +196,111 @@ def test_award_type_filter():
     assert results[0]["recipient_level"] == "C"
     assert float(results[0]["amount"]) == float(99.99)
     assert results[0]["id"] == "5770e860-0f7b-69f1-182f-4d6966ebaa62-C"
+
+
+@pytest.mark.django_db
+def test_db_cursorpagination(client):
+    # Ties and nulls on the sort column are broken by id so that no recipient is skipped or repeated
+    names = ["ALPHA", "BRAVO", "BRAVO", None, "CHARLIE", "DELTA", "BRAVO"]
+    for i, name in enumerate(names):
+        mommy.make(
+            RecipientProfile,
+            id=i + 1,
+            recipient_level="R",
+            recipient_hash=f"00077a9a-5a70-8919-fd19-330762af6b8{i}",
+            recipient_unique_id=str(i).zfill(9),
+            recipient_name=name,
+            last_12_months=100.00 if i % 2 else 50.00,
+        )
+
+    for sort, order in [("name", "asc"), ("name", "desc"), ("amount", "desc"), ("duns", "asc")]:
+        filters = {"limit": 2, "page": 1, "order": order, "sort": sort, "award_type": "all", "cursor": None}
+        seen = []
+        while True:
+            results, meta = get_recipients(filters=filters)
+            assert meta["total"] == len(names)
+            seen.extend(result["id"] for result in results)
+            if not meta["hasNext"]:
+                break
+            filters["cursor"] = meta["next_cursor"]
+        assert len(seen) == len(set(seen)) == len(names)
+
+    filters = {"limit": 4, "page": 1, "order": "asc", "sort": "name", "award_type": "all", "cursor": None}
+    results, meta = get_recipients(filters=filters)
+    assert [r["name"] for r in results] == ["ALPHA", "BRAVO", "BRAVO", "BRAVO"]
+    filters["cursor"] = meta["next_cursor"]
+    results, meta = get_recipients(filters=filters)
+    assert [r["name"] for r in results] == ["CHARLIE", "DELTA", None]
+    assert meta["next_cursor"] is None
+
+    resp = client.post(
+        list_recipients_endpoint(),
+        content_type="application/json",
+        data={"limit": 3, "sort": "duns", "order": "asc", "cursor": None, "skip_count": True},
+    )
+    assert resp.status_code == status.HTTP_200_OK
+    assert "total" not in resp.data["page_metadata"]
+    assert [r["duns"] for r in resp.data["results"]] == ["000000000", "000000001", "000000002"]
+
+    resp = client.post(
+        list_recipients_endpoint(),
+        content_type="application/json",
+        data={"limit": 3, "sort": "name", "order": "asc", "cursor": resp.data["page_metadata"]["next_cursor"]},
+    )
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_skip_count_page_metadata(client):
+    for i in range(3):
+        mommy.make(
+            RecipientProfile,
+            recipient_level="R",
+            recipient_hash=f"00077a9a-5a70-8919-fd19-330762af6b8{i}",
+            recipient_unique_id=str(i).zfill(9),
+            recipient_name=f"RECIPIENT {i}",
+        )
+
+    resp = client.post(
+        list_recipients_endpoint(),
+        content_type="application/json",
+        data={"limit": 2, "page": 1, "sort": "duns", "order": "asc", "skip_count": True},
+    )
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.data["page_metadata"] == {
+        "page": 1,
+        "limit": 2,
+        "next": 2,
+        "previous": None,
+        "hasNext": True,
+        "hasPrevious": False,
+    }
+    assert [r["duns"] for r in resp.data["results"]] == ["000000000", "000000001"]
+
+
+@pytest.mark.django_db
+def test_db_cursordeep_page_reads_amount_index():
+    for i in range(20):
+        mommy.make(
+            RecipientProfile,
+            id=i + 1,
+            recipient_level="R",
+            recipient_hash=f"00077a9a-5a70-8919-fd19-330762af6b{i:02}",
+            recipient_name=f"RECIPIENT {i}",
+            last_12_months=i % 5,
+        )
+
+    ordering = ["-last_12_months", "-id"]
+    queryset = RecipientProfile.objects.values("id", "recipient_name", "last_12_months").exclude(
+        recipient_name__in=SPECIAL_CASES
+    )
+    _, cursor = paginate_by_keyset(queryset, ordering, 10)
+
+    # The default amount sort seeks into the (last_12_months DESC, id DESC) index and reads it in order
+    with connection.cursor() as db_cursor:
+        db_cursor.execute("SET LOCAL enable_seqscan = off")
+        db_cursor.execute("SET LOCAL enable_bitmapscan = off")
+    plan = get_keyset_queryset(queryset, ordering, cursor)[:11].explain()
+    assert "recipient_p_last_12_599480_idx" in plan
+    assert "Index Cond" in plan
+    assert "Sort" not in plan
@@ -6,7 +6,8 @@ from rest_framework.views import APIView
 from django.db.models import F, Q
 
 from usaspending_api.common.cache_decorator import cache_response
-from usaspending_api.common.helpers.generic_helper import get_pagination_metadata
+from usaspending_api.common.helpers.generic_helper import get_pagination_metadata, get_simple_pagination_metadata
+from usaspending_api.common.pagination import paginate_by_keyset
 from usaspending_api.common.validator.pagination import PAGINATION
 from usaspending_api.common.validator.tinyshield import TinyShield
 from usaspending_api.common.validator.utils import update_model_in_list
@@ -42,34 +43,51 @@ def get_recipients(filters={}):
 
     queryset = (
         RecipientProfile.objects.filter(qs_filter)
-        .values("recipient_level", "recipient_hash", "recipient_unique_id", "recipient_name", amount_column)
+        .values("id", "recipient_level", "recipient_hash", "recipient_unique_id", "recipient_name", amount_column)
         .exclude(recipient_name__in=SPECIAL_CASES)
     )
 
     api_to_db_mapper = {"amount": amount_column, "duns": "recipient_unique_id", "name": "recipient_name"}
 
+    if "cursor" in filters:
+        # Keyset pagination: seek to the last row of the previous page instead of skipping every row before this one
+        prefix = "-" if filters["order"] == "desc" else ""
+        ordering = [prefix + api_to_db_mapper[filters["sort"]], prefix + "id"]
+        rows, next_cursor = paginate_by_keyset(queryset, ordering, filters["limit"], filters["cursor"])
+        page_metadata = {"limit": filters["limit"], "next_cursor": next_cursor, "hasNext": next_cursor is not None}
+        if not filters.get("skip_count"):
+            page_metadata["total"] = queryset.count()
+        return [format_recipient(row, amount_column) for row in rows], page_metadata
+
     if filters["order"] == "desc":
         queryset = queryset.order_by(F(api_to_db_mapper[filters["sort"]]).desc(nulls_last=True))
     else:
         queryset = queryset.order_by(F(api_to_db_mapper[filters["sort"]]).asc(nulls_last=True))
 
+    if filters.get("skip_count"):
+        rows = list(queryset[lower_limit : upper_limit + 1])
+        page_metadata = get_simple_pagination_metadata(len(rows), filters["limit"], filters["page"])
+        page_metadata["limit"] = filters["limit"]
+        return [format_recipient(row, amount_column) for row in rows[: filters["limit"]]], page_metadata
+
     count = queryset.count()
     page_metadata = get_pagination_metadata(count, filters["limit"], filters["page"])
 
-    results = [
-        {
-            "id": "{}-{}".format(row["recipient_hash"], row["recipient_level"]),
-            "duns": row["recipient_unique_id"],
-            "name": row["recipient_name"],
-            "recipient_level": row["recipient_level"],
-            "amount": row[amount_column],
-        }
-        for row in queryset[lower_limit:upper_limit]
-    ]
+    results = [format_recipient(row, amount_column) for row in queryset[lower_limit:upper_limit]]
 
     return results, page_metadata
 
 
+def format_recipient(row, amount_column):
+    return {
+        "id": "{}-{}".format(row["recipient_hash"], row["recipient_level"]),
+        "duns": row["recipient_unique_id"],
+        "name": row["recipient_name"],
+        "recipient_level": row["recipient_level"],
+        "amount": row[amount_column],
+    }
+
+
 class ListRecipients(APIView):
     """
     This route takes a single keyword filter (and pagination filters), and returns a list of recipients
@@ -83,6 +101,8 @@ class ListRecipients(APIView):
         models = [
             {"name": "keyword", "key": "keyword", "type": "text", "text_type": "search"},
             {"name": "award_type", "key": "award_type", "type": "enum", "enum_values": award_types, "default": "all"},
+            {"name": "cursor", "key": "cursor", "type": "text", "text_type": "raw", "allow_nulls": True},
+            {"name": "skip_count", "key": "skip_count", "type": "boolean", "default": False},
         ]
         models.extend(copy.deepcopy(PAGINATION))  # page, limit, sort, order
 
@@ -1,6 +1,7 @@
 from rest_framework import status
 
 from usaspending_api.download.lookups import CFO_CGACS
+from usaspending_api.references.v2.views.filter_tree.tas_filter_tree import TASFilterTree
 
 base_query = "/api/v2/references/filter_tree/tas/"
 common_query = base_query + "?depth=0"
@@ -54,6 +55,14 @@ def test_positive_depth(client, cfo_agencies):
     assert len([elem["children"][0] for elem in resp.json()["results"]]) == 5
 
 
+# Is the whole tree loaded with one query and then searched in memory?
+def test_tree_loaded_once(cfo_agencies, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        assert len(TASFilterTree().search(None, None, None, 2, None)) == 5
+        assert len(TASFilterTree().search(CFO_CGACS[1], None, None, 1, None)) == 1
+        assert TASFilterTree().search(None, None, None, 0, "no match") == []
+
+
 def _call_and_expect_200(client, url):
     resp = client.get(url)
     assert resp.status_code == status.HTTP_200_OK, "Failed to return 200 Response"
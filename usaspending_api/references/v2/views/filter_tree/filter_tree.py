@@ -1,9 +1,17 @@
+import threading
+import time
+
 from abc import ABCMeta, abstractmethod
+from collections import defaultdict
 from dataclasses import dataclass
-from typing import Any
+from django.conf import settings
+from typing import Callable, Iterable, Optional
 
 DEFAULT_CHILDREN = 0
 
+_LOADED = {}
+_LOAD_LOCK = threading.Lock()
+
 
 @dataclass
 class UnlinkedNode:
@@ -12,6 +20,19 @@ class UnlinkedNode:
     description: str
 
 
+@dataclass
+class IndexedNode:
+    id: str
+    ancestors: list
+    description: str
+    count: int
+    search_text: str  # lowercase id and description, for matching filter strings
+
+    @property
+    def path(self):
+        return tuple(self.ancestors) + (self.id,)
+
+
 @dataclass
 class Node:
     id: str
@@ -31,6 +52,12 @@ class Node:
 
 
 class FilterTree(metaclass=ABCMeta):
+    """
+    The whole tree is loaded into memory, with child counts and search text computed up front, the first time it is
+    searched in a process and then again once it is older than FILTER_TREE_MAX_AGE_SECONDS so that data loads are
+    picked up.  Searches never touch the database in between.
+    """
+
     def search(self, tier1, tier2, tier3, child_layers, filter_string) -> list:
         if tier3:
             ancestor_array = [tier1, tier2, tier3]
@@ -41,59 +68,79 @@ class FilterTree(metaclass=ABCMeta):
         else:
             ancestor_array = []
 
+        tree = load_cached(type(self).__name__, self._build_tree)
+        filter_string = filter_string.lower() if filter_string else None
         retval = [
-            self._linked_node_from_data(ancestor_array, elem, filter_string, child_layers)
-            for elem in self.raw_search(ancestor_array)
-        ]
-        if filter_string:
-            retval = [elem for elem in retval if self.matches_filter(elem, filter_string)]
-        return retval
-
-    def _linked_node_from_data(self, ancestor_array, data, filter_string, child_layers):
-        retval = self.unlinked_node_from_data(ancestor_array, data)
-        raw_children = self.raw_search(ancestor_array + [retval.id])
-        temp_children = [
-            self._linked_node_from_data(ancestor_array + [retval.id], elem, filter_string, child_layers - 1)
-            for elem in raw_children
+            self._linked_node(tree, elem, child_layers, filter_string) for elem in tree.get(tuple(ancestor_array), [])
         ]
+        return [elem for elem in retval if elem is not None]
+
+    def _build_tree(self) -> dict:
+        """Index every node of the tree by the path to its parent and count each node's children"""
+        tree = defaultdict(list)
+        nodes = []
+        for unlinked_node in self.load_tree():
+            node = IndexedNode(
+                id=unlinked_node.id,
+                ancestors=unlinked_node.ancestors,
+                description=unlinked_node.description,
+                count=0,
+                search_text=f"{unlinked_node.id}\0{unlinked_node.description}".lower(),
+            )
+            tree[tuple(node.ancestors)].append(node)
+            nodes.append(node)
+
+        # A childless child counts as one, so count the deepest nodes first
+        for node in sorted(nodes, key=lambda n: len(n.ancestors), reverse=True):
+            node.count = sum(child.count or 1 for child in tree.get(node.path, []))
+        return dict(tree)
+
+    def _linked_node(self, tree, node, child_layers, filter_string) -> Optional[Node]:
+        """
+        Returns None if filter_string matches neither the node nor any of the descendants being returned with it.
+        The descendants of a node which matches are returned unfiltered.
+        """
+        if filter_string and filter_string in node.search_text:
+            filter_string = None
+
+        children = None
         if child_layers:
-            children = temp_children
-        else:
-            children = None
+            children = [
+                self._linked_node(tree, elem, child_layers - 1, filter_string) for elem in tree.get(node.path, [])
+            ]
+            children = [elem for elem in children if elem is not None]
+        if filter_string and not children:
+            return None
 
         return Node(
-            id=retval.id,
-            ancestors=retval.ancestors,
-            description=retval.description,
-            count=sum([node.count if node.count else 1 for node in temp_children]),
+            id=node.id,
+            ancestors=list(node.ancestors),
+            description=node.description,
+            count=node.count,
             children=children,
         )
 
     @abstractmethod
-    def raw_search(self, tiered_keys: list, filter_string: str) -> list:
+    def load_tree(self) -> Iterable[UnlinkedNode]:
         """
-        Basic unit of searching, given the path to the parent and the filter string. Output can be a list of any type, and is
-        only used by the unlinked_node_from_data abstract function.
-
-        :param: tiered_keys - list
-        :param: filter_string - string or null
-
+        Every node of the tree, in the order they should be returned in.  A node's ancestors are the ids of the nodes
+        on the path to it from the top of the tree.
         """
         pass
 
-    @abstractmethod
-    def unlinked_node_from_data(self, ancestors: list, data: Any) -> UnlinkedNode:
-        """
-        :param ancestors: list
-        :param data: Single member of the list provided by raw_search
-        :return: Unlinked Node
-        """
-        pass
 
-    def matches_filter(self, node: Node, filter_string) -> bool:
-        if (filter_string.lower() in node.id.lower()) or (filter_string.lower() in node.description.lower()):
-            return True
-        if node.children:
-            node.children = [elem for elem in node.children if self.matches_filter(elem, filter_string)]
-            return len(node.children) > 0
-        return False
+def load_cached(key: str, loader: Callable):
+    """Return loader's result, calling it at most once per FILTER_TREE_MAX_AGE_SECONDS in each process"""
+    loaded = _LOADED.get(key)
+    if loaded is None or time.monotonic() - loaded[0] > settings.FILTER_TREE_MAX_AGE_SECONDS:
+        with _LOAD_LOCK:
+            loaded = _LOADED.get(key)
+            if loaded is None or time.monotonic() - loaded[0] > settings.FILTER_TREE_MAX_AGE_SECONDS:
+                loaded = (time.monotonic(), loader())
+                _LOADED[key] = loaded
+    return loaded[1]
+
+
+def clear_filter_tree_cache():
+    """Drop every loaded tree, e.g. after a data load or between tests"""
+    _LOADED.clear()
@@ -1,5 +1,5 @@
 import logging
-from collections import OrderedDict
+from collections import Counter, OrderedDict
 
 from rest_framework.request import Request
 from rest_framework.response import Response
@@ -10,11 +10,24 @@ from django.db.models import Q
 from usaspending_api.common.cache_decorator import cache_response
 from usaspending_api.common.validator.tinyshield import TinyShield
 from usaspending_api.references.models import NAICS
-from usaspending_api.references.v2.views.filter_tree.filter_tree import DEFAULT_CHILDREN
+from usaspending_api.references.v2.views.filter_tree.filter_tree import DEFAULT_CHILDREN, load_cached
 
 logger = logging.getLogger("console")
 
 
+def six_digit_naics_count(code: str) -> int:
+    """Number of six digit NAICS codes under code, from counts of every two and four digit prefix loaded up front"""
+    return load_cached("NAICS", _count_six_digit_naics).get(code, 0)
+
+
+def _count_six_digit_naics():
+    counts = Counter()
+    for code in NAICS.objects.annotate(text_len=Length("code")).filter(text_len=6).values_list("code", flat=True):
+        counts[code[:2]] += 1
+        counts[code[:4]] += 1
+    return counts
+
+
 class NAICSViewSet(APIView):
     """
     Return a list of NAICS or a filtered list of NAICS
@@ -55,11 +68,7 @@ class NAICSViewSet(APIView):
                 result = OrderedDict()
                 result["naics"] = naic.code
                 result["naics_description"] = naic.description
-                result["count"] = (
-                    NAICS.objects.annotate(text_len=Length("code"))
-                    .filter(code__startswith=naic.code, text_len=6)
-                    .count()
-                )
+                result["count"] = six_digit_naics_count(naic.code)
             else:
                 result = OrderedDict()
                 result["naics"] = naic.code
@@ -100,9 +109,7 @@ class NAICSViewSet(APIView):
             result = OrderedDict()
             result["naics"] = naic.code
             result["naics_description"] = naic.description
-            result["count"] = (
-                NAICS.objects.annotate(text_len=Length("code")).filter(code__startswith=naic.code, text_len=6).count()
-            )
+            result["count"] = six_digit_naics_count(naic.code)
             result["children"] = []
             tier2_results[naic.code] = result
 
@@ -118,9 +125,7 @@ class NAICSViewSet(APIView):
             result = OrderedDict()
             result["naics"] = naic.code
             result["naics_description"] = naic.description
-            result["count"] = (
-                NAICS.objects.annotate(text_len=Length("code")).filter(code__startswith=naic.code, text_len=6).count()
-            )
+            result["count"] = six_digit_naics_count(naic.code)
             result["children"] = []
             tier1_results[naic.code] = result
         for key in tier2_results.keys():
@@ -140,9 +145,7 @@ class NAICSViewSet(APIView):
             result = OrderedDict()
             result["naics"] = naic.code
             result["naics_description"] = naic.description
-            result["count"] = (
-                NAICS.objects.annotate(text_len=Length("code")).filter(code__startswith=naic.code, text_len=6).count()
-            )
+            result["count"] = six_digit_naics_count(naic.code)
             results.append(result)
         results.sort(key=lambda x: x["naics"])
         response_content = OrderedDict({"results": results})
@@ -168,11 +171,7 @@ class NAICSViewSet(APIView):
             if len(naic.code) < 6:
                 result["naics"] = naic.code
                 result["naics_description"] = naic.description
-                result["count"] = (
-                    NAICS.objects.annotate(text_len=Length("code"))
-                    .filter(code__startswith=naic.code, text_len=6)
-                    .count()
-                )
+                result["count"] = six_digit_naics_count(naic.code)
                 result["children"] = self._fetch_children(naic.code)
             else:
                 result["naics"] = naic.code
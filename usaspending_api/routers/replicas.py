@@ -1,33 +1,223 @@
+import logging
+import os
+import psycopg2
 import random
+import threading
+import time
 
-from django.db import DEFAULT_DB_ALIAS
+from contextlib import closing
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, InterfaceError, OperationalError
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.deprecation import MiddlewareMixin
 from usaspending_api.references.models import FilterHash
 from usaspending_api.download.models import DownloadJob
 
+logger = logging.getLogger("console")
+
+# Seconds of replay lag, which is 0 when everything received has been replayed (i.e. the source is idle)
+REPLICATION_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+# Weight given to each new query duration in a database's moving average
+LATENCY_SMOOTHING = 0.1
+
+# Latency assumed for a database until its first health check or query
+DEFAULT_LATENCY_SECONDS = 0.01
+
+_request_state = threading.local()
+
+
+class DatabaseStats:
+    """Health, replication lag, and load of one database as seen by this process"""
+
+    def __init__(self):
+        self.healthy = True
+        self.lag_seconds = 0.0
+        self.latency_seconds = None
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def query_started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def query_finished(self, seconds):
+        with self.lock:
+            self.in_flight -= 1
+            self.record_latency(seconds)
+
+    def record_latency(self, seconds):
+        if self.latency_seconds is None:
+            self.latency_seconds = seconds
+        else:
+            self.latency_seconds += LATENCY_SMOOTHING * (seconds - self.latency_seconds)
+
+    @property
+    def weight(self):
+        """Faster and less busy databases get proportionally more reads"""
+        return 1 / ((self.latency_seconds or DEFAULT_LATENCY_SECONDS) * (1 + self.in_flight))
+
+
+class ReplicaMonitor:
+    """
+    Tracks every database the router reads from.  Query latency and in-flight queries are measured by wrapping the
+    queries run on each connection, and a background thread checks each read replica's health and replication lag
+    every READ_REPLICA_HEALTH_CHECK_SECONDS.  A replica whose query fails with a connection error is treated as
+    unhealthy until its next successful health check.
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self.replicas = []
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def start(self, databases, replicas):
+        """Start watching databases in this process, once; the health check thread doesn't survive a fork"""
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.stats = {alias: DatabaseStats() for alias in databases}
+            self.replicas = list(replicas)
+            if self.replicas:
+                threading.Thread(target=self._check_health_forever, name="Replica health check", daemon=True).start()
+            self.pid = os.getpid()
+
+    def available(self, databases):
+        """The databases currently in rotation (the writable database always is)"""
+        return [
+            alias
+            for alias in databases
+            if alias not in self.replicas
+            or (self.stats[alias].healthy and self.stats[alias].lag_seconds <= settings.READ_REPLICA_MAX_LAG_SECONDS)
+        ]
+
+    def choose(self, databases):
+        databases = self.available(databases)
+        return random.choices(databases, weights=[self.stats[alias].weight for alias in databases])[0]
+
+    def _check_health_forever(self):
+        while True:
+            for alias in self.replicas:
+                self.check_health(alias)
+            time.sleep(settings.READ_REPLICA_HEALTH_CHECK_SECONDS)
+
+    def check_health(self, alias):
+        stats = self.stats[alias]
+        config = settings.DATABASES[alias]
+        start = time.perf_counter()
+        try:
+            # OPTIONS (e.g. sslmode and the statement_timeout) apply to the probe as they do to Django's connections,
+            # except for isolation_level, which Django sets on the connection rather than passing to psycopg2
+            connection = psycopg2.connect(
+                dbname=config["NAME"],
+                user=config["USER"],
+                password=config["PASSWORD"],
+                host=config["HOST"],
+                port=config["PORT"] or None,
+                **{
+                    **{key: value for key, value in config.get("OPTIONS", {}).items() if key != "isolation_level"},
+                    "connect_timeout": max(1, int(settings.READ_REPLICA_HEALTH_CHECK_SECONDS)),
+                },
+            )
+            with closing(connection), connection.cursor() as cursor:
+                cursor.execute(REPLICATION_LAG_SQL)
+                stats.lag_seconds = float(cursor.fetchone()[0])
+        except psycopg2.Error:
+            if stats.healthy:
+                logger.exception("Read replica {} failed its health check and is out of rotation".format(alias))
+            stats.healthy = False
+            return
+
+        if stats.latency_seconds is None:
+            stats.record_latency(time.perf_counter() - start)
+        if not stats.healthy:
+            logger.info("Read replica {} passed its health check and is back in rotation".format(alias))
+        stats.healthy = True
+        if stats.lag_seconds > settings.READ_REPLICA_MAX_LAG_SECONDS:
+            logger.warning("Read replica {} is {:.0f}s behind and out of rotation".format(alias, stats.lag_seconds))
+
+    def track_query(self, alias):
+        def execute_wrapper(execute, sql, params, many, context):
+            stats = self.stats.get(alias)
+            if stats is None:
+                return execute(sql, params, many, context)
+            stats.query_started()
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            except (OperationalError, InterfaceError):
+                if alias in self.replicas:
+                    stats.healthy = False
+                raise
+            finally:
+                stats.query_finished(time.perf_counter() - start)
+
+        execute_wrapper.replica_monitor = self
+        return execute_wrapper
+
+
+MONITOR = ReplicaMonitor()
+
+
+@receiver(connection_created)
+def _track_connection_queries(sender, connection, **kwargs):
+    """Measure the queries run on every database the router balances reads between"""
+    if not settings.DATABASE_READ_REPLICAS:
+        return
+    if connection.alias not in [DEFAULT_DB_ALIAS] + settings.DATABASE_READ_REPLICAS:
+        return
+    if not any(getattr(wrapper, "replica_monitor", None) is MONITOR for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(MONITOR.track_query(connection.alias))
+
+
+class ReadYourWritesMiddleware(MiddlewareMixin):
+    """Forget the previous request's writes so that READ_REPLICA_READ_YOUR_WRITES only pins reads within a request"""
+
+    def process_request(self, request):
+        _request_state.wrote = False
+
 
 class ReadReplicaRouter:
     """
     The USAspending API is *mostly* a readonly application.  This router is used to balance loads
     between multiple databases defined by the environment variables in settings.py, and handle
     the models that are *not* readonly appropriately.  Also prevents model access/migrations to Broker.
+
+    Reads are weighted towards the databases with the lowest recent query latency and fewest queries in flight, and
+    read replicas which are lagging or failing health checks are skipped (see ReplicaMonitor).
     """
 
     writable_database = DEFAULT_DB_ALIAS
-    read_replicas = ["db_r1"]
+    read_replicas = None  # settings.DATABASE_READ_REPLICAS
 
     def __init__(self):
+        if self.read_replicas is None:
+            self.read_replicas = settings.DATABASE_READ_REPLICAS
         self.usaspending_databases = [self.writable_database] + self.read_replicas
 
     def db_for_read(self, model, **hints):
         """
         FilterHash and DownloadJob are writable tables so always read from source (default) to
-        mitigate replication lag.  Otherwise, choose a connection randomly.
+        mitigate replication lag.  Otherwise, choose a connection by weight.
         """
-        if model in [FilterHash, DownloadJob]:
+        if model in [FilterHash, DownloadJob] or not self.read_replicas:
+            return self.writable_database
+        if settings.READ_REPLICA_READ_YOUR_WRITES and getattr(_request_state, "wrote", False):
             return self.writable_database
-        return random.choice(self.usaspending_databases)
+        MONITOR.start(self.usaspending_databases, self.read_replicas)
+        return MONITOR.choose(self.usaspending_databases)
 
     def db_for_write(self, model, **hints):
+        _request_state.wrote = True
         return self.writable_database
 
     def allow_relation(self, obj1, obj2, **hints):
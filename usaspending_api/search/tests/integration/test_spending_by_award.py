@@ -7,6 +7,7 @@ from rest_framework import status
 from usaspending_api.awards.v2.lookups.lookups import all_award_types_mappings
 from usaspending_api.search.tests.data.search_filters_test_data import non_legacy_filters, legacy_filters
 from usaspending_api.search.tests.data.utilities import setup_elasticsearch_test
+from usaspending_api.search.v2.views.spending_by_award import SpendingByAwardVisualizationViewSet
 
 
 @pytest.mark.django_db
@@ -1330,3 +1331,44 @@ def test_search_after(client, monkeypatch, spending_by_award_test_data, elastics
     assert resp.status_code == status.HTTP_200_OK
     assert len(resp.json().get("results")) == 2
     assert resp.json().get("results") == expected_result, "Award Type Code filter does not match expected result"
+
+
+@pytest.mark.django_db
+def test_agencies_and_recipients_resolved_in_batches(django_assert_num_queries):
+    mommy.make("references.ToptierAgency", toptier_agency_id=1, toptier_code="001")
+    mommy.make("references.ToptierAgency", toptier_agency_id=2, toptier_code="002")
+    mommy.make("references.Agency", id=11, toptier_agency_id=1, toptier_flag=True)
+    mommy.make("references.Agency", id=12, toptier_agency_id=2, toptier_flag=True)
+    mommy.make("submissions.SubmissionAttributes", toptier_code="001")
+    mommy.make("recipient.RecipientLookup", recipient_hash="00000000-0000-0000-0000-000000000001", duns="111")
+    mommy.make(
+        "recipient.RecipientProfile",
+        recipient_hash="00000000-0000-0000-0000-000000000001",
+        recipient_level="R",
+        recipient_name="RECIPIENT 1",
+    )
+    mommy.make(
+        "recipient.RecipientProfile",
+        recipient_hash="00000000-0000-0000-0000-000000000001",
+        recipient_level="C",
+        recipient_name="RECIPIENT 1",
+    )
+    view = SpendingByAwardVisualizationViewSet()
+    view.fields = ["Award ID", "recipient_id"]
+    results = [
+        {"recipient_id": "111", "parent_recipient_unique_id": None},
+        {"recipient_id": "111", "parent_recipient_unique_id": "222"},
+        {"recipient_id": "333", "parent_recipient_unique_id": None},
+    ]
+
+    with django_assert_num_queries(2):
+        agency_ids = view.get_agency_database_ids({"001", "002", "003"})
+    with django_assert_num_queries(1):
+        recipient_hash_levels = view.get_recipient_hash_levels(results)
+
+    assert agency_ids == {"001": 11}
+    assert [view.append_recipient_hash_level(result, recipient_hash_levels)["recipient_id"] for result in results] == [
+        "00000000-0000-0000-0000-000000000001-R",
+        "00000000-0000-0000-0000-000000000001-C",
+        None,
+    ]
@@ -7,8 +7,10 @@ from model_mommy import mommy
 from usaspending_api.search.tests.data.utilities import setup_elasticsearch_test
 from usaspending_api.search.v2.elasticsearch_helper import (
     spending_by_transaction_count,
+    get_all_unique_terms_aggregation,
     get_download_ids,
     es_minimal_sanitize,
+    has_all_unique_terms,
     swap_keys,
 )
 from usaspending_api.search.v2.es_sanitization import es_sanitize
@@ -140,3 +142,16 @@ def test_swap_keys():
         "action_date": "action_date",
         "transaction_amount": "transaction_amount",
     }
+
+
+def test_get_all_unique_terms_aggregation():
+    aggregation = get_all_unique_terms_aggregation("agency_agg_key", order={"_key": "asc"})
+    assert aggregation.to_dict() == {
+        "terms": {"field": "agency_agg_key", "size": 9900, "shard_size": 10000, "order": {"_key": "asc"}}
+    }
+
+
+def test_has_all_unique_terms():
+    assert has_all_unique_terms({"doc_count_error_upper_bound": 0, "sum_other_doc_count": 0, "buckets": []})
+    assert not has_all_unique_terms({"doc_count_error_upper_bound": 0, "sum_other_doc_count": 3, "buckets": []})
+    assert has_all_unique_terms({})
@@ -16,6 +16,10 @@ from usaspending_api.search.v2.es_sanitization import es_minimal_sanitize
 logger = logging.getLogger("console")
 
 DOWNLOAD_QUERY_SIZE = settings.MAX_DOWNLOAD_LIMIT
+
+# Elasticsearch allows at most 10k buckets; see get_all_unique_terms_aggregation
+MAX_UNIQUE_TERMS_SHARD_SIZE = 10000
+MAX_UNIQUE_TERMS = MAX_UNIQUE_TERMS_SHARD_SIZE - 100
 TRANSACTIONS_SOURCE_LOOKUP.update({v: k for k, v in TRANSACTIONS_SOURCE_LOOKUP.items()})
 
 
@@ -191,6 +195,26 @@ def _get_number_of_unique_terms(search, field: str) -> int:
     return response_dict.get("field_count", {"value": 0})["value"]
 
 
+def get_all_unique_terms_aggregation(field: str, **terms_values) -> A:
+    """
+    Creates a terms aggregation that returns a bucket for every unique term of field (up to MAX_UNIQUE_TERMS) in the
+    same request as the rest of the search, rather than sizing it with a separate get_number_of_unique_terms_* query.
+
+    Sizing by the number of unique terms asked every shard for 100 more terms than the total so that results were
+    accurate; asking every shard for MAX_UNIQUE_TERMS_SHARD_SIZE terms keeps that guarantee for up to MAX_UNIQUE_TERMS
+    unique terms.  Check the response with has_all_unique_terms since anything beyond that is left out.
+    """
+    return A("terms", field=field, size=MAX_UNIQUE_TERMS, shard_size=MAX_UNIQUE_TERMS_SHARD_SIZE, **terms_values)
+
+
+def has_all_unique_terms(aggregation_response: dict) -> bool:
+    """
+    Returns whether the response of a terms aggregation (e.g. from get_all_unique_terms_aggregation) includes a bucket
+    for every matching term; "sum_other_doc_count" counts the documents of the terms that were left out.
+    """
+    return aggregation_response.get("sum_other_doc_count", 0) == 0
+
+
 def get_scaled_sum_aggregations(field_to_sum: str, pagination: Optional[Pagination] = None) -> Dict[str, A]:
     """
     Creates a sum and bucket_sort aggregation that can be used for many different aggregations.
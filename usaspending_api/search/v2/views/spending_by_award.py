@@ -3,6 +3,7 @@ import copy
 from sys import maxsize
 from django.conf import settings
 from django.db.models import F
+from psycopg2.sql import Literal, SQL
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
@@ -306,14 +307,28 @@ class SpendingByAwardVisualizationViewSet(APIView):
 
     # For an unknown reason, ES tends to return the awarding agency toptier codes as integers or floats, instead of as
     # text. This function casts the code back to a string and appends any leading zeroes that were lost.
-    def get_agency_database_id(self, code):
-        if len(str(int(code))) < 3:
-            code = "{zeroes}{code}".format(zeroes=("0" * (3 - len(str(int(code))))), code=int(code))
-        agency_id = Agency.objects.filter(toptier_agency__toptier_code=code, toptier_flag=True).first()
-        submission = SubmissionAttributes.objects.filter(toptier_code=code).first()
-        if submission is None or agency_id is None:
-            return None
-        return agency_id.id
+    @staticmethod
+    def format_agency_code(code) -> str:
+        return str(int(code)).zfill(3)
+
+    @staticmethod
+    def get_agency_database_ids(codes) -> dict:
+        """
+        Returns the id of the toptier Agency of each of the given toptier codes, looked up for a whole page of results
+        at once.  Codes of agencies that are missing or have never submitted are left out.
+        """
+        submitted_codes = set(
+            SubmissionAttributes.objects.filter(toptier_code__in=codes).values_list("toptier_code", flat=True)
+        )
+        agency_ids = {}
+        agencies = (
+            Agency.objects.filter(toptier_agency__toptier_code__in=submitted_codes, toptier_flag=True)
+            .order_by("id")
+            .values_list("toptier_agency__toptier_code", "id")
+        )
+        for code, agency_id in agencies:
+            agency_ids.setdefault(code, agency_id)
+        return agency_ids
 
     def construct_es_response_for_prime_awards(self, response) -> dict:
         results = []
@@ -341,18 +356,24 @@ class SpendingByAwardVisualizationViewSet(APIView):
             if row.get("Award Amount"):
                 row["Award Amount"] = float(row["Award Amount"])
             if row.get("Awarding Agency"):
-                code = row.pop("agency_code")
-                row["awarding_agency_id"] = self.get_agency_database_id(code)
+                row["agency_code"] = self.format_agency_code(row["agency_code"])
             row["generated_internal_id"] = hit["generated_unique_award_id"]
             row["recipient_id"] = hit.get("recipient_unique_id")
             row["parent_recipient_unique_id"] = hit.get("parent_recipient_unique_id")
 
             if "Award ID" in self.fields:
                 row["Award ID"] = hit["display_award_id"]
-            row = self.append_recipient_hash_level(row)
-            row.pop("parent_recipient_unique_id")
             results.append(row)
 
+        # Resolve the agencies and recipients of the whole page at once instead of querying for each row
+        agency_ids = self.get_agency_database_ids({row["agency_code"] for row in results if row.get("Awarding Agency")})
+        recipient_hash_levels = self.get_recipient_hash_levels(results)
+        for row in results:
+            if row.get("Awarding Agency"):
+                row["awarding_agency_id"] = agency_ids.get(row.pop("agency_code"))
+            row = self.append_recipient_hash_level(row, recipient_hash_levels)
+            row.pop("parent_recipient_unique_id")
+
         last_record_unique_id = None
         last_record_sort_value = None
         offset = 1
@@ -385,38 +406,47 @@ class SpendingByAwardVisualizationViewSet(APIView):
             ],
         }
 
-    def append_recipient_hash_level(self, result) -> dict:
+    @staticmethod
+    def get_recipient_level(result) -> str:
+        return "C" if result.get("parent_recipient_unique_id") else "R"
+
+    def get_recipient_hash_levels(self, results) -> dict:
+        """
+        Returns the "hash-level" recipient id of each (DUNS, recipient level) of the given results, looked up for a
+        whole page of results at once.
+        """
+        if "recipient_id" not in self.fields:
+            return {}
+        recipient_ids = list({result["recipient_id"] for result in results if result.get("recipient_id")})
+        if not recipient_ids:
+            return {}
+
+        sql = """(
+                select
+                    rl.duns,
+                    rp.recipient_level,
+                    rp.recipient_hash || '-' ||  rp.recipient_level as hash
+                from
+                    recipient_profile rp
+                    inner join recipient_lookup rl on rl.recipient_hash = rp.recipient_hash
+                where
+                    rl.duns = any({recipient_ids}) and
+                    rp.recipient_name not in {special_cases}
+        )"""
+        rows = execute_sql_to_ordered_dictionary(
+            SQL(sql).format(recipient_ids=Literal(recipient_ids), special_cases=Literal(tuple(SPECIAL_CASES)))
+        )
+        recipient_hash_levels = {}
+        for row in rows:
+            recipient_hash_levels.setdefault((row["duns"], row["recipient_level"]), row["hash"])
+        return recipient_hash_levels
+
+    def append_recipient_hash_level(self, result, recipient_hash_levels) -> dict:
         if "recipient_id" not in self.fields:
             result.pop("recipient_id")
             return result
 
         id = result.get("recipient_id")
-        parent_id = result.get("parent_recipient_unique_id")
         if id:
-            sql = """(
-                    select
-                        rp.recipient_hash || '-' ||  rp.recipient_level as hash
-                    from
-                        recipient_profile rp
-                        inner join recipient_lookup rl on rl.recipient_hash = rp.recipient_hash
-                    where
-                        rl.duns = {recipient_id} and
-                        rp.recipient_level = case
-                            when {parent_recipient_unique_id} is null then 'R'
-                            else 'C'
-                        end and
-                    rp.recipient_name not in {special_cases}
-            )"""
-
-            special_cases = ["'" + case + "'" for case in SPECIAL_CASES]
-            SQL = sql.format(
-                recipient_id="'" + id + "'",
-                parent_recipient_unique_id=parent_id if parent_id else "null",
-                special_cases="(" + ", ".join(special_cases) + ")",
-            )
-            row = execute_sql_to_ordered_dictionary(SQL)
-            if len(row) > 0:
-                result["recipient_id"] = row[0].get("hash")
-            else:
-                result["recipient_id"] = None
+            result["recipient_id"] = recipient_hash_levels.get((id, self.get_recipient_level(result)))
         return result
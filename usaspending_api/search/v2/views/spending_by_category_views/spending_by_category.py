@@ -2,7 +2,7 @@ import copy
 import logging
 from abc import ABCMeta, abstractmethod
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List
 
 from django.conf import settings
 from django.db.models import QuerySet, Sum
@@ -23,8 +23,9 @@ from usaspending_api.common.validator.award_filter import AWARD_FILTER
 from usaspending_api.common.validator.pagination import PAGINATION
 from usaspending_api.common.validator.tinyshield import TinyShield
 from usaspending_api.search.v2.elasticsearch_helper import (
-    get_number_of_unique_terms_for_transactions,
+    get_all_unique_terms_aggregation,
     get_scaled_sum_aggregations,
+    has_all_unique_terms,
 )
 
 logger = logging.getLogger(__name__)
@@ -118,7 +119,7 @@ class AbstractSpendingByCategoryViewSet(APIView, metaclass=ABCMeta):
             .order_by("-amount")
         )
 
-    def build_elasticsearch_search_with_aggregations(self, filter_query: ES_Q) -> Optional[TransactionSearch]:
+    def build_elasticsearch_search_with_aggregations(self, filter_query: ES_Q) -> TransactionSearch:
         """
         Using the provided ES_Q object creates a TransactionSearch object with the necessary applied aggregations.
         """
@@ -133,30 +134,17 @@ class AbstractSpendingByCategoryViewSet(APIView, metaclass=ABCMeta):
             # 10k is the maximum number of allowed buckets
             size = self.pagination.upper_limit
             shard_size = size
+            if shard_size > 10000:
+                self._raise_too_many_buckets()
             sum_bucket_sort = sum_aggregations["sum_bucket_truncate"]
-            group_by_agg_key_values = {"order": {"sum_field": "desc"}}
-        else:
-            # Get count of unique buckets; terminate early if there are no buckets matching criteria
-            bucket_count = get_number_of_unique_terms_for_transactions(filter_query, f"{self.category.agg_key}.hash")
-            if bucket_count == 0:
-                return None
-            else:
-                # Add 100 to make sure that we consider enough records in each shard for accurate results;
-                # Only needed for non high-cardinality fields since those are being routed
-                size = bucket_count
-                shard_size = bucket_count + 100
-                sum_bucket_sort = sum_aggregations["sum_bucket_sort"]
-                group_by_agg_key_values = {}
-
-        if shard_size > 10000:
-            logger.warning(f"Max number of buckets reached for aggregation key: {self.category.agg_key}.")
-            raise ElasticsearchConnectionException(
-                "Current filters return too many unique items. Narrow filters to return results."
+            group_by_agg_key = A(
+                "terms", field=self.category.agg_key, size=size, shard_size=shard_size, order={"sum_field": "desc"}
             )
-
-        # Define all aggregations needed to build the response
-        group_by_agg_key_values.update({"field": self.category.agg_key, "size": size, "shard_size": shard_size})
-        group_by_agg_key = A("terms", **group_by_agg_key_values)
+        else:
+            # Every bucket is needed to sort by sum_field; this checks that all of them were returned once the
+            # search is executed (see query_elasticsearch_for_prime_awards) instead of counting them beforehand
+            sum_bucket_sort = sum_aggregations["sum_bucket_sort"]
+            group_by_agg_key = get_all_unique_terms_aggregation(self.category.agg_key)
 
         sum_field = sum_aggregations["sum_field"]
 
@@ -172,12 +160,22 @@ class AbstractSpendingByCategoryViewSet(APIView, metaclass=ABCMeta):
 
     def query_elasticsearch_for_prime_awards(self, filter_query: ES_Q) -> list:
         search = self.build_elasticsearch_search_with_aggregations(filter_query)
-        if search is None:
-            return []
         response = search.handle_execute()
-        results = self.build_elasticsearch_result(response.aggs.to_dict())
+        response_dict = response.aggs.to_dict()
+        # Routed categories only need the top buckets; the rest need all of them to be sorted accurately
+        if self.category.name not in self.high_cardinality_categories and not has_all_unique_terms(
+            response_dict.get("group_by_agg_key", {})
+        ):
+            self._raise_too_many_buckets()
+        results = self.build_elasticsearch_result(response_dict)
         return results
 
+    def _raise_too_many_buckets(self):
+        logger.warning(f"Max number of buckets reached for aggregation key: {self.category.agg_key}.")
+        raise ElasticsearchConnectionException(
+            "Current filters return too many unique items. Narrow filters to return results."
+        )
+
     @abstractmethod
     def build_elasticsearch_result(self, response: dict) -> List[dict]:
         """
@@ -8,7 +8,7 @@ from enum import Enum
 from django.conf import settings
 from django.db.models import Sum, FloatField, QuerySet
 from django.db.models.functions import Cast
-from elasticsearch_dsl import A, Q as ES_Q
+from elasticsearch_dsl import Q as ES_Q
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -19,6 +19,7 @@ from usaspending_api.awards.v2.filters.sub_award import subaward_filter
 from usaspending_api.common.api_versioning import api_transformations, API_TRANSFORM_FUNCTIONS
 from usaspending_api.common.cache_decorator import cache_response
 from usaspending_api.common.elasticsearch.search_wrappers import TransactionSearch
+from usaspending_api.common.exceptions import ElasticsearchConnectionException
 from usaspending_api.common.helpers.generic_helper import get_generic_filters_message
 from usaspending_api.common.query_with_filters import QueryWithFilters
 from usaspending_api.common.validator.award_filter import AWARD_FILTER
@@ -27,8 +28,9 @@ from usaspending_api.references.abbreviations import code_to_state, fips_to_code
 from usaspending_api.references.models import PopCounty, PopCongressionalDistrict
 from usaspending_api.search.models import SubawardView
 from usaspending_api.search.v2.elasticsearch_helper import (
+    get_all_unique_terms_aggregation,
     get_scaled_sum_aggregations,
-    get_number_of_unique_terms_for_transactions,
+    has_all_unique_terms,
 )
 
 logger = logging.getLogger(__name__)
@@ -319,18 +321,12 @@ class SpendingByGeographyVisualizationViewSet(APIView):
 
         return results
 
-    def build_elasticsearch_search_with_aggregation(self, filter_query: ES_Q) -> Optional[TransactionSearch]:
+    def build_elasticsearch_search_with_aggregation(self, filter_query: ES_Q) -> TransactionSearch:
         # Create the initial search using filters
         search = TransactionSearch().filter(filter_query)
 
-        # Check number of unique terms (buckets) for performance and restrictions on maximum buckets allowed
-        bucket_count = get_number_of_unique_terms_for_transactions(filter_query, f"{self.agg_key}.hash")
-
-        if bucket_count == 0:
-            return None
-
-        # Add 100 to make sure that we consider enough records in each shard for accurate results
-        group_by_agg_key = A("terms", field=self.agg_key, size=bucket_count, shard_size=bucket_count + 100)
+        # Every unique term is returned in the same request; query_elasticsearch checks that none were left out
+        group_by_agg_key = get_all_unique_terms_aggregation(self.agg_key)
         sum_aggregations = get_scaled_sum_aggregations(self.obligation_column)
         sum_field = sum_aggregations["sum_field"]
 
@@ -375,10 +371,13 @@ class SpendingByGeographyVisualizationViewSet(APIView):
 
     def query_elasticsearch(self, filter_query: ES_Q) -> list:
         search = self.build_elasticsearch_search_with_aggregation(filter_query)
-        if search is None:
-            return []
         response = search.handle_execute()
-        results_dict = self.build_elasticsearch_result(response.aggs.to_dict())
+        response_dict = response.aggs.to_dict()
+        if not has_all_unique_terms(response_dict.get("group_by_agg_key", {})):
+            raise ElasticsearchConnectionException(
+                "Current filters return too many unique items. Narrow filters to return results."
+            )
+        results_dict = self.build_elasticsearch_result(response_dict)
 
         if self.geo_layer_filters:
             filtered_shape_codes = set(self.geo_layer_filters) & set(results_dict.keys())
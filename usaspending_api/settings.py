@@ -55,6 +55,32 @@ IS_LOCAL = True
 # False: leave the message in the local file-backed queue to be picked up and processed by the bulk-download container
 RUN_LOCAL_DOWNLOAD_IN_PROCESS = os.environ.get("RUN_LOCAL_DOWNLOAD_IN_PROCESS", "").lower() not in ["false", "0", "no"]
 
+# How downloads write their data files
+# True: stream psql COPY output straight into the zip, counting and partitioning rows in the same pass;
+# False: write the full delimited file to disk first, then count, partition, and zip it
+STREAM_DOWNLOAD_FILES = os.environ.get("STREAM_DOWNLOAD_FILES", "").lower() in ["true", "1", "yes"]
+
+# zlib compression level (0-9) for download data files, and the number of processes used to compress the
+# partitions of a data file in parallel
+DOWNLOAD_ZIP_COMPRESSION_LEVEL = int(os.environ.get("DOWNLOAD_ZIP_COMPRESSION_LEVEL", 6))
+DOWNLOAD_ZIP_MAX_WORKERS = int(os.environ.get("DOWNLOAD_ZIP_MAX_WORKERS", os.cpu_count() or 1))
+
+# Whether zip members can be written from data that is already compressed (partitions deflated in parallel, or
+# members copied between archives without recompressing).  That relies on private zipfile internals, so it is off by
+# default and should only be turned on for Python versions the round-trip tests in test_zip_file.py have passed on
+DOWNLOAD_ZIP_COPY_COMPRESSED = os.environ.get("DOWNLOAD_ZIP_COPY_COMPRESSED", "").lower() in ["true", "1", "yes"]
+
+# Number of sources (e.g. contract and assistance data files) of a single download generated at the same time
+DOWNLOAD_SOURCE_MAX_CONCURRENCY = int(os.environ.get("DOWNLOAD_SOURCE_MAX_CONCURRENCY", 2))
+
+# Number of Elasticsearch partitions of matching IDs retrieved at the same time for keyword search downloads
+DOWNLOAD_ES_ID_MAX_CONCURRENCY = int(os.environ.get("DOWNLOAD_ES_ID_MAX_CONCURRENCY", 4))
+
+# Upload download zip files to S3 while they are being written (in parts of DOWNLOAD_S3_UPLOAD_PART_SIZE bytes)
+# instead of after the whole file has been generated on local disk; has no effect when IS_LOCAL
+STREAM_DOWNLOAD_UPLOADS = os.environ.get("STREAM_DOWNLOAD_UPLOADS", "").lower() in ["true", "1", "yes"]
+DOWNLOAD_S3_UPLOAD_PART_SIZE = int(os.environ.get("DOWNLOAD_S3_UPLOAD_PART_SIZE", 64 * 1024 * 1024))
+
 # AWS Region for USAspending Infrastructure
 USASPENDING_AWS_REGION = ""
 if not USASPENDING_AWS_REGION:
@@ -124,6 +150,12 @@ ES_AWARDS_NAME_SUFFIX = "awards"
 ES_AWARDS_QUERY_ALIAS_PREFIX = "award-query"
 ES_AWARDS_WRITE_ALIAS = "award-load-alias"
 ES_TIMEOUT = 90
+# Keep-alive connections pooled per Elasticsearch node by the client each process shares
+ES_MAX_CONNECTIONS = int(os.environ.get("ES_MAX_CONNECTIONS", 10))
+# Discover the nodes of the cluster from ES_HOSTNAME (not supported by all hosted clusters) and refresh them every
+# ES_SNIFFER_TIMEOUT seconds and after a connection failure
+ES_SNIFF = os.environ.get("ES_SNIFF", "").lower() in ["true", "1", "yes"]
+ES_SNIFFER_TIMEOUT = int(os.environ.get("ES_SNIFFER_TIMEOUT", 60))
 ES_REPOSITORY = ""
 ES_ROUTING_FIELD = "recipient_agg_key"
 
@@ -195,6 +227,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",
     "usaspending_api.common.logging.LoggingMiddleware",
+    "usaspending_api.routers.replicas.ReadYourWritesMiddleware",
 ]
 
 ROOT_URLCONF = "usaspending_api.urls"
@@ -243,14 +276,17 @@ def _configure_database_connection(environment_variable):
 # (which is "DATABASE_URL" by default). Generally speaking, DB_SOURCE is used to support server
 # environments that support the API/website and docker-compose local setup whereas DATABASE_URL
 # is used for development and operational environments (Jenkins primarily). If DB_SOURCE is provided,
-# then DB_R1 (read replica) must also be provided.
+# then DB_R1 (read replica) must also be provided, and any further read replicas are numbered DB_R2, DB_R3, ...
+DATABASE_READ_REPLICAS = []
 if os.environ.get("DB_SOURCE"):
     if not os.environ.get("DB_R1"):
         raise EnvironmentError("DB_SOURCE environment variable defined without DB_R1")
-    DATABASES = {
-        DEFAULT_DB_ALIAS: _configure_database_connection("DB_SOURCE"),
-        "db_r1": _configure_database_connection("DB_R1"),
-    }
+    DATABASES = {DEFAULT_DB_ALIAS: _configure_database_connection("DB_SOURCE")}
+    replica_number = 1
+    while os.environ.get("DB_R{}".format(replica_number)):
+        DATABASE_READ_REPLICAS.append("db_r{}".format(replica_number))
+        DATABASES["db_r{}".format(replica_number)] = _configure_database_connection("DB_R{}".format(replica_number))
+        replica_number += 1
     DATABASE_ROUTERS = ["usaspending_api.routers.replicas.ReadReplicaRouter"]
 elif os.environ.get(dj_database_url.DEFAULT_ENV):
     DATABASES = {DEFAULT_DB_ALIAS: _configure_database_connection(dj_database_url.DEFAULT_ENV)}
@@ -260,6 +296,14 @@ else:
         "Either {} or DB_SOURCE/DB_R1 environment variable must be defined".format(dj_database_url.DEFAULT_ENV)
     )
 
+# Read replicas are taken out of rotation while they lag the source database by more than READ_REPLICA_MAX_LAG_SECONDS
+# or fail the health check run against each of them every READ_REPLICA_HEALTH_CHECK_SECONDS
+READ_REPLICA_MAX_LAG_SECONDS = float(os.environ.get("READ_REPLICA_MAX_LAG_SECONDS", 60))
+READ_REPLICA_HEALTH_CHECK_SECONDS = float(os.environ.get("READ_REPLICA_HEALTH_CHECK_SECONDS", 15))
+
+# Once a request has written to the source database, send the rest of its reads there too
+READ_REPLICA_READ_YOUR_WRITES = os.environ.get("READ_REPLICA_READ_YOUR_WRITES", "").lower() in ["true", "1", "yes"]
+
 DOWNLOAD_DATABASE_URL = os.environ.get("DOWNLOAD_DATABASE_URL")
 
 # import a second database connection for ETL, connecting to the data broker
@@ -366,6 +410,9 @@ if DEBUG:
             LOGGING["loggers"][logger]["handlers"] += ["console"]
 
 
+# Seconds a filter tree (TAS, PSC, NAICS counts) loaded into an API process's memory is used before being reloaded
+FILTER_TREE_MAX_AGE_SECONDS = int(os.environ.get("FILTER_TREE_MAX_AGE_SECONDS", 60 * 60))
+
 # If caches added or renamed, edit clear_caches in usaspending_api/etl/helpers.py
 CACHES = {
     "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "default-loc-mem-cache"},
@@ -395,6 +442,24 @@ CACHE_ENVIRONMENTS = {
 # Set the usaspending-cache to whatever our environment cache dictates
 CACHES["usaspending-cache"] = CACHE_ENVIRONMENTS[CACHE_ENVIRONMENT]
 
+# Seconds a cached API response is served before it's stale and refreshed in the background (stale responses are
+# served until the refresh finishes).  Unset means responses are fresh until they expire or the cache is cleared.
+CACHE_RESPONSE_FRESH_SECONDS = (
+    int(os.environ["CACHE_RESPONSE_FRESH_SECONDS"]) if os.environ.get("CACHE_RESPONSE_FRESH_SECONDS") else None
+)
+
+# Per-endpoint overrides of the "timeout" and "fresh_timeout" seconds of cached API responses, keyed by request path
+# e.g. {"/api/v2/search/spending_over_time/": {"fresh_timeout": 60 * 60, "timeout": 60 * 60 * 24}}
+CACHE_RESPONSE_TIMEOUTS = {}
+
+# Cached API responses of at least this many bytes are stored compressed
+CACHE_RESPONSE_COMPRESS_MIN_BYTES = int(os.environ.get("CACHE_RESPONSE_COMPRESS_MIN_BYTES", 1024))
+
+# Seconds a request computing an uncached response holds its cache key's lock, and the seconds other requests for the
+# same key wait for that response before computing it themselves
+CACHE_RESPONSE_LOCK_SECONDS = int(os.environ.get("CACHE_RESPONSE_LOCK_SECONDS", 5 * 60))
+CACHE_RESPONSE_LOCK_WAIT_SECONDS = int(os.environ.get("CACHE_RESPONSE_LOCK_WAIT_SECONDS", 60))
+
 # DRF extensions
 REST_FRAMEWORK_EXTENSIONS = {
     # Not caching errors, these are logged to exceptions.log
@@ -2,8 +2,10 @@ from django.http import HttpResponse
 from django.views import View
 import json
 
+from usaspending_api.common.cache_decorator import get_response_cache_metrics
+
 
 class StatusView(View):
     def get(self, request, format=None):
-        response_object = {"status": "running"}
+        response_object = {"status": "running", "response_cache": get_response_cache_metrics()}
         return HttpResponse(json.dumps(response_object))